@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Auth Pipeline Microbenchmarks
+
+This script times each stage of `requires_auth` in isolation, both cold
+(caches empty, so the work is really done) and warm (caches populated, as
+on a repeat request):
+
+    get_token_auth_header    Authorization header parsing
+    get_unverified_header    JOSE header decoding
+    jwks lookup              kid -> key, parsing the JWKS when cold
+    jwt.decode RS256/ES256   signature and claim validation
+    verify_token             the full verification, with and without the token cache
+    check_permissions        permission list vs precompiled bitmask
+    requires_auth            the whole decorator around a no-op endpoint
+
+For every stage it reports the median time per call over several rounds
+and the peak memory allocated by a single call (tracemalloc). Tokens are
+minted by the local issuer, so no Auth0 tenant is needed.
+
+Usage:
+    python -m benchmarks.auth_bench --rounds 5 --output auth_bench.json
+
+Run from the backend directory.
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_per_call(func, rounds, min_time=0.2):
+    """
+    Return the median seconds per call of `func` over `rounds` rounds.
+
+    Each round repeats the call until it has run for at least `min_time`
+    seconds, so fast stages are measured over many iterations.
+    """
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 10:
+            break
+        iterations *= 10
+
+    iterations = max(1, int(iterations * min_time / elapsed))
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - started) / iterations)
+    return statistics.median(samples)
+
+
+def peak_bytes_per_call(func):
+    """Return the peak memory traced while running `func` once."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        func()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def build_cases():
+    """
+    Return (stage, variant, func) tuples for every measurement.
+
+    Cold variants rebuild or bypass the relevant cache on every call, and
+    their timing includes that setup, so they are upper bounds; warm
+    variants show the cost a cache hit leaves.
+    """
+    os.environ['AUTH0_ALGORITHM'] = 'RS256,ES256'
+    sys.path.insert(0, BACKEND_DIR)
+
+    from flask import Flask
+    from jose import jwt
+    from src.auth import auth
+    from src.auth.jwks import JWKSCache, StaticJWKSSource
+    from src.auth.local_issuer import LocalIssuer
+    from src.auth.token_cache import TokenCache
+
+    rs256 = LocalIssuer('RS256')
+    es256 = LocalIssuer('ES256')
+    jwks = {'keys': rs256.jwks()['keys'] + es256.jwks()['keys']}
+    rs_token = rs256.mint_role('Manager')
+    es_token = es256.mint_role('Manager')
+    rs_key = JWKSCache(StaticJWKSSource(jwks)).get_key(rs256.kid)
+    es_key = JWKSCache(StaticJWKSSource(jwks)).get_key(es256.kid)
+    auth.jwks_cache.set_source(StaticJWKSSource(jwks))
+    payload = auth.verify_token(rs_token).payload
+    granted = auth.verify_token(rs_token).permissions
+    required = auth.permission_registry.mask(['patch:drinks'])
+
+    app = Flask('auth_bench')
+
+    @auth.requires_auth('patch:drinks')
+    def endpoint(payload):
+        return payload
+
+    context = app.test_request_context(headers={'Authorization': f'Bearer {rs_token}'})
+    context.push()
+
+    def decode(token, key):
+        return jwt.decode(token, key, algorithms=auth.ALGORITHMS,
+                          audience=auth.API_AUDIENCE, issuer=f'https://{auth.AUTH0_DOMAIN}/')
+
+    def cold_jwks_lookup():
+        JWKSCache(StaticJWKSSource(jwks)).get_key(rs256.kid)
+
+    warm_cache = auth.token_cache
+
+    def without_token_cache(func):
+        def run():
+            auth.token_cache = TokenCache(max_entries=0)
+            try:
+                return func()
+            finally:
+                auth.token_cache = warm_cache
+        return run
+
+    return [
+        ('get_token_auth_header', 'warm', auth.get_token_auth_header),
+        ('get_unverified_header', 'warm', lambda: jwt.get_unverified_header(rs_token)),
+        ('jwks lookup', 'cold', cold_jwks_lookup),
+        ('jwks lookup', 'warm', lambda: auth.jwks_cache.get_key(rs256.kid)),
+        ('jwt.decode RS256', 'jwk dict', lambda: decode(rs_token, jwks['keys'][0])),
+        ('jwt.decode RS256', 'parsed key', lambda: decode(rs_token, rs_key)),
+        ('jwt.decode ES256', 'jwk dict', lambda: decode(es_token, jwks['keys'][1])),
+        ('jwt.decode ES256', 'parsed key', lambda: decode(es_token, es_key)),
+        ('verify_token RS256', 'cold', without_token_cache(lambda: auth.verify_token(rs_token))),
+        ('verify_token RS256', 'warm', lambda: auth.verify_token(rs_token)),
+        ('verify_token ES256', 'cold', without_token_cache(lambda: auth.verify_token(es_token))),
+        ('verify_token ES256', 'warm', lambda: auth.verify_token(es_token)),
+        # Baseline: the membership test check_permissions did before the bitmask
+        ('permission check', 'list', lambda: 'patch:drinks' in payload['permissions']),
+        ('check_permissions', 'mask path', lambda: auth.check_permissions('patch:drinks', payload)),
+        ('check_permission_mask', 'bitmask', lambda: auth.check_permission_mask(granted, required)),
+        ('requires_auth', 'cold', without_token_cache(endpoint)),
+        ('requires_auth', 'warm', endpoint),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark the auth pipeline stages')
+    parser.add_argument('--rounds', type=int, default=5, help='Timing rounds per stage')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Minimum seconds per timing round')
+    parser.add_argument('--output', help='Optional path of a JSON results file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'stage':<24} {'variant':<11} {'per call':>12} {'peak alloc':>12}")
+    for stage, variant, func in build_cases():
+        func()
+        seconds = time_per_call(func, args.rounds, args.min_time)
+        peak = peak_bytes_per_call(func)
+        results.append({
+            'stage': stage,
+            'variant': variant,
+            'us_per_call': round(seconds * 1e6, 3),
+            'peak_bytes': peak,
+        })
+        print(f"{stage:<24} {variant:<11} {seconds * 1e6:>9.2f} us {peak:>10} B")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rounds': args.rounds, 'results': results}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
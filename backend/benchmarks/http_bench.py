@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+HTTP Benchmark for the Coffee Shop API
+
+This script boots the API in a separate process against a freshly seeded
+SQLite database, drives each endpoint with a mix of public, Barista and
+Manager requests, and reports requests per second and p50/p95/p99 latency
+per route. Tokens are minted by the local issuer (src/auth/local_issuer.py),
+so no Auth0 tenant is needed while signature verification still runs.
+
+Results are written as JSON so runs can be compared across commits.
+
+Usage:
+    python -m benchmarks.http_bench --drinks 1000 --duration 10 --concurrency 8 \
+        --output bench_results.json
+
+Run from the backend directory.
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Route name -> (method, path, role); role None sends no token.
+# Paths may contain {id} (an existing drink) and bodies are built per request.
+SCENARIOS = {
+    'GET /drinks': ('GET', '/drinks', None),
+    'GET /drinks (304)': ('GET', '/drinks', None),
+    'GET /drinks?limit=50': ('GET', '/drinks?limit=50&after={id}', None),
+    'GET /drinks-detail barista': ('GET', '/drinks-detail', 'Barista'),
+    'GET /drinks-detail manager': ('GET', '/drinks-detail', 'Manager'),
+    'POST /drinks': ('POST', '/drinks', 'Manager'),
+    'PATCH /drinks/<id>': ('PATCH', '/drinks/{id}', 'Manager'),
+    'DELETE /drinks/<id>': ('DELETE', '/drinks/{id}', 'Manager'),
+}
+
+COLORS = ('brown', 'white', 'black', 'beige', 'cream', 'caramel')
+
+
+def seed_recipe(n):
+    """Return a deterministic recipe for the n-th seeded drink."""
+    return [
+        {'name': f'ingredient-{(n + i) % 50}', 'color': COLORS[(n + i) % len(COLORS)], 'parts': 1 + i}
+        for i in range(1 + n % 4)
+    ]
+
+
+def run_server(database_url, jwks_path, algorithm, drinks, ready):
+    """
+    Seed the database and serve the API (runs in a child process).
+
+    Args:
+        database_url: SQLite URL of the benchmark database
+        jwks_path: JWKS file published by the local issuer
+        algorithm: Signing algorithm of the local issuer
+        drinks: Number of drinks to seed
+        ready: multiprocessing queue receiving the server port
+    """
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['AUTH0_JWKS_URL'] = jwks_path
+    os.environ['AUTH0_ALGORITHM'] = algorithm
+    sys.path.insert(0, BACKEND_DIR)
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from src.api import app
+    from src.database.models import db, Drink
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        rows = [{'title': f'drink-{n}', 'recipe': seed_recipe(n)} for n in range(drinks)]
+        for start in range(0, len(rows), 5000):
+            db.session.execute(Drink.__table__.insert(), rows[start:start + 5000])
+        db.session.commit()
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+        disable_nagle_algorithm = True
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveHandler)
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at `fraction` (0..1) of an ascending list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Worker(threading.Thread):
+    """Issue requests for one scenario over a keep-alive connection."""
+
+    def __init__(self, port, scenario, tokens, ids, deadline, offset):
+        super().__init__(daemon=True)
+        self.port = port
+        self.scenario = scenario
+        self.tokens = tokens
+        self.ids = ids
+        self.deadline = deadline
+        self.offset = offset
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    def run(self):
+        name, (method, path, role) = self.scenario
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        etag = None
+        n = self.offset
+
+        while time.perf_counter() < self.deadline:
+            n += 1
+            headers = {}
+            body = None
+            if role is not None:
+                tokens = self.tokens[role]
+                headers['Authorization'] = f'Bearer {tokens[n % len(tokens)]}'
+            if name == 'GET /drinks (304)' and etag:
+                headers['If-None-Match'] = etag
+
+            drink_id = self.ids[n % len(self.ids)] if self.ids else 0
+            if method == 'POST':
+                body = {'title': f'bench-{self.offset}-{n}', 'recipe': seed_recipe(n)}
+            elif method == 'PATCH':
+                body = {'recipe': seed_recipe(n)}
+            elif method == 'DELETE':
+                if not self.ids:
+                    break
+                drink_id = self.ids.pop()
+
+            if body is not None:
+                body = json.dumps(body).encode('utf-8')
+                headers['Content-Type'] = 'application/json'
+
+            started = time.perf_counter()
+            try:
+                connection.request(method, path.format(id=drink_id), body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+                continue
+            self.latencies.append(time.perf_counter() - started)
+            self.statuses[response.status] = self.statuses.get(response.status, 0) + 1
+            etag = response.getheader('ETag', etag)
+
+        connection.close()
+
+
+def run_scenario(port, name, tokens, ids, duration, concurrency):
+    """
+    Drive one route for `duration` seconds and summarize its latency.
+
+    Returns:
+        dict: requests, errors, status counts, rps and latency percentiles (ms)
+    """
+    deadline = time.perf_counter() + duration
+    method = SCENARIOS[name][0]
+    workers = []
+    for index in range(concurrency):
+        # Writers that consume ids (DELETE) get disjoint slices
+        worker_ids = ids[index::concurrency] if method == 'DELETE' else ids
+        workers.append(Worker(port, (name, SCENARIOS[name]), tokens, list(worker_ids),
+                              deadline, index * 1_000_000))
+
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for worker in workers for latency in worker.latencies)
+    statuses = {}
+    for worker in workers:
+        for status, count in worker.statuses.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(worker.errors for worker in workers),
+        'statuses': statuses,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': ms(sum(latencies) / len(latencies)) if latencies else None,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+    }
+
+
+def fetch_ids(port, limit=1000):
+    """Return up to `limit` drink ids through the paginated listing."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request('GET', f'/drinks?fields=id&limit={limit}')
+    data = json.loads(connection.getresponse().read())
+    connection.close()
+    return [drink['id'] for drink in data['drinks']]
+
+
+def git_commit():
+    """Return the current git commit, or None outside a checkout."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Coffee Shop API over HTTP')
+    parser.add_argument('--drinks', type=int, default=1000,
+                        help='Number of drinks to seed (10 to 100000)')
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Seconds to drive each route')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Concurrent client connections per route')
+    parser.add_argument('--subjects', type=int, default=100,
+                        help='Distinct token subjects per role')
+    parser.add_argument('--algorithm', default='ES256', choices=('ES256', 'RS256', 'HS256'),
+                        help='Signing algorithm of the local token issuer')
+    parser.add_argument('--routes', nargs='*', choices=sorted(SCENARIOS),
+                        help='Routes to run (default: all)')
+    parser.add_argument('--output', default='bench_results.json',
+                        help='Path of the JSON results file')
+    args = parser.parse_args()
+
+    if not 10 <= args.drinks <= 100000:
+        parser.error('--drinks must be between 10 and 100000')
+
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ['AUTH0_ALGORITHM'] = args.algorithm
+    from src.auth.local_issuer import LocalIssuer
+
+    workdir = tempfile.mkdtemp(prefix='coffee-bench-')
+    issuer = LocalIssuer(args.algorithm)
+    jwks_path = os.path.join(workdir, 'jwks.json')
+    with open(jwks_path, 'w') as f:
+        json.dump(issuer.jwks(), f)
+    tokens = {
+        role: issuer.mint_many(role, args.subjects)
+        for role in ('Barista', 'Manager')
+    }
+
+    print(f"Seeding {args.drinks} drinks and starting the API...")
+    # A spawned process imports the app with the benchmark's environment
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    server = context.Process(
+        target=run_server,
+        args=(f"sqlite:///{os.path.join(workdir, 'bench.db')}", jwks_path,
+              args.algorithm, args.drinks, ready),
+        daemon=True
+    )
+    server.start()
+    port = ready.get(timeout=600)
+
+    results = {}
+    try:
+        ids = fetch_ids(port)
+        for name in args.routes or list(SCENARIOS):
+            # DELETE runs last and consumes the upper half of the sampled ids
+            route_ids = ids[len(ids) // 2:] if name == 'DELETE /drinks/<id>' else ids
+            result = run_scenario(port, name, tokens, route_ids, args.duration, args.concurrency)
+            results[name] = result
+            print(f"  {name:<28} {result['rps']:>9.1f} req/s  "
+                  f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms")
+    finally:
+        server.terminate()
+        server.join()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'drinks': args.drinks,
+            'duration': args.duration,
+            'concurrency': args.concurrency,
+            'subjects': args.subjects,
+            'algorithm': args.algorithm,
+        },
+        'routes': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
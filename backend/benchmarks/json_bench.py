@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Drinks Listing Encoding Benchmark
+
+This script times building and encoding the GET /drinks (short form) and
+GET /drinks-detail (long form) bodies for large menus, which is the work
+done on every menu snapshot rebuild:
+
+    dicts + json        per-drink dicts encoded by the standard library
+                        the way jsonify does (the previous code path)
+    dicts + <encoder>   the same dicts, encoded by each JSON library
+    views + <encoder>   DrinkView structs, encoded by each JSON library
+
+Every installed encoder of src/encoding.py (msgspec, orjson, stdlib) is
+measured, and each result is checked to be byte-identical to the
+standard library body. The drinks are generated in memory, so only the
+building and encoding is measured, not the database query.
+
+With --database, it also times a full menu snapshot rebuild against a
+seeded SQLite database, loading the drinks either as ORM instances or
+as rows of the Core select Drink.listing_rows() runs. For these it also
+reports the garbage collections triggered by one rebuild.
+
+Usage:
+    python -m benchmarks.json_bench --drinks 1000 10000 100000 --output json_bench.json
+    python -m benchmarks.json_bench --drinks 10000 --database
+
+Run from the backend directory.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+from collections import namedtuple
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.auth_bench import peak_bytes_per_call, time_per_call  # noqa: E402
+from src.database.views import long_view, short_view  # noqa: E402
+from src.encoding import ENCODERS, load_encoder  # noqa: E402
+
+
+# Stand-in for a loaded Drink row
+Row = namedtuple('Row', ['id', 'title', 'recipe'])
+
+COLORS = ('brown', 'white', 'black', 'cream', 'blue', 'caramel')
+
+
+def make_rows(count, ingredients=3):
+    """Return `count` drinks with `ingredients` ingredients each."""
+    return [
+        Row(n, f'drink {n}', [
+            {'name': f'ingredient {i}', 'color': COLORS[(n + i) % len(COLORS)], 'parts': i + 1}
+            for i in range(ingredients)
+        ])
+        for n in range(1, count + 1)
+    ]
+
+
+def stdlib_jsonify(data):
+    """Encode like Flask's jsonify: compact, sorted keys, trailing newline."""
+    return (json.dumps(data, separators=(',', ':'), sort_keys=True) + '\n').encode('utf-8')
+
+
+def short_dicts(rows):
+    return [
+        {'id': row.id, 'title': row.title,
+         'recipe': [{'color': r['color'], 'parts': r['parts']} for r in row.recipe]}
+        for row in rows
+    ]
+
+
+def long_dicts(rows):
+    return [{'id': row.id, 'title': row.title, 'recipe': row.recipe} for row in rows]
+
+
+def short_views(rows):
+    return [short_view(row.id, row.title, row.recipe) for row in rows]
+
+
+def long_views(rows):
+    return [long_view(row.id, row.title, row.recipe) for row in rows]
+
+
+def build_cases(rows):
+    """
+    Return (form, variant, func) tuples for every measurement.
+
+    Each func builds the listing from `rows` and returns the encoded body.
+    """
+    encoders = {}
+    for name in ENCODERS:
+        try:
+            encoders[name] = load_encoder(name)[1]
+        except ImportError:
+            print(f"→ {name} is not installed, skipped")
+
+    cases = []
+    for form, make_dicts, make_views in (('short', short_dicts, short_views),
+                                         ('long', long_dicts, long_views)):
+        cases.append((form, 'dicts + json',
+                      lambda make=make_dicts: stdlib_jsonify({'success': True, 'drinks': make(rows)})))
+        for name, dumps in encoders.items():
+            cases.append((form, f'dicts + {name}',
+                          lambda make=make_dicts, dumps=dumps: dumps({'success': True, 'drinks': make(rows)})))
+            cases.append((form, f'views + {name}',
+                          lambda make=make_views, dumps=dumps: dumps({'success': True, 'drinks': make(rows)})))
+    return cases
+
+
+def gc_collections(func):
+    """Return the garbage collections of any generation run during `func`."""
+    before = sum(generation['collections'] for generation in gc.get_stats())
+    func()
+    return sum(generation['collections'] for generation in gc.get_stats()) - before
+
+
+def build_rebuild_cases(count, directory):
+    """
+    Seed a SQLite database with `count` drinks and return rebuild cases.
+
+    Returns:
+        list: (form, variant, func) tuples; each func rebuilds the menu
+              snapshot and returns the long form body
+    """
+    from flask import Flask
+    from src.database.menu import MenuSnapshot
+    from src.database.models import Drink, db, setup_db
+
+    app = Flask('json_bench')
+    setup_db(app, database_path=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+    app.app_context().push()
+    db.drop_all()
+    db.create_all()
+    rows = make_rows(count)
+    for start in range(0, count, 5000):
+        db.session.execute(Drink.__table__.insert(), [
+            {'id': row.id, 'title': row.title, 'recipe': row.recipe}
+            for row in rows[start:start + 5000]
+        ])
+    db.session.commit()
+    db.session.remove()
+
+    def orm_rows():
+        drinks = Drink.query.order_by(Drink.id).all()
+        # Drop the identity map, as the end of a request does
+        db.session.remove()
+        return drinks
+
+    cases = []
+    for variant, loader in (('orm instances', orm_rows), ('core rows', Drink.listing_rows)):
+        snapshot = MenuSnapshot(loader)
+
+        def rebuild(snapshot=snapshot):
+            snapshot.invalidate()
+            return snapshot.get().long
+        cases.append(('rebuild', variant, rebuild))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark drinks listing encoding')
+    parser.add_argument('--drinks', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Menu sizes to measure')
+    parser.add_argument('--rounds', type=int, default=5, help='Timing rounds per case')
+    parser.add_argument('--min-time', type=float, default=0.5,
+                        help='Minimum seconds per timing round')
+    parser.add_argument('--database', action='store_true',
+                        help='Also time menu snapshot rebuilds from a seeded SQLite database')
+    parser.add_argument('--output', help='Optional path of a JSON results file')
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp(prefix='json_bench-')
+
+    results = []
+    for count in args.drinks:
+        rows = make_rows(count)
+        print(f"\n{count} drinks")
+        print(f"{'form':<6} {'variant':<18} {'per build':>12} {'speedup':>8} {'peak alloc':>12}")
+
+        baseline = {}
+        for form, variant, func in build_cases(rows):
+            body = func()
+            if form not in baseline:
+                baseline[form] = (body, None)
+            elif body != baseline[form][0]:
+                print(f"✗ {form} {variant}: body differs from the standard library's")
+
+            seconds = time_per_call(func, args.rounds, args.min_time)
+            peak = peak_bytes_per_call(func)
+            if baseline[form][1] is None:
+                baseline[form] = (body, seconds)
+            speedup = baseline[form][1] / seconds
+
+            results.append({
+                'drinks': count,
+                'form': form,
+                'variant': variant,
+                'ms_per_build': round(seconds * 1e3, 3),
+                'speedup': round(speedup, 2),
+                'peak_bytes': peak,
+                'body_bytes': len(body),
+            })
+            print(f"{form:<6} {variant:<18} {seconds * 1e3:>9.2f} ms {speedup:>7.1f}x {peak:>10} B")
+
+        if not args.database:
+            continue
+        print(f"\n{'form':<8} {'variant':<14} {'per build':>12} {'peak alloc':>12} {'gc runs':>8}")
+        for form, variant, func in build_rebuild_cases(count, directory):
+            func()
+            seconds = time_per_call(func, args.rounds, args.min_time)
+            peak = peak_bytes_per_call(func)
+            collections = gc_collections(func)
+            results.append({
+                'drinks': count,
+                'form': form,
+                'variant': variant,
+                'ms_per_build': round(seconds * 1e3, 3),
+                'peak_bytes': peak,
+                'gc_collections': collections,
+            })
+            print(f"{form:<8} {variant:<14} {seconds * 1e3:>9.2f} ms {peak:>10} B {collections:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rounds': args.rounds, 'results': results}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Mock Auth0 Management API
+
+This script serves an in-memory Auth0 tenant implementing the parts of the
+Management API used by setup_auth0.py, so provisioning runs can be tested
+and timed without a real tenant. It mimics Auth0's pagination
+(page/per_page/include_totals), its 409 conflicts and its rate limiting:
+with --rate-limit, calls beyond the allowed rate get 429 with
+X-RateLimit-Limit/Remaining/Reset headers. --latency adds a delay to every
+call to model the network round-trip.
+
+GET /__stats returns the number of calls per HTTP method, so a run can be
+checked for the write calls it made. Bulk user-import jobs complete as
+soon as they are posted.
+
+Usage:
+    python mock_auth0_api.py --port 8766 --rate-limit 50 --latency 0.05
+
+    python setup_auth0.py --domain mock --client-id x --client-secret y \
+        --base-url http://127.0.0.1:8766
+"""
+
+import argparse
+import email.parser
+import email.policy
+import json
+import math
+import re
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+DEFAULT_API_IDENTIFIER = 'coffee-shop-api'
+
+# Scopes defined on the mock Coffee Shop API
+DEFAULT_SCOPES = (
+    'get:drinks',
+    'get:drinks-detail',
+    'post:drinks',
+    'patch:drinks',
+    'delete:drinks',
+    'get:profiles',
+)
+
+# Largest page Auth0 returns
+MAX_PER_PAGE = 100
+
+# Users the list endpoint pages through; later pages are refused
+LIST_USERS_LIMIT = 1000
+
+
+class MockError(Exception):
+    """An API error response."""
+
+    def __init__(self, status, message):
+        self.status = status
+        self.message = message
+
+
+class MockTenant:
+    """
+    In-memory tenant state behind the mock API.
+
+    Args:
+        api_identifier: Identifier of the Coffee Shop API resource server
+        scopes: Permission values defined on that API
+        rate_limit: Calls per second allowed, None for no limit
+        latency: Seconds added to every call
+    """
+
+    def __init__(self, api_identifier=DEFAULT_API_IDENTIFIER, scopes=DEFAULT_SCOPES,
+                 rate_limit=None, latency=0.0):
+        self.rate_limit = rate_limit
+        self.latency = latency
+
+        self.resource_servers = [{
+            'id': 'rs_' + secrets.token_hex(8),
+            'name': 'Coffee Shop API',
+            'identifier': api_identifier,
+            'scopes': [{'value': scope, 'description': scope} for scope in scopes],
+        }]
+        # role id -> role
+        self.roles = {}
+        # role id -> set of (resource server identifier, permission name)
+        self.role_permissions = {}
+        # user id -> user
+        self.users = {}
+        # email -> user id
+        self.emails = {}
+        # user id -> set of role ids
+        self.user_roles = {}
+        # connection name -> connection
+        self.connections = {
+            name: {'id': 'con_' + secrets.token_hex(8), 'name': name, 'strategy': 'auth0'}
+            for name in ('Username-Password-Authentication',)
+        }
+        # job id -> (job, errors)
+        self.jobs = {}
+
+        # Calls per HTTP method, for tests
+        self.calls = {}
+        self.rate_limited = 0
+
+        self._tokens = float(rate_limit or 0)
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Rate limiting
+
+    def take_token(self):
+        """
+        Consume one call from the rate limit bucket.
+
+        Returns:
+            tuple: (allowed, remaining, reset) with reset as Unix time
+        """
+        if not self.rate_limit:
+            return True, 0, 0
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit,
+                           self._tokens + (now - self._refilled_at) * self.rate_limit)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True, int(self._tokens), 0
+        self.rate_limited += 1
+        wait = (1 - self._tokens) / self.rate_limit
+        return False, 0, math.ceil(time.time() + wait)
+
+    # Helpers
+
+    def _role(self, role_id):
+        if role_id not in self.roles:
+            raise MockError(404, 'The role does not exist.')
+        return self.roles[role_id]
+
+    def _user(self, user_id):
+        if user_id not in self.users:
+            raise MockError(404, 'The user does not exist.')
+        return self.users[user_id]
+
+    def _resource_server(self, identifier):
+        for server in self.resource_servers:
+            if server['identifier'] == identifier:
+                return server
+        return None
+
+    # Endpoints; each returns (status, body)
+
+    def list_resource_servers(self, query, body):
+        return 200, paginate('resource_servers', self.resource_servers, query)
+
+    def list_roles(self, query, body):
+        roles = sorted(self.roles.values(), key=lambda role: role['name'])
+        name_filter = query.get('name_filter')
+        if name_filter:
+            roles = [role for role in roles if name_filter.lower() in role['name'].lower()]
+        return 200, paginate('roles', roles, query)
+
+    def create_role(self, query, body):
+        name = (body or {}).get('name')
+        if not name:
+            raise MockError(400, 'Payload validation error: name is required.')
+        if any(role['name'] == name for role in self.roles.values()):
+            raise MockError(409, 'Role name already exists')
+        role = {'id': 'rol_' + secrets.token_hex(8), 'name': name,
+                'description': body.get('description', '')}
+        self.roles[role['id']] = role
+        self.role_permissions[role['id']] = set()
+        return 200, role
+
+    def update_role(self, query, body, role_id):
+        role = self._role(role_id)
+        for key in ('name', 'description'):
+            if key in (body or {}):
+                role[key] = body[key]
+        return 200, role
+
+    def list_role_permissions(self, query, body, role_id):
+        self._role(role_id)
+        permissions = [
+            {'resource_server_identifier': server, 'permission_name': name}
+            for server, name in sorted(self.role_permissions[role_id])
+        ]
+        return 200, paginate('permissions', permissions, query)
+
+    def _permission_set(self, body):
+        permissions = set()
+        for permission in (body or {}).get('permissions', []):
+            server = self._resource_server(permission.get('resource_server_identifier'))
+            name = permission.get('permission_name')
+            if server is None or name not in {scope['value'] for scope in server['scopes']}:
+                raise MockError(400, f'Permission {name} does not exist.')
+            permissions.add((server['identifier'], name))
+        return permissions
+
+    def add_role_permissions(self, query, body, role_id):
+        self._role(role_id)
+        self.role_permissions[role_id] |= self._permission_set(body)
+        return 201, {}
+
+    def remove_role_permissions(self, query, body, role_id):
+        self._role(role_id)
+        self.role_permissions[role_id] -= self._permission_set(body)
+        return 204, None
+
+    def list_users(self, query, body):
+        users = sorted(self.users.values(), key=lambda user: user['email'])
+        page = int(query.get('page', 0))
+        per_page = min(int(query.get('per_page', 50)), MAX_PER_PAGE)
+        if (page + 1) * per_page > LIST_USERS_LIMIT:
+            raise MockError(400, f'You can only page through the first {LIST_USERS_LIMIT} records.')
+        return 200, paginate('users', users, query)
+
+    def list_role_users(self, query, body, role_id):
+        self._role(role_id)
+        users = sorted(
+            ({'user_id': user_id, 'email': self.users[user_id]['email']}
+             for user_id, role_ids in self.user_roles.items() if role_id in role_ids),
+            key=lambda user: user['user_id']
+        )
+        if 'take' not in query:
+            return 200, paginate('users', users, query)
+
+        # Checkpoint pagination; the mock's checkpoint is the next offset
+        start = int(query.get('from') or 0)
+        take = min(int(query['take']), MAX_PER_PAGE)
+        result = {'users': users[start:start + take]}
+        if start + take < len(users):
+            result['next'] = str(start + take)
+        return 200, result
+
+    def assign_role_users(self, query, body, role_id):
+        self._role(role_id)
+        user_ids = (body or {}).get('users', [])
+        for user_id in user_ids:
+            self._user(user_id)
+        for user_id in user_ids:
+            self.user_roles[user_id].add(role_id)
+        return 200, None
+
+    def users_by_email(self, query, body):
+        user_id = self.emails.get((query.get('email') or '').lower())
+        return 200, [self.users[user_id]] if user_id else []
+
+    def create_user(self, query, body):
+        body = body or {}
+        if not body.get('email') or not body.get('connection'):
+            raise MockError(400, 'Payload validation error: email and connection are required.')
+        if not body.get('password'):
+            raise MockError(400, 'Payload validation error: password is required.')
+        if body['email'].lower() in self.emails:
+            raise MockError(409, 'The user already exists.')
+        return 201, self._add_user(body['email'], body['connection'])
+
+    def _add_user(self, email, connection, user_id=None):
+        user = {
+            'user_id': 'auth0|' + (user_id or secrets.token_hex(12)),
+            'email': email.lower(),
+            'email_verified': False,
+            'identities': [{'connection': connection, 'provider': 'auth0'}],
+        }
+        self.users[user['user_id']] = user
+        self.emails[user['email']] = user['user_id']
+        self.user_roles[user['user_id']] = set()
+        return user
+
+    def list_connections(self, query, body):
+        connections = list(self.connections.values())
+        if query.get('name'):
+            connections = [c for c in connections if c['name'] == query['name']]
+        return 200, paginate('connections', connections, query)
+
+    def import_users(self, query, body):
+        """Run a users-imports job at once; its status is then 'completed'."""
+        body = body or {}
+        connection = next((c for c in self.connections.values()
+                           if c['id'] == body.get('connection_id')), None)
+        if connection is None or 'users' not in body:
+            raise MockError(400, 'Payload validation error: connection_id and users are required.')
+        try:
+            users = json.loads(body['users'])
+        except ValueError:
+            raise MockError(400, 'The users file is not valid JSON.')
+
+        errors = []
+        inserted = 0
+        for index, user in enumerate(users):
+            address = (user.get('email') or '').lower()
+            if not address:
+                errors.append({'user': user, 'errors': [
+                    {'code': 'OBJECT_MISSING_REQUIRED_PROPERTY', 'message': 'Missing email'}]})
+            elif address in self.emails or 'auth0|' + str(user.get('user_id')) in self.users:
+                errors.append({'user': user, 'errors': [
+                    {'code': 'DUPLICATED_USER', 'message': 'The user already exist'}]})
+            else:
+                self._add_user(address, connection['name'], user.get('user_id'))
+                inserted += 1
+
+        job = {
+            'id': 'job_' + secrets.token_hex(8),
+            'type': 'users_import',
+            'status': 'completed',
+            'connection_id': connection['id'],
+            'summary': {'failed': len(errors), 'updated': 0, 'inserted': inserted,
+                        'total': len(users)},
+        }
+        self.jobs[job['id']] = (job, errors)
+        return 202, {key: job[key] for key in ('id', 'type', 'connection_id')} | {'status': 'pending'}
+
+    def get_job(self, query, body, job_id):
+        if job_id not in self.jobs:
+            raise MockError(404, 'The job does not exist.')
+        return 200, self.jobs[job_id][0]
+
+    def get_job_errors(self, query, body, job_id):
+        if job_id not in self.jobs:
+            raise MockError(404, 'The job does not exist.')
+        errors = self.jobs[job_id][1]
+        return (200, errors) if errors else (204, None)
+
+    def list_user_roles(self, query, body, user_id):
+        self._user(user_id)
+        roles = sorted((self.roles[role_id] for role_id in self.user_roles[user_id]),
+                       key=lambda role: role['name'])
+        return 200, paginate('roles', roles, query)
+
+    def assign_user_roles(self, query, body, user_id):
+        self._user(user_id)
+        role_ids = (body or {}).get('roles', [])
+        for role_id in role_ids:
+            self._role(role_id)
+        self.user_roles[user_id].update(role_ids)
+        return 204, None
+
+    def remove_user_roles(self, query, body, user_id):
+        self._user(user_id)
+        self.user_roles[user_id].difference_update((body or {}).get('roles', []))
+        return 204, None
+
+    def stats(self):
+        """Return call counters, for tests."""
+        return {
+            'calls': dict(self.calls),
+            'writes': sum(count for method, count in self.calls.items() if method != 'GET'),
+            'rate_limited': self.rate_limited,
+            'roles': len(self.roles),
+            'users': len(self.users),
+        }
+
+
+def paginate(key, items, query):
+    """Page a list the way the Management API does."""
+    if 'page' not in query and 'per_page' not in query and query.get('include_totals') != 'true':
+        return items[:50]
+    page = int(query.get('page', 0))
+    per_page = min(int(query.get('per_page', 50)), MAX_PER_PAGE)
+    selected = items[page * per_page:(page + 1) * per_page]
+    if query.get('include_totals') == 'true':
+        return {key: selected, 'start': page * per_page, 'limit': per_page, 'total': len(items)}
+    return selected
+
+
+def parse_body(content_type, raw):
+    """Decode a JSON or multipart/form-data request body."""
+    if not raw:
+        return None
+    if not content_type.startswith('multipart/form-data'):
+        return json.loads(raw)
+
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + raw
+    )
+    return {
+        part.get_param('name', header='content-disposition'):
+            part.get_payload(decode=True).decode('utf-8')
+        for part in message.iter_parts()
+    }
+
+
+# (method, path pattern) -> MockTenant method name; groups are passed as arguments
+ROUTES = [
+    ('GET', r'/api/v2/resource-servers', 'list_resource_servers'),
+    ('GET', r'/api/v2/roles', 'list_roles'),
+    ('POST', r'/api/v2/roles', 'create_role'),
+    ('PATCH', r'/api/v2/roles/([^/]+)', 'update_role'),
+    ('GET', r'/api/v2/roles/([^/]+)/permissions', 'list_role_permissions'),
+    ('GET', r'/api/v2/roles/([^/]+)/users', 'list_role_users'),
+    ('POST', r'/api/v2/roles/([^/]+)/users', 'assign_role_users'),
+    ('POST', r'/api/v2/roles/([^/]+)/permissions', 'add_role_permissions'),
+    ('DELETE', r'/api/v2/roles/([^/]+)/permissions', 'remove_role_permissions'),
+    ('GET', r'/api/v2/users', 'list_users'),
+    ('POST', r'/api/v2/users', 'create_user'),
+    ('GET', r'/api/v2/users-by-email', 'users_by_email'),
+    ('GET', r'/api/v2/users/([^/]+)/roles', 'list_user_roles'),
+    ('POST', r'/api/v2/users/([^/]+)/roles', 'assign_user_roles'),
+    ('DELETE', r'/api/v2/users/([^/]+)/roles', 'remove_user_roles'),
+    ('GET', r'/api/v2/connections', 'list_connections'),
+    ('POST', r'/api/v2/jobs/users-imports', 'import_users'),
+    ('GET', r'/api/v2/jobs/([^/]+)', 'get_job'),
+    ('GET', r'/api/v2/jobs/([^/]+)/errors', 'get_job_errors'),
+]
+ROUTES = [(method, re.compile(pattern + '$'), name) for method, pattern, name in ROUTES]
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Dispatch Management API calls to the tenant."""
+
+    protocol_version = 'HTTP/1.1'
+    tenant = None
+
+    def _send(self, status, body, headers=None):
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self):
+        tenant = self.tenant
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+
+        if url.path == '/__stats':
+            return self._send(200, tenant.stats())
+
+        if tenant.latency:
+            time.sleep(tenant.latency)
+
+        with tenant._lock:
+            allowed, remaining, reset = tenant.take_token()
+            if not allowed:
+                return self._send(429, {'statusCode': 429, 'error': 'Too Many Requests',
+                                        'message': 'Global limit has been reached'}, {
+                    'X-RateLimit-Limit': tenant.rate_limit,
+                    'X-RateLimit-Remaining': 0,
+                    'X-RateLimit-Reset': reset,
+                })
+            tenant.calls[self.command] = tenant.calls.get(self.command, 0) + 1
+
+            if url.path == '/oauth/token' and self.command == 'POST':
+                return self._send(200, {'access_token': secrets.token_urlsafe(24),
+                                        'token_type': 'Bearer', 'expires_in': 86400})
+
+            try:
+                body = parse_body(self.headers.get('Content-Type', ''), raw)
+            except ValueError:
+                return self._send(400, {'statusCode': 400, 'message': 'Invalid JSON'})
+
+            for method, pattern, name in ROUTES:
+                match = pattern.match(url.path)
+                if match and method == self.command:
+                    try:
+                        status, result = getattr(tenant, name)(
+                            query, body, *map(unquote, match.groups()))
+                    except MockError as e:
+                        status, result = e.status, {'statusCode': e.status, 'message': e.message}
+                    return self._send(status, result)
+
+        self._send(404, {'statusCode': 404, 'message': 'Not Found'})
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_mock(tenant, host='127.0.0.1', port=8766, background=True):
+    """
+    Serve a mock tenant over HTTP.
+
+    Args:
+        tenant: MockTenant holding the state
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        background: Serve from a daemon thread and return immediately
+
+    Returns:
+        ThreadingHTTPServer: The running server; its base URL is
+        f'http://{host}:{server.server_port}'
+    """
+    handler = type('MockHandler', (_MockHandler,), {'tenant': tenant})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a mock Auth0 Management API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--rate-limit', type=float,
+                        help='Calls per second before answering 429 (default: unlimited)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds added to every call')
+    parser.add_argument('--api-identifier', default=DEFAULT_API_IDENTIFIER,
+                        help='Identifier of the mock Coffee Shop API')
+    args = parser.parse_args()
+
+    tenant = MockTenant(args.api_identifier, rate_limit=args.rate_limit, latency=args.latency)
+    print(f"Serving mock Management API on http://{args.host}:{args.port}", file=sys.stderr)
+    print("Press Ctrl+C to stop", file=sys.stderr)
+    try:
+        serve_mock(tenant, args.host, args.port, background=False)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,166 +5,1082 @@ Auth0 Setup Script
 This script automates the creation of users and roles in Auth0 from a JSON configuration file.
 It uses the Auth0 Management API to create roles, assign permissions, and create users.
 
+All calls share one pooled HTTP session. Roles, API permissions and
+existing users are fetched page by page once per run into indexes, users
+are created and given their roles by a
+bounded pool of worker threads, and rate-limited calls (429) are retried
+after the X-RateLimit-Reset time, so thousands of accounts can be
+onboarded in one run.
+
+With --sync, the script instead reads the tenant state the config manages,
+prints a plan of the differences (--dry-run stops there) and applies only
+those, so re-running it against an unchanged tenant makes no write calls.
+
+With --users, users are streamed from a JSON-lines or CSV file instead of
+the config's "users" list and provisioned in fixed-size batches. Progress
+is checkpointed to a state file after each batch, so an interrupted
+import resumes where it stopped. --bulk-import sends each batch as one
+Management API user-import job instead of one call per user.
+
 Usage:
     python setup_auth0.py --domain your-tenant.auth0.com --client-id ID --client-secret SECRET
 
+    # Show, then apply, only what differs between the tenant and the config
+    python setup_auth0.py --domain your-tenant.auth0.com --client-id ID --client-secret SECRET --dry-run
+    python setup_auth0.py --domain your-tenant.auth0.com --client-id ID --client-secret SECRET --sync
+
+    # Stream users from a JSON-lines or CSV export in resumable batches
+    python setup_auth0.py --domain your-tenant.auth0.com --client-id ID --client-secret SECRET \
+        --users staff.jsonl --batch-size 500 [--bulk-import]
+
+    # Against the local mock Management API (see mock_auth0_api.py)
+    python setup_auth0.py --domain mock --client-id x --client-secret y \
+        --base-url http://127.0.0.1:8766 --workers 16
+
 Requirements:
     pip install auth0-python requests
 """
 
 import json
 import argparse
+import csv
+import hashlib
+import os
+import random
+import re
 import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import quote
+
 import requests
+from requests.adapters import HTTPAdapter
 
 
-# Removed duplicate functions - using requests directly in main()
+# Statuses worth retrying: rate limited or a transient server error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
+# Users listed individually in the final summary, at most
+SUMMARY_USER_LIMIT = 20
 
-def create_role(domain, headers, role_config):
-    """Create a role in Auth0."""
-    url = f'https://{domain}/api/v2/roles'
-    
-    # Prepare role payload (only allowed fields)
-    role_data = {
-        'name': role_config['name'],
-        'description': role_config.get('description', '')
-    }
-    
-    try:
-        response = requests.post(url, json=role_data, headers=headers)
-        if response.status_code == 201:
-            print(f"✓ Created role: {role_config['name']}")
-            return response.json()['id']
-        elif response.status_code == 409:
-            print(f"→ Role already exists: {role_config['name']}")
-            # Get existing role
-            get_url = f'https://{domain}/api/v2/roles'
-            response = requests.get(get_url, headers=headers)
-            roles = response.json()['roles']
-            for r in roles:
-                if r['name'] == role_config['name']:
-                    return r['id']
-            return None
-        else:
+# Largest page the Management API returns
+PER_PAGE = 100
+
+# Users the list endpoint can page through; past this, users are looked
+# up by email instead
+LIST_USERS_LIMIT = 1000
+
+# Users per batch of a --users import; Auth0 caps an import job file at 500KB
+DEFAULT_BATCH_SIZE = 500
+
+# Connection users from a --users file are created in, unless a record names one
+DEFAULT_CONNECTION = 'Username-Password-Authentication'
+
+# Seconds between polls of a bulk import job
+JOB_POLL_INTERVAL = 2.0
+
+# One step of a --sync plan. action is '+' (create or add), '~' (update) or
+# '-' (remove); kind is 'role', 'permissions', 'user' or 'user roles'; value
+# is the role description, the permission or role names, or the user config
+Change = namedtuple('Change', ['action', 'kind', 'name', 'value'])
+
+
+class ManagementAPI:
+    """
+    Auth0 Management API client shared by all worker threads.
+
+    Requests go through one requests.Session whose connection pool is
+    sized for the worker pool. A 429 response pauses every worker until
+    the X-RateLimit-Reset time (or Retry-After), and 429/5xx responses
+    and network errors (connection failures, timeouts) are retried with
+    exponential backoff.
+
+    Args:
+        base_url: Tenant URL, e.g. 'https://your-tenant.auth0.com'
+        access_token: Management API access token
+        pool_size: Maximum number of pooled connections
+        max_retries: Retries of a rate-limited or failed call
+        timeout: Socket timeout in seconds
+
+    Example:
+        api = ManagementAPI('https://your-tenant.auth0.com', token)
+        roles = api.request('GET', '/api/v2/roles').json()
+    """
+
+    def __init__(self, base_url, access_token, pool_size=16, max_retries=6, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        })
+
+        # Time (time.time()) before which no request is sent, after a 429
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        # Counters for the summary
+        self.calls = 0
+        self.rate_limited = 0
+
+    def request(self, method, path, **kwargs):
+        """
+        Send a request, retrying rate-limited and transient failures.
+
+        Args:
+            method: HTTP method
+            path: Path below the tenant URL, e.g. '/api/v2/roles'
+            **kwargs: Passed to requests.Session.request()
+
+        Returns:
+            requests.Response: The last response received
+
+        Raises:
+            requests.RequestException: If the last retry still failed
+                without a response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            pause = self._paused_until - time.time()
+            if pause > 0:
+                time.sleep(pause)
+
+            try:
+                response = self.session.request(method, self.base_url + path, **kwargs)
+            except requests.RequestException:
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(None, attempt))
+                attempt += 1
+                continue
+            finally:
+                with self._lock:
+                    self.calls += 1
+
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+
+            delay = self._retry_delay(response, attempt)
+            if response.status_code == 429:
+                with self._lock:
+                    self.rate_limited += 1
+                    self._paused_until = max(self._paused_until, time.time() + delay)
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _retry_delay(response, attempt):
+        """Return the seconds to wait before retrying `response` (None after a network error)."""
+        # Jitter spreads the workers released at the same reset time
+        jitter = random.uniform(0, 0.25)
+        if response is None:
+            return min(0.5 * 2 ** attempt, 30.0) + jitter
+
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                return float(retry_after) + jitter
+            except ValueError:
+                pass
+
+        reset = response.headers.get('X-RateLimit-Reset')
+        if reset is not None:
+            try:
+                return min(max(float(reset) - time.time(), 0.0), 60.0) + jitter
+            except ValueError:
+                pass
+
+        return min(0.5 * 2 ** attempt, 30.0) + jitter
+
+    def paginate(self, path, key, params=None, per_page=PER_PAGE, limit=None):
+        """
+        Yield every item of a paginated list endpoint.
+
+        Pages are requested with include_totals, and fetching stops at the
+        reported total, at a short page, or after `limit` items.
+
+        Args:
+            path: List endpoint, e.g. '/api/v2/roles'
+            key: Key of the items in the response body, e.g. 'roles'
+            params: Extra query parameters
+            per_page: Items per page
+            limit: Maximum number of items to fetch, None for all
+
+        Yields:
+            dict: The items, in the order returned by the API
+        """
+        page = 0
+        fetched = 0
+        while True:
+            response = self.request('GET', path, params={
+                **(params or {}),
+                'page': page,
+                'per_page': per_page,
+                'include_totals': 'true'
+            })
             response.raise_for_status()
-    except Exception as e:
-        print(f"✗ Error creating role {role_config['name']}: {e}")
-        if hasattr(e, 'response'):
-            print(f"Response: {e.response.text}")
-        return None
+            body = response.json()
+            # Endpoints without totals support return a bare list
+            items = body.get(key, []) if isinstance(body, dict) else body
+            total = body.get('total') if isinstance(body, dict) else None
 
+            for item in items:
+                yield item
+                fetched += 1
+                if limit is not None and fetched >= limit:
+                    return
 
-def assign_permissions_to_role(domain, headers, role_id, permissions):
-    """Assign permissions to a role."""
-    # First, get the API identifier
-    url = f'https://{domain}/api/v2/roles/{role_id}/permissions'
-    
-    # Get all permissions
-    get_url = f'https://{domain}/api/v2/resource-servers'
-    try:
-        response = requests.get(get_url, headers=headers)
-        resource_servers = response.json()
-        
-        # Find the Coffee Shop API
-        api_identifier = None
-        for rs in resource_servers:
-            if 'coffee' in rs.get('name', '').lower() or 'dev' in rs.get('identifier', '').lower():
-                api_identifier = rs.get('identifier')
+            page += 1
+            if len(items) < per_page or (total is not None and fetched >= total):
+                return
+
+    def paginate_checkpoint(self, path, key, params=None, take=PER_PAGE):
+        """
+        Yield every item of an endpoint paginated with from/take checkpoints.
+
+        Used for lists the page-based parameters cannot walk to the end,
+        such as the users of a role.
+
+        Args:
+            path: List endpoint, e.g. '/api/v2/roles/<id>/users'
+            key: Key of the items in the response body, e.g. 'users'
+            params: Extra query parameters
+            take: Items per request
+
+        Yields:
+            dict: The items, in the order returned by the API
+        """
+        checkpoint = None
+        while True:
+            query = {**(params or {}), 'take': take}
+            if checkpoint is not None:
+                query['from'] = checkpoint
+            response = self.request('GET', path, params=query)
+            response.raise_for_status()
+            body = response.json()
+            yield from body.get(key, [])
+
+            checkpoint = body.get('next')
+            if not checkpoint:
+                return
+
+    def total(self, path, key, params=None):
+        """Return the total number of items of a paginated list endpoint."""
+        response = self.request('GET', path, params={
+            **(params or {}),
+            'page': 0,
+            'per_page': 1,
+            'include_totals': 'true'
+        })
+        response.raise_for_status()
+        body = response.json()
+        return body.get('total', len(body.get(key, []))) if isinstance(body, dict) else len(body)
+
+
+def get_management_token(base_url, domain, client_id, client_secret):
+    """
+    Get a Management API access token with the client credentials grant.
+
+    Args:
+        base_url: Tenant URL the token endpoint is served from
+        domain: Auth0 domain, used for the API audience
+        client_id: Management API client id
+        client_secret: Management API client secret
+
+    Returns:
+        str: The access token
+    """
+    payload = {
+        'client_id': client_id,
+        'client_secret': client_secret,
+        'audience': f'https://{domain}/api/v2/',
+        'grant_type': 'client_credentials'
+    }
+    response = requests.post(f'{base_url.rstrip("/")}/oauth/token', json=payload, timeout=30)
+    response.raise_for_status()
+    return response.json()['access_token']
+
+
+class Provisioner:
+    """
+    Create roles and users on a tenant, resolving lookups from indexes.
+
+    Roles, the permissions of the API and the existing users are fetched
+    once per run, page by page, into indexes by role name, permission
+    value and email. Existing users are then found without a call, and
+    creating a user and assigning its roles takes two calls, run
+    concurrently for many users by a bounded pool of worker threads.
+
+    Args:
+        api: ManagementAPI client
+        audience: Identifier of the Coffee Shop API; guessed from the
+                  tenant's APIs if omitted
+        workers: Number of worker threads for user provisioning
+    """
+
+    def __init__(self, api, audience=None, workers=8):
+        self.api = api
+        self.audience = audience
+        self.workers = workers
+
+        # Role name -> role id
+        self.roles = {}
+        # Role name -> role description
+        self.role_descriptions = {}
+        # Permission value -> resource server identifier, for self.audience
+        self.permissions = {}
+        # Lowercased email -> user id
+        self.users = {}
+        # False if the tenant has more users than the list endpoint returns,
+        # so a user missing from self.users may still exist
+        self.users_complete = True
+
+    def load(self):
+        """Index the roles, API permissions and users of the tenant."""
+        self.load_roles()
+        self.load_permissions()
+        self.load_users()
+
+    def load_roles(self):
+        """Index the tenant's roles by name."""
+        roles = list(self.api.paginate('/api/v2/roles', 'roles'))
+        self.roles = {role['name']: role['id'] for role in roles}
+        self.role_descriptions = {role['name']: role.get('description', '') for role in roles}
+
+    def load_permissions(self):
+        """Find the Coffee Shop API and index its permissions by value."""
+        servers = self.api.paginate('/api/v2/resource-servers', 'resource_servers')
+
+        server = None
+        for candidate in servers:
+            if self.audience is not None:
+                if candidate.get('identifier') == self.audience:
+                    server = candidate
+                    break
+            elif 'coffee' in candidate.get('name', '').lower() \
+                    or 'dev' in candidate.get('identifier', '').lower():
+                server = candidate
                 break
-        
-        if not api_identifier:
+
+        if server is None:
             print("⚠ Could not find API identifier. You may need to assign permissions manually.")
             return
-        
-        # Get permissions for this API
-        permissions_url = f'https://{domain}/api/v2/permissions'
-        response = requests.get(permissions_url, headers=headers, params={'per_page': 100})
-        all_permissions = response.json().get('permissions', [])
-        
-        # Filter permissions for our API
-        permission_ids = []
-        for perm_name in permissions:
-            for perm in all_permissions:
-                if perm['value'] == perm_name and perm.get('resource_server_identifier') == api_identifier:
-                    permission_ids.append(perm['name'])
-                    break
-        
-        if permission_ids:
-            # Update role permissions
-            update_url = f'https://{domain}/api/v2/roles/{role_id}/permissions'
-            requests.put(update_url, json={'permissions': permission_ids}, headers=headers)
-            print(f"  ✓ Assigned {len(permission_ids)} permission(s)")
-        
-    except Exception as e:
-        print(f"  ✗ Error assigning permissions: {e}")
-
-
-def create_user(domain, headers, user_config):
-    """Create a user in Auth0."""
-    url = f'https://{domain}/api/v2/users'
-    
-    # Prepare user payload
-    user_data = {
-        'email': user_config['email'],
-        'password': user_config['password'],
-        'connection': user_config['connection']
-    }
-    
-    # Add verify_email if specified
-    if 'verify_email' in user_config:
-        user_data['verify_email'] = user_config['verify_email']
-    
-    try:
-        response = requests.post(url, json=user_data, headers=headers)
-        if response.status_code == 201:
-            print(f"✓ Created user: {user_config['email']}")
-            return response.json()['user_id']
-        elif response.status_code == 409:
-            print(f"→ User already exists: {user_config['email']}")
-            # Get existing user
-            get_url = f'https://{domain}/api/v2/users'
-            response = requests.get(get_url, headers=headers, params={'q': f'email:"{user_config["email"]}"'})
-            users = response.json()['users']
-            if users:
-                return users[0]['user_id']
-            return None
+        self.audience = server['identifier']
+        self.permissions = {
+            scope['value']: server['identifier'] for scope in server.get('scopes', [])
+        }
+
+    def load_users(self):
+        """
+        Index the tenant's users by email.
+
+        The list endpoint stops at LIST_USERS_LIMIT users; on larger tenants
+        the rest are found by email when creating them conflicts.
+        """
+        users = self.api.paginate('/api/v2/users', 'users', params={
+            'fields': 'user_id,email',
+            'include_fields': 'true'
+        }, limit=LIST_USERS_LIMIT)
+        self.users = {
+            user['email'].lower(): user['user_id'] for user in users if user.get('email')
+        }
+        self.users_complete = len(self.users) < LIST_USERS_LIMIT or \
+            self.api.total('/api/v2/users', 'users') <= len(self.users)
+
+    def create_role(self, role_config):
+        """
+        Create a role unless it exists.
+
+        Returns:
+            str: The role id, or None on failure
+        """
+        name = role_config['name']
+        if name in self.roles:
+            print(f"→ Role already exists: {name}")
+            return self.roles[name]
+
+        response = self.api.request('POST', '/api/v2/roles', json={
+            'name': name,
+            'description': role_config.get('description', '')
+        })
+        if response.status_code in (200, 201):
+            print(f"✓ Created role: {name}")
+            self.roles[name] = response.json()['id']
+            return self.roles[name]
+        if response.status_code == 409:
+            # Created since load(), e.g. by a concurrent run
+            print(f"→ Role already exists: {name}")
+            self.load_roles()
+            return self.roles.get(name)
+
+        print(f"✗ Error creating role {name}: {response.status_code} {response.text}")
+        return None
+
+    def assign_permissions(self, role_id, permissions):
+        """Grant the API permissions named in `permissions` to a role."""
+        missing = [name for name in permissions if name not in self.permissions]
+        for name in missing:
+            print(f"  ⚠ Permission not defined on the API: {name}")
+
+        granted = [
+            {'resource_server_identifier': self.permissions[name], 'permission_name': name}
+            for name in permissions if name in self.permissions
+        ]
+        if not granted:
+            return
+
+        response = self.api.request('POST', f'/api/v2/roles/{role_id}/permissions',
+                                    json={'permissions': granted})
+        if response.ok:
+            print(f"  ✓ Assigned {len(granted)} permission(s)")
         else:
+            print(f"  ✗ Error assigning permissions: {response.status_code} {response.text}")
+
+    def provision_user(self, user_config):
+        """
+        Create one user unless it exists, and assign its roles.
+
+        Returns:
+            tuple: (status, message) with status 'created', 'existing' or 'failed'
+        """
+        email = user_config.get('email')
+        if not email:
+            return 'failed', f"{user_config!r}: no email"
+        user_id = self.users.get(email.lower())
+        status = 'existing'
+
+        if user_id is None:
+            if not user_config.get('password') or not user_config.get('connection'):
+                return 'failed', f"{email}: a new user needs a password and a connection"
+            user_data = {
+                'email': email,
+                'password': user_config['password'],
+                'connection': user_config['connection']
+            }
+            if 'verify_email' in user_config:
+                user_data['verify_email'] = user_config['verify_email']
+
+            response = self.api.request('POST', '/api/v2/users', json=user_data)
+            if response.status_code in (200, 201):
+                status = 'created'
+                user_id = response.json()['user_id']
+                self.users[email.lower()] = user_id
+            elif response.status_code == 409:
+                # Beyond the indexed users, or created since load()
+                response = self.api.request('GET', '/api/v2/users-by-email',
+                                            params={'email': email})
+                users = response.json() if response.ok else []
+                if not users:
+                    return 'failed', f"{email}: exists but could not be looked up"
+                user_id = users[0]['user_id']
+                self.users[email.lower()] = user_id
+            else:
+                return 'failed', f"{email}: {response.status_code} {response.text}"
+
+        role_names = user_config.get('roles', [])
+        unknown = [name for name in role_names if name not in self.roles]
+        if unknown:
+            return 'failed', f"{email}: role not found: {', '.join(unknown)}"
+
+        if role_names:
+            response = self.api.request('POST', f'/api/v2/users/{quote(user_id, safe="")}/roles', json={
+                'roles': [self.roles[name] for name in role_names]
+            })
+            if not response.ok:
+                return 'failed', f"{email}: role assignment failed: {response.status_code}"
+
+        return status, email
+
+    def provision_users(self, users):
+        """
+        Provision users on the worker pool, printing progress.
+
+        A network error that outlasts the retries fails that user only.
+
+        Args:
+            users: Iterable of user configs
+
+        Returns:
+            dict: status -> number of users
+        """
+        counts = {'created': 0, 'existing': 0, 'failed': 0}
+        started = time.monotonic()
+
+        def provision(user_config):
+            try:
+                return self.provision_user(user_config)
+            except requests.RequestException as e:
+                return 'failed', f"{user_config.get('email')}: {e}"
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for done, (status, message) in enumerate(executor.map(provision, users), 1):
+                counts[status] += 1
+                if status == 'failed':
+                    print(f"✗ Error provisioning user {message}")
+                if done % 100 == 0:
+                    rate = done / (time.monotonic() - started)
+                    print(f"  ... {done} users ({rate:.1f}/s)")
+
+        return counts
+
+    # Bulk import
+
+    def connection_id(self, name):
+        """Return the id of the database connection called `name`."""
+        for connection in self.api.paginate('/api/v2/connections', 'connections',
+                                            params={'name': name}):
+            if connection['name'] == name:
+                return connection['id']
+        raise ValueError(f"connection not found: {name}")
+
+    def import_batch(self, users, connection_id):
+        """
+        Create a batch of users with one bulk import job, then assign their roles.
+
+        Each user is imported under a user id derived from its email, so
+        roles are assigned per role for the whole batch without looking
+        the new users up. Users that already exist are looked up by email.
+        Import jobs cannot set plain-text passwords: records may carry a
+        `custom_password_hash`, otherwise users set their password with a
+        password reset.
+
+        Args:
+            users: List of user configs
+            connection_id: Id of the connection to import into
+
+        Returns:
+            dict: status -> number of users
+        """
+        counts = {'created': 0, 'existing': 0, 'failed': 0}
+        records = []
+        for user_config in users:
+            record = {'email': user_config['email'], 'user_id': import_user_id(user_config['email'])}
+            for key in ('email_verified', 'custom_password_hash', 'user_metadata', 'app_metadata'):
+                if key in user_config:
+                    record[key] = user_config[key]
+            records.append(record)
+
+        response = self.api.request('POST', '/api/v2/jobs/users-imports', data={
+            'connection_id': connection_id,
+            'upsert': 'false',
+            'send_completion_email': 'false'
+        }, files={
+            'users': ('users.json', json.dumps(records), 'application/json')
+        }, headers={'Content-Type': None})
+        if not response.ok:
+            print(f"✗ Error starting import job: {response.status_code} {response.text}")
+            counts['failed'] = len(users)
+            return counts
+        job_id = response.json()['id']
+
+        while True:
+            response = self.api.request('GET', f'/api/v2/jobs/{job_id}')
             response.raise_for_status()
-    except Exception as e:
-        print(f"✗ Error creating user {user_config['email']}: {e}")
-        if hasattr(e, 'response'):
-            print(f"Response: {e.response.text}")
-        return None
+            job = response.json()
+            if job['status'] in ('completed', 'failed'):
+                break
+            time.sleep(JOB_POLL_INTERVAL)
+
+        response = self.api.request('GET', f'/api/v2/jobs/{job_id}/errors')
+        response.raise_for_status()
+        errors = response.json() if response.status_code == 200 else []
+        if job['status'] == 'failed' and not errors:
+            print(f"✗ Import job {job_id} failed")
+            counts['failed'] = len(users)
+            return counts
+
+        # Lowercased email -> error codes, for the users the job did not insert
+        rejected = {
+            error['user'].get('email', '').lower(): [e.get('code') for e in error.get('errors', [])]
+            for error in errors
+        }
+        user_ids = {}
+        existing = []
+        for user_config in users:
+            email = user_config['email'].lower()
+            codes = rejected.get(email)
+            if codes is None:
+                user_ids[email] = 'auth0|' + import_user_id(email)
+                counts['created'] += 1
+            elif codes == ['DUPLICATED_USER']:
+                existing.append(email)
+            else:
+                print(f"✗ Error importing user {user_config['email']}: {', '.join(codes)}")
+                counts['failed'] += 1
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for email, user_id in zip(existing, executor.map(self.lookup_user, existing)):
+                if user_id is None:
+                    print(f"✗ Error provisioning user {email}: exists but could not be looked up")
+                    counts['failed'] += 1
+                else:
+                    user_ids[email] = user_id
+                    counts['existing'] += 1
+
+        # Role id -> user ids of the batch holding it
+        members = {}
+        for user_config in users:
+            user_id = user_ids.get(user_config['email'].lower())
+            if user_id is None:
+                continue
+            for name in user_config.get('roles', []):
+                if name in self.roles:
+                    members.setdefault(self.roles[name], []).append(user_id)
+                else:
+                    print(f"✗ Error provisioning user {user_config['email']}: role not found: {name}")
+
+        for role_id, role_users in members.items():
+            for start in range(0, len(role_users), PER_PAGE):
+                response = self.api.request('POST', f'/api/v2/roles/{role_id}/users',
+                                            json={'users': role_users[start:start + PER_PAGE]})
+                if not response.ok:
+                    print(f"✗ Error assigning role {role_id}: {response.status_code} {response.text}")
+
+        return counts
+
+    # Sync mode
+
+    def lookup_user(self, email):
+        """Return the id of the user with `email` from users-by-email, or None."""
+        response = self.api.request('GET', '/api/v2/users-by-email', params={'email': email})
+        response.raise_for_status()
+        users = response.json()
+        return users[0]['user_id'] if users else None
+
+    def snapshot(self, config):
+        """
+        Read the tenant state managed by a config. Requires load().
+
+        Reads the description and API permissions of each configured role,
+        and the members of every role the config names. Only read calls
+        are made.
+
+        Args:
+            config: The parsed JSON configuration
+
+        Returns:
+            dict: {'roles': {name: {'description', 'permissions'}},
+                   'users': {email: {'user_id', 'roles'}}} with emails
+                   lowercased, permissions and roles as sets of names
+        """
+        role_names = [role['name'] for role in config.get('roles', [])]
+        for user_config in config.get('users', []):
+            role_names.extend(user_config.get('roles', []))
+
+        roles = {}
+        users = {email: {'user_id': user_id, 'roles': set()} for email, user_id in self.users.items()}
+
+        for name in dict.fromkeys(role_names):
+            role_id = self.roles.get(name)
+            if role_id is None:
+                continue
+            permissions = self.api.paginate(f'/api/v2/roles/{role_id}/permissions', 'permissions')
+            roles[name] = {
+                'description': self.role_descriptions.get(name, ''),
+                'permissions': {
+                    permission['permission_name'] for permission in permissions
+                    if permission['resource_server_identifier'] == self.audience
+                }
+            }
+
+            for user in self.api.paginate_checkpoint(f'/api/v2/roles/{role_id}/users', 'users'):
+                email = user.get('email', '').lower()
+                users.setdefault(email, {'user_id': user['user_id'], 'roles': set()})
+                users[email]['roles'].add(name)
+                self.users.setdefault(email, user['user_id'])
+
+        if not self.users_complete:
+            # Users holding none of the roles and missing from the index
+            missing = list(dict.fromkeys(
+                user_config['email'].lower() for user_config in config.get('users', [])
+                if user_config['email'].lower() not in users
+            ))
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for email, user_id in zip(missing, executor.map(self.lookup_user, missing)):
+                    if user_id is not None:
+                        users[email] = {'user_id': user_id, 'roles': set()}
+                        self.users[email] = user_id
+
+        return {'roles': roles, 'users': users}
+
+    def plan(self, config, state):
+        """
+        Compute the changes that bring the tenant to the config.
+
+        Configured roles get their description and exactly their listed
+        API permissions; configured users are created if missing and hold
+        exactly their listed roles among the roles the config names.
+        Other roles, other users and permissions of other APIs are left
+        alone, and passwords of existing users are never changed.
+
+        Args:
+            config: The parsed JSON configuration
+            state: Tenant state from snapshot()
+
+        Returns:
+            list: Change tuples, roles before users
+        """
+        changes = []
+        named_roles = {role['name'] for role in config.get('roles', [])}
+
+        for role_config in config.get('roles', []):
+            name = role_config['name']
+            description = role_config.get('description', '')
+            desired = {
+                permission for permission in role_config.get('permissions', [])
+                if permission in self.permissions
+            }
+
+            current = state['roles'].get(name)
+            if current is None:
+                changes.append(Change('+', 'role', name, description))
+                current = {'description': description, 'permissions': set()}
+            elif current['description'] != description:
+                changes.append(Change('~', 'role', name, description))
+
+            if desired - current['permissions']:
+                changes.append(Change('+', 'permissions', name,
+                                      sorted(desired - current['permissions'])))
+            if current['permissions'] - desired:
+                changes.append(Change('-', 'permissions', name,
+                                      sorted(current['permissions'] - desired)))
+
+        for user_config in config.get('users', []):
+            email = user_config['email']
+            desired = set(user_config.get('roles', []))
+            named_roles.update(desired)
+
+            current = state['users'].get(email.lower())
+            if current is None:
+                changes.append(Change('+', 'user', email, user_config))
+                continue
+            if desired - current['roles']:
+                changes.append(Change('+', 'user roles', email, sorted(desired - current['roles'])))
+            if current['roles'] - desired:
+                changes.append(Change('-', 'user roles', email, sorted(current['roles'] - desired)))
+
+        unknown = named_roles - set(self.roles) - {
+            change.name for change in changes if change.kind == 'role'
+        }
+        if unknown:
+            raise ValueError(f"role not found: {', '.join(sorted(unknown))}")
+
+        return changes
+
+    def apply_role_change(self, change):
+        """
+        Apply one role or role permission change.
+
+        Returns:
+            str: An error message, or None on success
+        """
+        if change.kind == 'role' and change.action == '+':
+            response = self.api.request('POST', '/api/v2/roles', json={
+                'name': change.name,
+                'description': change.value
+            })
+            if response.ok:
+                self.roles[change.name] = response.json()['id']
+            return None if response.ok else f"{response.status_code} {response.text}"
+
+        role_id = self.roles.get(change.name)
+        if role_id is None:
+            return "role was not created"
+
+        if change.kind == 'role':
+            response = self.api.request('PATCH', f'/api/v2/roles/{role_id}',
+                                        json={'description': change.value})
+        else:
+            response = self.api.request(
+                'POST' if change.action == '+' else 'DELETE',
+                f'/api/v2/roles/{role_id}/permissions',
+                json={'permissions': [
+                    {'resource_server_identifier': self.audience, 'permission_name': name}
+                    for name in change.value
+                ]}
+            )
+        return None if response.ok else f"{response.status_code} {response.text}"
+
+    def apply_user_changes(self, changes):
+        """
+        Apply the changes of one user, in order.
+
+        Returns:
+            list: (change, error message or None) per change
+        """
+        results = []
+        for change in changes:
+            if change.kind == 'user':
+                status, message = self.provision_user(change.value)
+                results.append((change, message if status == 'failed' else None))
+                continue
+
+            user_id = self.users[change.name.lower()]
+            response = self.api.request(
+                'POST' if change.action == '+' else 'DELETE',
+                f'/api/v2/users/{quote(user_id, safe="")}/roles',
+                json={'roles': [self.roles[name] for name in change.value]}
+            )
+            results.append((change, None if response.ok else f"{response.status_code} {response.text}"))
+        return results
+
+    def apply(self, changes):
+        """
+        Apply a plan: role changes in order, then user changes on the worker pool.
+
+        Returns:
+            dict: {'applied': n, 'failed': n}
+        """
+        counts = {'applied': 0, 'failed': 0}
+        user_changes = {}
+
+        def record(change, error):
+            if error is None:
+                counts['applied'] += 1
+            else:
+                counts['failed'] += 1
+                print(f"✗ {describe_change(change)}: {error}")
+
+        for change in changes:
+            if change.kind in ('user', 'user roles'):
+                user_changes.setdefault(change.name.lower(), []).append(change)
+            else:
+                record(change, self.apply_role_change(change))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for results in executor.map(self.apply_user_changes, user_changes.values()):
+                for change, error in results:
+                    record(change, error)
+
+        return counts
+
+
+def import_user_id(email):
+    """Return the stable user id a bulk import gives the user with `email`."""
+    return hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()[:24]
+
+
+def read_users(path, connection=DEFAULT_CONNECTION):
+    """
+    Stream user configs from a JSON-lines or CSV file.
+
+    JSON-lines files hold one user object per line, with the keys of the
+    config's "users" entries. CSV files have a header row with email,
+    password, connection, roles (separated by ';' or '|') and optionally
+    verify_email columns. Records are read one at a time, so files of any
+    size use constant memory.
+
+    Args:
+        path: Path to a .jsonl/.ndjson or .csv file
+        connection: Connection of records that do not name one
 
+    Yields:
+        dict: User config
 
-def assign_role_to_user(domain, headers, user_id, role_name):
-    """Assign a role to a user."""
+    Raises:
+        ValueError: If a record is malformed; the message names its line
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                user = {key: value.strip() for key, value in row.items()
+                        if key and value and value.strip()}
+                user['roles'] = [name.strip() for name in re.split(r'[;|]', user.get('roles', ''))
+                                 if name.strip()]
+                if 'verify_email' in user:
+                    user['verify_email'] = user['verify_email'].lower() in ('1', 'true', 'yes')
+                yield check_user(user, connection, f"{path}:{reader.line_num}")
+        return
+
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                user = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: invalid JSON: {e}")
+            yield check_user(user, connection, f"{path}:{number}")
+
+
+def check_user(user, connection, where):
+    """Validate a streamed user record and fill in its connection."""
+    if not isinstance(user, dict) or not user.get('email'):
+        raise ValueError(f"{where}: record has no email")
+    if isinstance(user.get('roles', []), str):
+        user['roles'] = [user['roles']]
+    user.setdefault('connection', connection)
+    return user
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items of `iterable`."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def load_state(path, source):
+    """
+    Load the checkpoint of an import of `source`, or start a new one.
+
+    Returns:
+        dict: {'source', 'processed', 'counts'}
+    """
     try:
-        # Get role by name
-        url = f'https://{domain}/api/v2/roles'
-        response = requests.get(url, headers=headers)
-        roles = response.json()['roles']
-        
-        role_id = None
-        for role in roles:
-            if role['name'] == role_name:
-                role_id = role['id']
-                break
-        
-        if not role_id:
-            print(f"  ✗ Role not found: {role_name}")
-            return False
-        
-        # Assign role to user
-        assign_url = f'https://{domain}/api/v2/users/{user_id}/roles'
-        requests.post(assign_url, json={'roles': [role_id]}, headers=headers)
-        print(f"  ✓ Assigned role '{role_name}' to user")
-        return True
-        
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        state = None
+
+    if state is None or state.get('source') != os.path.abspath(source):
+        state = {'source': os.path.abspath(source), 'processed': 0,
+                 'counts': {'created': 0, 'existing': 0, 'failed': 0}}
+    return state
+
+
+def save_state(path, state):
+    """Write an import checkpoint atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.setup_auth0-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def import_users(provisioner, source, state_path, batch_size=DEFAULT_BATCH_SIZE,
+                 bulk=False, connection=DEFAULT_CONNECTION):
+    """
+    Provision the users of a streamed file in batches, resuming from a checkpoint.
+
+    The state file records how many records are done after each batch
+    and is removed once the whole file is processed.
+
+    Args:
+        provisioner: Provisioner after load()
+        source: Path to the JSON-lines or CSV users file
+        state_path: Path of the checkpoint file
+        batch_size: Users per batch
+        bulk: Create each batch with a bulk import job
+        connection: Connection of records that do not name one
+
+    Returns:
+        int: Exit code
+    """
+    state = load_state(state_path, source)
+    counts = state['counts']
+    if state['processed']:
+        print(f"→ Resuming after {state['processed']} users (state file {state_path})")
+
+    try:
+        connection_id = provisioner.connection_id(connection) if bulk else None
+        # Passwords are checked per record by provision_user: only users
+        # it creates need one
+        records = read_users(source, connection)
+        # Skip the records done before the checkpoint
+        for _ in islice(records, state['processed']):
+            pass
+
+        started = time.monotonic()
+        done = 0
+        for batch in batched(records, batch_size):
+            if bulk:
+                result = provisioner.import_batch(batch, connection_id)
+            else:
+                result = provisioner.provision_users(batch)
+            for status, count in result.items():
+                counts[status] += count
+
+            state['processed'] += len(batch)
+            save_state(state_path, state)
+            done += len(batch)
+            rate = done / (time.monotonic() - started)
+            print(f"  ✓ {state['processed']} users done ({rate:.1f}/s)")
+    except (OSError, ValueError, requests.RequestException) as e:
+        print(f"✗ Import stopped: {e}")
+        print(f"→ Re-run the same command to resume after {state['processed']} users")
+        return 1
+
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    print(f"\n✓ Import complete! {counts['created']} created, {counts['existing']} existing, "
+          f"{counts['failed']} failed ({provisioner.api.calls} API calls, "
+          f"{provisioner.api.rate_limited} rate limited)")
+    return 0 if counts['failed'] == 0 else 1
+
+
+def describe_change(change):
+    """Return a one-line description of a plan Change."""
+    if change.kind == 'role':
+        return f"{change.action} role {change.name} (description: {change.value!r})"
+    if change.kind == 'user':
+        roles = ', '.join(change.value.get('roles', [])) or 'no roles'
+        return f"{change.action} user {change.name} ({roles})"
+    return f"{change.action} {change.kind} {change.name}: {', '.join(change.value)}"
+
+
+def sync(provisioner, config, dry_run=False):
+    """
+    Print the plan bringing the tenant to the config, and apply it.
+
+    Args:
+        provisioner: Provisioner after load()
+        config: The parsed JSON configuration
+        dry_run: Only print the plan
+
+    Returns:
+        int: Exit code
+    """
+    print("\n=== Reading Tenant State ===")
+    try:
+        state = provisioner.snapshot(config)
+        changes = provisioner.plan(config, state)
     except Exception as e:
-        print(f"  ✗ Error assigning role {role_name}: {e}")
-        return False
+        print(f"✗ Error planning changes: {e}")
+        return 1
+    print(f"→ Read {len(state['roles'])} role(s) and {len(state['users'])} user(s) "
+          f"in {provisioner.api.calls} API calls")
+
+    print("\n=== Plan ===")
+    if not changes:
+        print("✓ No changes. The tenant matches the configuration.")
+        return 0
+    for change in changes:
+        print(f"  {describe_change(change)}")
+    actions = [change.action for change in changes]
+    print(f"\nPlan: {actions.count('+')} to add, {actions.count('~')} to change, "
+          f"{actions.count('-')} to remove.")
+    if dry_run:
+        print("→ Dry run, nothing applied.")
+        return 0
+
+    print("\n=== Applying ===")
+    started = time.monotonic()
+    counts = provisioner.apply(changes)
+    elapsed = time.monotonic() - started
+    print(f"\n✓ Sync complete! {counts['applied']} applied, {counts['failed']} failed "
+          f"in {elapsed:.1f}s ({provisioner.api.calls} API calls, "
+          f"{provisioner.api.rate_limited} rate limited)")
+    return 0 if counts['failed'] == 0 else 1
 
 
 def main():
@@ -177,9 +1093,34 @@ def main():
                        help='Auth0 Management API Client ID')
     parser.add_argument('--client-secret', required=True,
                        help='Auth0 Management API Client Secret')
-    
+    parser.add_argument('--audience',
+                       help='Identifier of the Coffee Shop API (default: guessed from its name)')
+    parser.add_argument('--workers', type=int, default=8,
+                       help='Concurrent user provisioning workers')
+    parser.add_argument('--base-url',
+                       help='Tenant URL override, e.g. a local mock API (default: https://<domain>)')
+    parser.add_argument('--sync', action='store_true',
+                       help='Apply only the changes between the tenant and the config')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Print the --sync plan without applying it (implies --sync)')
+    parser.add_argument('--users',
+                       help='JSON-lines or CSV file to stream users from, instead of the config')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                       help='Users per --users batch')
+    parser.add_argument('--state',
+                       help='Checkpoint file of a --users import (default: <users file>.state.json)')
+    parser.add_argument('--bulk-import', action='store_true',
+                       help='Create each --users batch with a Management API user-import job')
+    parser.add_argument('--connection', default=DEFAULT_CONNECTION,
+                       help='Connection of --users records that do not name one')
+
     args = parser.parse_args()
-    
+    if args.users and (args.sync or args.dry_run):
+        parser.error('--users cannot be combined with --sync or --dry-run')
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+    base_url = args.base_url or f'https://{args.domain}'
+
     # Load configuration
     try:
         with open(args.config, 'r') as f:
@@ -190,63 +1131,57 @@ def main():
     except json.JSONDecodeError as e:
         print(f"✗ Invalid JSON in config file: {e}")
         return 1
-    
+
     # Get Management API token
     print("Getting Management API access token...")
     try:
-        url = f'https://{args.domain}/oauth/token'
-        payload = {
-            'client_id': args.client_id,
-            'client_secret': args.client_secret,
-            'audience': f'https://{args.domain}/api/v2/',
-            'grant_type': 'client_credentials'
-        }
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        access_token = response.json()['access_token']
-        
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
-        
+        access_token = get_management_token(base_url, args.domain,
+                                            args.client_id, args.client_secret)
     except Exception as e:
         print(f"✗ Error getting access token: {e}")
         return 1
-    
+
+    api = ManagementAPI(base_url, access_token, pool_size=max(args.workers, 1))
+    provisioner = Provisioner(api, audience=args.audience, workers=max(args.workers, 1))
+    try:
+        provisioner.load()
+    except Exception as e:
+        print(f"✗ Error reading tenant roles and permissions: {e}")
+        return 1
+
+    if args.sync or args.dry_run:
+        return sync(provisioner, config, dry_run=args.dry_run)
+
     # Create roles
     print("\n=== Creating Roles ===")
-    role_ids = {}
-    
     for role_config in config.get('roles', []):
-        role_id = create_role(args.domain, headers, role_config)
-        if role_id:
-            role_ids[role_config['name']] = role_id
-        
-            # Assign permissions to role
-            if 'permissions' in role_config:
-                print(f"  Assigning permissions to {role_config['name']}...")
-                assign_permissions_to_role(args.domain, headers, role_id, role_config['permissions'])
-    
+        role_id = provisioner.create_role(role_config)
+        if role_id and 'permissions' in role_config:
+            print(f"  Assigning permissions to {role_config['name']}...")
+            provisioner.assign_permissions(role_id, role_config['permissions'])
+
+    if args.users:
+        print("\n=== Importing Users ===")
+        state_path = args.state or f'{args.users}.state.json'
+        return import_users(provisioner, args.users, state_path, args.batch_size,
+                            bulk=args.bulk_import, connection=args.connection)
+
     # Create users
     print("\n=== Creating Users ===")
-    
-    for user_config in config.get('users', []):
-        user_id = create_user(args.domain, headers, user_config)
-        
-        if user_id:
-            # Assign roles to user
-            if 'roles' in user_config:
-                print(f"  Assigning roles to {user_config['email']}...")
-                for role_name in user_config['roles']:
-                    assign_role_to_user(args.domain, headers, user_id, role_name)
-    
-    print("\n✓ Setup complete!")
-    print("\nUsers created:")
-    for user_config in config.get('users', []):
-        print(f"  - {user_config['email']} (Password: {user_config.get('password', 'Check Auth0')})")
-    
-    return 0
+    users = config.get('users', [])
+    started = time.monotonic()
+    counts = provisioner.provision_users(users)
+    elapsed = time.monotonic() - started
+
+    print(f"\n✓ Setup complete! {counts['created']} created, {counts['existing']} existing, "
+          f"{counts['failed']} failed in {elapsed:.1f}s "
+          f"({api.calls} API calls, {api.rate_limited} rate limited)")
+    if len(users) <= SUMMARY_USER_LIMIT:
+        print("\nUsers created:")
+        for user_config in users:
+            print(f"  - {user_config['email']} (Password: {user_config.get('password', 'Check Auth0')})")
+
+    return 0 if counts['failed'] == 0 else 1
 
 
 if __name__ == '__main__':
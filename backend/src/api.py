@@ -7,9 +7,17 @@ It includes endpoints for managing drinks with role-based access control.
 Endpoints:
     GET /drinks - Public endpoint to get all drinks (short form)
     GET /drinks-detail - Protected endpoint to get all drinks (long form)
+    GET /drinks/changes - Public endpoint to get the drinks changed since a menu version
+    GET /drinks-detail/changes - Protected endpoint, the same in long form
     POST /drinks - Protected endpoint to create a new drink
     PATCH /drinks/<id> - Protected endpoint to update a drink
     DELETE /drinks/<id> - Protected endpoint to delete a drink
+    POST /drinks/bulk - Protected endpoint to create many drinks at once
+    PATCH /drinks/bulk - Protected endpoint to update many drinks at once
+    DELETE /drinks/bulk - Protected endpoint to delete many drinks at once
+    GET /metrics - Request latency and query metrics in Prometheus format
+    GET /profiles - Protected endpoint to list recent request profiles
+    GET /profiles/<id> - Protected endpoint to download a request profile
 
 Roles:
     - Public: Can view drink menu
@@ -18,24 +26,289 @@ Roles:
 """
 
 import os
-from flask import Flask, request, jsonify, abort
+from flask import Flask, request, abort, send_file
 from sqlalchemy import exc
-import json
 from flask_cors import CORS
 
-from .database.models import db_drop_and_create_all, setup_db, Drink
-from .auth.auth import AuthError, requires_auth
+from .database.models import (
+    db, db_drop_and_create_all, setup_db, upgrade_db, Drink, DRINK_FIELDS, menu_snapshot
+)
+from .database.menu import encode_changes
+from .auth.auth import AuthError, requires_auth, jwks_cache, token_cache
+from .compression import negotiate, setup_compression, varies
+from .encoding import json_response, long_drink, short_drink
+from .metrics.instrumentation import registry, setup_metrics
+from .metrics.profiling import profiler, setup_profiling
 
 app = Flask(__name__)
 setup_db(app)
+setup_metrics(app, db.get_engine(app))
+setup_profiling(app)
+setup_compression(app)
 CORS(app)
 
+# Largest page a paginated drinks listing may request
+MAX_PAGE_SIZE = 1000
+
+# Largest number of drinks a bulk request may carry
+MAX_BULK_SIZE = 1000
+
+# Largest number of profiles GET /profiles may list
+MAX_PROFILES_LISTED = 200
+
 # Initialize database tables
 # WARNING: Uncommenting the line below will drop all existing data!
 # Uncomment on first run only to create the database
 # db_drop_and_create_all()
 
 
+@registry.add_collector
+def cache_metrics():
+    """Report the auth and menu cache counters at scrape time."""
+    return [
+        ('auth_token_cache_hits_total', 'counter',
+         'Requests whose token was served from the verified token cache.', token_cache.hits),
+        ('auth_token_cache_misses_total', 'counter',
+         'Requests whose token had to be verified.', token_cache.misses),
+        ('auth_token_cache_size', 'gauge', 'Tokens in the verified token cache.', len(token_cache)),
+        ('auth_jwks_fetches_total', 'counter', 'JWKS fetches from the issuer.', jwks_cache.fetches),
+        ('auth_jwks_fetch_errors_total', 'counter', 'Failed JWKS fetches.', jwks_cache.fetch_errors),
+        ('menu_snapshot_version', 'gauge', 'Menu version counter of this process.',
+         menu_snapshot.version),
+    ]
+
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Migrate an existing database to the current schema, keeping its data."""
+    upgrade_db()
+    print("✓ Database schema is up to date")
+
+
+def json_body_response(body, status=200):
+    """
+    Build a JSON response from an already encoded body.
+
+    Args:
+        body: Encoded JSON bytes
+        status: HTTP status code
+
+    Returns:
+        Response with an application/json mimetype
+    """
+    return app.response_class(body, status=status, mimetype='application/json')
+
+
+def conditional_body_response(body, etag, last_modified, private=False, compressed=None):
+    """
+    Build a revalidatable JSON response from an already encoded body.
+
+    Sets a strong ETag and Last-Modified, and turns the response into
+    304 Not Modified without a body when the request's If-None-Match or
+    If-Modified-Since shows the client already has it.
+
+    When `compressed` is given and the client accepts brotli or gzip, the
+    precompressed copy is sent instead, under its own entity tag (the
+    body's with '-br' or '-gzip' appended).
+
+    Args:
+        body: Encoded JSON bytes
+        etag: Unquoted strong entity tag of the body
+        last_modified: Unix time the content last changed
+        private: True for responses that depend on the caller's credentials
+        compressed: CompressedBody of `body`, if it may be sent compressed
+
+    Returns:
+        Response with status 200 or 304
+    """
+    encoding = negotiate(body) if compressed is not None else None
+    if encoding is not None:
+        response = json_body_response(compressed.get(encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag = f'{etag}-{encoding}'
+    else:
+        response = json_body_response(body)
+    if compressed is not None and varies(body):
+        response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+    return response.make_conditional(request)
+
+
+def parse_listing_args():
+    """
+    Parse the pagination and projection parameters of a drinks listing.
+
+    Query Parameters:
+        limit: Page size, 1 to MAX_PAGE_SIZE
+        after: Cursor, the id of the last drink of the previous page
+        fields: Comma-separated subset of 'id', 'title' and 'recipe'
+
+    Returns:
+        tuple: (after, limit, fields), or None if the request uses none
+               of the parameters and expects the full listing
+
+    Raises:
+        400 if a parameter is invalid
+    """
+    args = request.args
+    if not any(name in args for name in ('limit', 'after', 'fields')):
+        return None
+
+    try:
+        limit = int(args['limit']) if 'limit' in args else None
+        after = int(args['after']) if 'after' in args else None
+    except ValueError:
+        abort(400)
+
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        abort(400)
+    if after is not None and after < 0:
+        abort(400)
+
+    fields = DRINK_FIELDS
+    if 'fields' in args:
+        fields = tuple(field.strip() for field in args['fields'].split(',') if field.strip())
+        if not fields or any(field not in DRINK_FIELDS for field in fields):
+            abort(400)
+
+    return after, limit, fields
+
+
+def parse_since():
+    """
+    Parse the `since` parameter of the drinks changes endpoints.
+
+    Returns:
+        int: Menu version the client's copy of the menu is at
+
+    Raises:
+        400 if the parameter is missing or not a non-negative integer
+    """
+    try:
+        since = int(request.args['since'])
+    except (KeyError, ValueError):
+        abort(400)
+    if since < 0:
+        abort(400)
+    return since
+
+
+def drinks_changes_response(since, long_form):
+    """
+    Build a GET /drinks/changes or /drinks-detail/changes response.
+
+    Args:
+        since: Menu version the client's copy of the menu is at
+        long_form: True for full recipes, False for color and parts only
+
+    Returns:
+        JSON response with the changes since `since` (see get_drinks_changes)
+    """
+    with db.engine.connect() as connection:
+        version, drinks, deleted, full = Drink.changes(connection, since)
+    response = json_body_response(encode_changes(version, drinks, deleted, long_form, full))
+    response.cache_control.no_cache = True
+    if long_form:
+        response.cache_control.private = True
+    return response
+
+
+def paginated_drinks_response(after, limit, fields, long_form):
+    """
+    Build a page of the drinks listing from a column projection.
+
+    Args:
+        after: Cursor from the previous page, or None
+        limit: Page size, or None for every remaining drink
+        fields: Fields to include in each drink
+        long_form: True to include ingredient names in recipes
+
+    Returns:
+        JSON response with status code 200:
+        {
+            "success": True,
+            "drinks": [drink1, drink2, ...],
+            "next_cursor": id or None
+        }
+    """
+    rows = Drink.page(after=after, limit=limit, fields=fields)
+
+    if fields == DRINK_FIELDS:
+        view = long_drink if long_form else short_drink
+        drinks = [view(row.id, row.title, row.recipe) for row in rows]
+    else:
+        drinks = []
+        for row in rows:
+            drink = {}
+            for field in fields:
+                value = getattr(row, field)
+                if field == 'recipe' and not long_form:
+                    value = Drink.short_recipe(value)
+                drink[field] = value
+            drinks.append(drink)
+
+    next_cursor = rows[-1].id if limit is not None and len(rows) == limit else None
+    return json_response({
+        "success": True,
+        "drinks": drinks,
+        "next_cursor": next_cursor
+    }), 200
+
+
+def recipe_is_valid(recipe):
+    """Return True if recipe is a non-empty list of ingredients with name, color and parts."""
+    return isinstance(recipe, list) and bool(recipe) and all(
+        isinstance(ingredient, dict)
+        and all(key in ingredient for key in ['name', 'color', 'parts'])
+        for ingredient in recipe
+    )
+
+
+def get_bulk_items(key):
+    """
+    Return the list of items of a bulk request body.
+
+    Args:
+        key: Body member holding the items (e.g. 'drinks')
+
+    Raises:
+        400 if the body has no such list, it is empty or it holds more
+        than MAX_BULK_SIZE items
+    """
+    body = request.get_json(silent=True)
+    items = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items or len(items) > MAX_BULK_SIZE:
+        abort(400)
+    return items
+
+
+def bulk_rejected_response(results):
+    """
+    Build the response of a bulk request rejected during validation.
+
+    Items that passed validation are reported as 'skipped', since nothing
+    is written when any item fails.
+
+    Args:
+        results: Per-item result dicts, failed items carry a 'message'
+
+    Returns:
+        JSON response with status code 422
+    """
+    for result in results:
+        result.setdefault('status', 'skipped')
+    return json_response({
+        "success": False,
+        "error": 422,
+        "message": "unprocessable",
+        "results": results
+    }), 422
+
+
 # ROUTES
 
 @app.route('/drinks', methods=['GET'])
@@ -44,6 +317,13 @@ def get_drinks():
     GET /drinks - Retrieve all drinks (public endpoint).
 
     Returns short form representation of drinks without recipe details.
+    The body is served from the menu snapshot, so the database is only
+    queried after the menu changed. Supports If-None-Match and
+    If-Modified-Since revalidation.
+
+    Query Parameters (optional, see parse_listing_args):
+        limit, after: keyset pagination on drink id
+        fields: projection, e.g. fields=id,title
 
     Returns:
         JSON response with status code 200:
@@ -51,6 +331,8 @@ def get_drinks():
             "success": True,
             "drinks": [drink1, drink2, ...]
         }
+        or 304 with no body if the client's copy is current.
+        Paginated or projected requests also receive "next_cursor".
 
     Example:
         GET /drinks
@@ -62,20 +344,21 @@ def get_drinks():
             ]
         }
     """
+    listing = parse_listing_args()
+
     try:
-        # Query all drinks from database
-        drinks = Drink.query.all()
-        
-        # Return short form representation
-        drinks_list = [drink.short() for drink in drinks]
-        
-        return jsonify({
-            "success": True,
-            "drinks": drinks_list
-        }), 200
+        if listing is not None:
+            return paginated_drinks_response(*listing, long_form=False)
+
+        # Serve the pre-encoded short form listing
+        snapshot = menu_snapshot.get()
+        return conditional_body_response(
+            snapshot.short, snapshot.short_etag, snapshot.last_modified,
+            compressed=snapshot.short_compressed
+        )
     
-    except Exception as e:
-        print(f"Error getting drinks: {str(e)}")
+    except Exception:
+        app.logger.exception("Error getting drinks")
         abort(500)
 
 
@@ -86,7 +369,13 @@ def get_drinks_detail(payload):
     GET /drinks-detail - Retrieve all drinks with full details (protected).
 
     Requires 'get:drinks-detail' permission (Barista and Manager roles).
-    Returns long form representation of drinks with complete recipe information.
+    Returns long form representation of drinks with complete recipe information,
+    served from the menu snapshot. Supports If-None-Match and
+    If-Modified-Since revalidation.
+
+    Query Parameters (optional, see parse_listing_args):
+        limit, after: keyset pagination on drink id
+        fields: projection, e.g. fields=id,recipe
 
     Returns:
         JSON response with status code 200:
@@ -94,6 +383,8 @@ def get_drinks_detail(payload):
             "success": True,
             "drinks": [drink1, drink2, ...]
         }
+        or 304 with no body if the client's copy is current.
+        Paginated or projected requests also receive "next_cursor".
 
     Example:
         GET /drinks-detail
@@ -105,20 +396,96 @@ def get_drinks_detail(payload):
             ]
         }
     """
+    listing = parse_listing_args()
+
     try:
-        # Query all drinks from database
-        drinks = Drink.query.all()
-        
-        # Return long form representation
-        drinks_list = [drink.long() for drink in drinks]
-        
-        return jsonify({
-            "success": True,
-            "drinks": drinks_list
-        }), 200
+        if listing is not None:
+            return paginated_drinks_response(*listing, long_form=True)
+
+        # Serve the pre-encoded long form listing
+        snapshot = menu_snapshot.get()
+        return conditional_body_response(
+            snapshot.long, snapshot.long_etag, snapshot.last_modified, private=True,
+            compressed=snapshot.long_compressed
+        )
     
-    except Exception as e:
-        print(f"Error getting drinks detail: {str(e)}")
+    except Exception:
+        app.logger.exception("Error getting drinks detail")
+        abort(500)
+
+
+@app.route('/drinks/changes', methods=['GET'])
+def get_drinks_changes():
+    """
+    GET /drinks/changes - Retrieve the drinks changed since a menu version (public).
+
+    Every drink write takes the next persisted menu version. A client
+    keeps the version of its last response and passes it back, so a
+    steady-state refresh of an unchanged menu returns no drinks at all.
+    Created and updated drinks are returned in short form, deleted ones
+    by id only.
+
+    Query Parameters:
+        since: Menu version of the client's copy; 0 for the whole menu
+
+    Returns:
+        JSON response with status code 200:
+        {
+            "success": True,
+            "version": 42,
+            "full": False,
+            "drinks": [drink1, ...],
+            "deleted": [id1, ...]
+        }
+        "full" is True, and "drinks" the whole menu, when `since` is 0 or
+        a version the menu never reached (the database was recreated):
+        the client should then replace its copy instead of merging.
+        400 if `since` is missing or invalid.
+
+    Example:
+        GET /drinks/changes?since=41
+        Response:
+        {
+            "success": True,
+            "version": 42,
+            "full": False,
+            "drinks": [{"id": 3, "title": "Mocha", "recipe": [{"color": "brown", "parts": 1}]}],
+            "deleted": [7]
+        }
+    """
+    since = parse_since()
+
+    try:
+        return drinks_changes_response(since, long_form=False)
+
+    except Exception:
+        app.logger.exception("Error getting drinks changes")
+        abort(500)
+
+
+@app.route('/drinks-detail/changes', methods=['GET'])
+@requires_auth('get:drinks-detail')
+def get_drinks_detail_changes(payload):
+    """
+    GET /drinks-detail/changes - Retrieve the drinks changed since a menu version (protected).
+
+    Requires 'get:drinks-detail' permission (Barista and Manager roles).
+    The same as GET /drinks/changes, with the long form recipes of
+    GET /drinks-detail.
+
+    Query Parameters:
+        since: Menu version of the client's copy; 0 for the whole menu
+
+    Returns:
+        JSON response with status code 200, as for GET /drinks/changes
+    """
+    since = parse_since()
+
+    try:
+        return drinks_changes_response(since, long_form=True)
+
+    except Exception:
+        app.logger.exception("Error getting drinks detail changes")
         abort(500)
 
 
@@ -176,14 +543,14 @@ def create_drink(payload):
         # Create new drink
         new_drink = Drink(
             title=title,
-            recipe=json.dumps(recipe)
+            recipe=recipe
         )
         
         # Insert drink into database
         new_drink.insert()
         
         # Return the created drink in long form
-        return jsonify({
+        return json_response({
             "success": True,
             "drinks": [new_drink.long()]
         }), 200
@@ -191,8 +558,8 @@ def create_drink(payload):
     except exc.IntegrityError:
         # Handle duplicate title
         abort(422)
-    except Exception as e:
-        print(f"Error creating drink: {str(e)}")
+    except Exception:
+        app.logger.exception("Error creating drink")
         abort(422)
 
 
@@ -259,13 +626,13 @@ def update_drink(payload, drink_id):
                 if not all(key in ingredient for key in ['name', 'color', 'parts']):
                     abort(422)
             
-            drink.recipe = json.dumps(recipe)
+            drink.recipe = recipe
         
         # Update the drink in database
         drink.update()
         
         # Return the updated drink in long form
-        return jsonify({
+        return json_response({
             "success": True,
             "drinks": [drink.long()]
         }), 200
@@ -273,8 +640,8 @@ def update_drink(payload, drink_id):
     except exc.IntegrityError:
         # Handle duplicate title
         abort(422)
-    except Exception as e:
-        print(f"Error updating drink: {str(e)}")
+    except Exception:
+        app.logger.exception("Error updating drink")
         abort(422)
 
 
@@ -314,15 +681,309 @@ def delete_drink(payload, drink_id):
         drink.delete()
         
         # Return success response
-        return jsonify({
+        return json_response({
             "success": True,
             "delete": drink_id
         }), 200
     
-    except Exception as e:
-        print(f"Error deleting drink: {str(e)}")
+    except Exception:
+        app.logger.exception("Error deleting drink")
+        abort(500)
+
+
+@app.route('/drinks/bulk', methods=['POST'])
+@requires_auth('post:drinks')
+def create_drinks_bulk(payload):
+    """
+    POST /drinks/bulk - Create many drinks in one transaction (protected).
+
+    Requires 'post:drinks' permission (Manager role only), checked once for
+    the whole batch. Every item is validated before anything is written;
+    if any item is invalid, no drink is created.
+
+    Request Body:
+        {
+            "drinks": [{"title": "string", "recipe": [...]}, ...]
+        }
+
+    Returns:
+        JSON response with status code 200:
+        {
+            "success": True,
+            "drinks": [new_drink1, new_drink2, ...],
+            "results": [{"index": 0, "id": 7, "status": "created"}, ...]
+        }
+        or 422 with per-item "results" if any item is invalid
+
+    Example:
+        POST /drinks/bulk
+        Request: {"drinks": [{"title": "Latte", "recipe": [{"name": "coffee", "color": "brown", "parts": 1}]}]}
+        Response: {"success": True, "drinks": [{"id": 2, ...}], "results": [{"index": 0, "id": 2, "status": "created"}]}
+    """
+    items = get_bulk_items('drinks')
+
+    results = []
+    titles = {}
+    for index, item in enumerate(items):
+        result = {'index': index}
+        if not isinstance(item, dict) or not isinstance(item.get('title'), str) \
+                or not item['title'] or 'recipe' not in item:
+            result.update(status='invalid', message='title and recipe are required')
+        elif not recipe_is_valid(item['recipe']):
+            result.update(status='invalid', message='invalid recipe')
+        elif item['title'] in titles:
+            result.update(status='invalid', message='duplicate title in request')
+        else:
+            titles[item['title']] = result
+        results.append(result)
+
+    existing = Drink.query.with_entities(Drink.title).filter(Drink.title.in_(list(titles)))
+    for (title,) in existing:
+        titles[title].update(status='invalid', message='title already exists')
+
+    if any('message' in result for result in results):
+        return bulk_rejected_response(results)
+
+    try:
+        drinks = Drink.bulk_insert(items)
+    except exc.IntegrityError:
+        # Handle duplicate title created concurrently
+        abort(422)
+    except Exception:
+        app.logger.exception("Error creating drinks")
+        abort(422)
+
+    return json_response({
+        "success": True,
+        "drinks": drinks,
+        "results": [
+            {'index': index, 'id': drink['id'], 'status': 'created'}
+            for index, drink in enumerate(drinks)
+        ]
+    }), 200
+
+
+@app.route('/drinks/bulk', methods=['PATCH'])
+@requires_auth('patch:drinks')
+def update_drinks_bulk(payload):
+    """
+    PATCH /drinks/bulk - Update many drinks in one transaction (protected).
+
+    Requires 'patch:drinks' permission (Manager role only), checked once for
+    the whole batch. Every item is validated before anything is written;
+    if any item is invalid or names an unknown drink, nothing is updated.
+
+    Request Body:
+        {
+            "drinks": [{"id": int, "title": "string" (optional), "recipe": [...] (optional)}, ...]
+        }
+
+    Returns:
+        JSON response with status code 200:
+        {
+            "success": True,
+            "drinks": [updated_drink1, updated_drink2, ...],
+            "results": [{"index": 0, "id": 1, "status": "updated"}, ...]
+        }
+        or 422 with per-item "results" if any item is invalid or not found
+
+    Example:
+        PATCH /drinks/bulk
+        Request: {"drinks": [{"id": 1, "title": "Updated Drink"}]}
+        Response: {"success": True, "drinks": [updated_drink], "results": [...]}
+    """
+    items = get_bulk_items('drinks')
+
+    results = []
+    changes = {}
+    for index, item in enumerate(items):
+        result = {'index': index}
+        drink_id = item.get('id') if isinstance(item, dict) else None
+        if not isinstance(drink_id, int) or isinstance(drink_id, bool):
+            result.update(status='invalid', message='id is required')
+        elif 'title' not in item and 'recipe' not in item:
+            result.update(id=drink_id, status='invalid', message='nothing to update')
+        elif 'title' in item and (not isinstance(item['title'], str) or not item['title']):
+            result.update(id=drink_id, status='invalid', message='invalid title')
+        elif 'recipe' in item and not recipe_is_valid(item['recipe']):
+            result.update(id=drink_id, status='invalid', message='invalid recipe')
+        elif drink_id in changes:
+            result.update(id=drink_id, status='invalid', message='duplicate id in request')
+        else:
+            result['id'] = drink_id
+            changes[drink_id] = (result, {
+                key: item[key] for key in ('id', 'title', 'recipe') if key in item
+            })
+        results.append(result)
+
+    found = {drink_id for (drink_id,) in
+             Drink.query.with_entities(Drink.id).filter(Drink.id.in_(list(changes)))}
+    titles = {}
+    for drink_id, (result, mapping) in changes.items():
+        if drink_id not in found:
+            result.update(status='not_found', message='drink not found')
+        elif 'title' in mapping:
+            if mapping['title'] in titles:
+                result.update(status='invalid', message='duplicate title in request')
+            else:
+                titles[mapping['title']] = drink_id
+
+    taken = Drink.query.with_entities(Drink.id, Drink.title).filter(Drink.title.in_(list(titles)))
+    for drink_id, title in taken:
+        if titles[title] != drink_id:
+            changes[titles[title]][0].update(status='invalid', message='title already exists')
+
+    if any('message' in result for result in results):
+        return bulk_rejected_response(results)
+
+    try:
+        Drink.bulk_update([mapping for _, mapping in changes.values()])
+    except exc.IntegrityError:
+        # Handle duplicate title
+        abort(422)
+    except Exception:
+        app.logger.exception("Error updating drinks")
+        abort(422)
+
+    updated = {drink.id: drink.long() for drink in Drink.query.filter(Drink.id.in_(list(changes)))}
+    return json_response({
+        "success": True,
+        "drinks": [updated[drink_id] for drink_id in changes],
+        "results": [
+            {'index': index, 'id': drink_id, 'status': 'updated'}
+            for index, drink_id in enumerate(changes)
+        ]
+    }), 200
+
+
+@app.route('/drinks/bulk', methods=['DELETE'])
+@requires_auth('delete:drinks')
+def delete_drinks_bulk(payload):
+    """
+    DELETE /drinks/bulk - Delete many drinks in one transaction (protected).
+
+    Requires 'delete:drinks' permission (Manager role only), checked once for
+    the whole batch. If any id is invalid or unknown, nothing is deleted.
+
+    Request Body:
+        {
+            "ids": [int, ...]
+        }
+
+    Returns:
+        JSON response with status code 200:
+        {
+            "success": True,
+            "delete": [id1, id2, ...],
+            "results": [{"index": 0, "id": 3, "status": "deleted"}, ...]
+        }
+        or 422 with per-item "results" if any id is invalid or not found
+
+    Example:
+        DELETE /drinks/bulk
+        Request: {"ids": [3, 4]}
+        Response: {"success": True, "delete": [3, 4], "results": [...]}
+    """
+    ids = get_bulk_items('ids')
+
+    results = []
+    valid = {}
+    for index, drink_id in enumerate(ids):
+        result = {'index': index, 'id': drink_id}
+        if not isinstance(drink_id, int) or isinstance(drink_id, bool):
+            result.update(status='invalid', message='invalid id')
+        elif drink_id in valid:
+            result.update(status='invalid', message='duplicate id in request')
+        else:
+            valid[drink_id] = result
+        results.append(result)
+
+    found = {drink_id for (drink_id,) in
+             Drink.query.with_entities(Drink.id).filter(Drink.id.in_(list(valid)))}
+    for drink_id, result in valid.items():
+        if drink_id not in found:
+            result.update(status='not_found', message='drink not found')
+
+    if any('message' in result for result in results):
+        return bulk_rejected_response(results)
+
+    try:
+        Drink.bulk_delete(list(valid))
+    except Exception:
+        app.logger.exception("Error deleting drinks")
         abort(500)
 
+    return json_response({
+        "success": True,
+        "delete": list(valid),
+        "results": [
+            {'index': index, 'id': drink_id, 'status': 'deleted'}
+            for index, drink_id in enumerate(valid)
+        ]
+    }), 200
+
+
+@app.route('/profiles', methods=['GET'])
+@requires_auth('get:profiles')
+def get_profiles(payload):
+    """
+    GET /profiles - List recent request profiles (protected).
+
+    Requires 'get:profiles' permission (Manager role only). Profiles are
+    recorded when PROFILING_ENABLED is set, see src/metrics/profiling.py.
+
+    Query Parameters:
+        limit: Number of profiles, 1 to MAX_PROFILES_LISTED (default: 50)
+
+    Returns:
+        JSON response with status code 200:
+        {
+            "success": True,
+            "profiles": [profile1, profile2, ...]
+        }
+
+    Example:
+        GET /profiles?limit=1
+        Response:
+        {
+            "success": True,
+            "profiles": [
+                {"id": "20240131T120501-042-9f3a1c2e", "method": "PATCH",
+                 "route": "/drinks/<int:drink_id>", "status": 200, "duration_ms": 12.5, ...}
+            ]
+        }
+    """
+    limit = request.args.get('limit', 50, type=int)
+    if not 1 <= limit <= MAX_PROFILES_LISTED:
+        abort(400)
+
+    return json_response({
+        "success": True,
+        "profiles": profiler.list(limit=limit)
+    }), 200
+
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+@requires_auth('get:profiles')
+def get_profile(payload, profile_id):
+    """
+    GET /profiles/<id> - Download a request profile (protected).
+
+    Requires 'get:profiles' permission (Manager role only).
+
+    Args:
+        profile_id: Id of the profile, as listed by GET /profiles
+
+    Returns:
+        The pstats file of the profile, or 404 if there is no such profile
+    """
+    path = profiler.path(profile_id)
+    if path is None:
+        abort(404)
+
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'{profile_id}.prof')
+
 
 # Error Handling
 
@@ -342,7 +1003,7 @@ def unprocessable(error):
             "message": "unprocessable"
         }
     """
-    return jsonify({
+    return json_response({
         "success": False,
         "error": 422,
         "message": "unprocessable"
@@ -365,7 +1026,7 @@ def not_found(error):
             "message": "resource not found"
         }
     """
-    return jsonify({
+    return json_response({
         "success": False,
         "error": 404,
         "message": "resource not found"
@@ -388,7 +1049,7 @@ def handle_auth_error(error):
             "message": error_message
         }
     """
-    return jsonify({
+    return json_response({
         "success": False,
         "error": error.status_code,
         "message": error.error.get('description', 'Authentication failed')
@@ -411,7 +1072,7 @@ def bad_request(error):
             "message": "bad request"
         }
     """
-    return jsonify({
+    return json_response({
         "success": False,
         "error": 400,
         "message": "bad request"
@@ -434,7 +1095,7 @@ def internal_server_error(error):
             "message": "internal server error"
         }
     """
-    return jsonify({
+    return json_response({
         "success": False,
         "error": 500,
         "message": "internal server error"
@@ -0,0 +1,531 @@
+"""
+Coffee Shop API - Async (ASGI) Application.
+
+This module serves the drinks endpoints of api.py from a single asyncio
+event loop, for deployments where one process has to hold thousands of
+concurrent menu and long-poll clients. Requests never block a thread:
+tokens are checked by the async `requires_auth` (signing keys fetched
+with httpx), and the database is queried through SQLAlchemy's asyncio
+extension (aiosqlite locally), using the same Drink model and the same
+menu snapshot as the Flask app.
+
+Endpoints (same contract as api.py):
+    GET /drinks - Public endpoint to get all drinks (short form)
+    GET /drinks-detail - Protected endpoint to get all drinks (long form)
+    POST /drinks - Protected endpoint to create a new drink
+    PATCH /drinks/<id> - Protected endpoint to update a drink
+    DELETE /drinks/<id> - Protected endpoint to delete a drink
+    GET /drinks/changes - Public endpoint to get the drinks changed since a menu version
+    GET /drinks-detail/changes - Protected endpoint, the same in long form
+
+Only served here:
+    GET /drinks/stream - Public Server-Sent Events stream of menu changes
+
+Pagination, bulk writes, metrics and profiling are only served by the
+Flask app.
+
+Usage:
+    pip install -r requirements.txt  # includes the async dependencies
+    cd backend
+    uvicorn src.async_api:app --port 5000
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from itertools import groupby
+
+from sqlalchemy import exc
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import http_date, parse_date, parse_etags
+
+from .auth.async_auth import requires_auth
+from .auth.auth import AuthError
+from .database.menu import encode_changes
+from .database.models import (
+    Drink, MenuVersion, menu_changed, menu_events, menu_snapshot, menu_write_stamp, missing_schema,
+    setup_async_db
+)
+from .encoding import dumps
+
+
+engine, Session = setup_async_db()
+
+# Seconds between keepalive comments on an idle event stream, so proxies
+# keep the connection open and closed clients are noticed
+MENU_STREAM_KEEPALIVE = float(os.environ.get('MENU_STREAM_KEEPALIVE', '15'))
+
+# Milliseconds an EventSource waits before reconnecting
+MENU_STREAM_RETRY = 3000
+
+# Seconds between reads of the persisted menu version, which turn writes
+# made by other processes into stream events; 0 streams only this
+# process's writes
+MENU_STREAM_POLL = float(os.environ.get('MENU_STREAM_POLL', '1'))
+
+logger = logging.getLogger(__name__)
+
+# Error messages, matching the error handlers of api.py
+ERROR_MESSAGES = {
+    400: 'bad request',
+    404: 'resource not found',
+    422: 'unprocessable',
+    500: 'internal server error',
+}
+
+
+class EncodedJSONResponse(JSONResponse):
+    """JSON response encoded by the encoder of encoding.py, like api.py's."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+# Serializes snapshot rebuilds, so clients arriving after a write wait for
+# one query instead of each loading the menu
+_menu_lock = asyncio.Lock()
+
+
+async def current_menu():
+    """
+    Return the menu snapshot, loading the drinks if it was invalidated or
+    the persisted menu version has moved on.
+
+    Between checks of the persisted version (see MenuSnapshot.fresh) the
+    snapshot is returned without touching the database.
+
+    Returns:
+        Snapshot
+    """
+    snapshot = menu_snapshot.fresh()
+    if snapshot is not None:
+        return snapshot
+
+    async with engine.connect() as connection:
+        state = MenuVersion.state_of((await connection.execute(MenuVersion.state_select())).first())
+    snapshot = menu_snapshot.confirm(state)
+    if snapshot is not None:
+        return snapshot
+
+    async with _menu_lock:
+        snapshot = menu_snapshot.fresh()
+        if snapshot is not None:
+            return snapshot
+
+        version = menu_snapshot.version
+        async with engine.connect() as connection:
+            state = MenuVersion.state_of((await connection.execute(MenuVersion.state_select())).first())
+            snapshot = menu_snapshot.confirm(state)
+            if snapshot is not None:
+                return snapshot
+            # Plain rows, like Drink.listing_rows()
+            drinks = (await connection.execute(Drink.listing_select())).all()
+        return menu_snapshot.store(drinks, version, state)
+
+
+def conditional_body_response(request, body, etag, last_modified, private=False):
+    """
+    Build a revalidatable JSON response from an already encoded body.
+
+    Answers 304 Not Modified when the request's If-None-Match or
+    If-Modified-Since shows the client already has the body, like
+    conditional_body_response() in api.py.
+
+    Args:
+        request: The Starlette request
+        body: Encoded JSON bytes
+        etag: Unquoted strong entity tag of the body
+        last_modified: Unix time the content last changed
+        private: True for responses that depend on the caller's credentials
+
+    Returns:
+        Response with status 200 or 304
+    """
+    headers = {
+        'ETag': f'"{etag}"',
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': 'no-cache, private' if private else 'no-cache',
+    }
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        not_modified = parse_etags(if_none_match).contains_weak(etag)
+    else:
+        since = parse_date(request.headers.get('If-Modified-Since'))
+        not_modified = since is not None and since.timestamp() >= int(last_modified)
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+def parse_since(request):
+    """
+    Parse the `since` parameter of the drinks changes endpoints.
+
+    Raises:
+        400 if the parameter is missing or not a non-negative integer
+    """
+    since = request.query_params.get('since', '')
+    if not since.isdigit():
+        raise HTTPException(400)
+    return int(since)
+
+
+async def drinks_changes_response(request, long_form):
+    """Build a changes response like drinks_changes_response() in api.py."""
+    since = parse_since(request)
+    async with engine.connect() as connection:
+        version, drinks, deleted, full = await connection.run_sync(Drink.changes, since)
+    return Response(encode_changes(version, drinks, deleted, long_form, full),
+                    media_type='application/json',
+                    headers={'Cache-Control': 'no-cache, private' if long_form else 'no-cache'})
+
+
+async def json_body(request):
+    """
+    Return the decoded JSON object of a request body.
+
+    Raises:
+        400 if the body is not a JSON object
+    """
+    try:
+        body = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(400)
+    if not isinstance(body, dict) or not body:
+        raise HTTPException(400)
+    return body
+
+
+def check_recipe(recipe):
+    """
+    Validate a recipe from a request body.
+
+    Raises:
+        422 if the recipe is not a list of ingredients with name, color and parts
+    """
+    if not isinstance(recipe, list) or not all(
+        isinstance(ingredient, dict)
+        and all(key in ingredient for key in ['name', 'color', 'parts'])
+        for ingredient in recipe
+    ):
+        raise HTTPException(422)
+
+
+# ROUTES
+
+async def get_drinks(request):
+    """GET /drinks - Retrieve all drinks in short form (public endpoint)."""
+    snapshot = await current_menu()
+    return conditional_body_response(
+        request, snapshot.short, snapshot.short_etag, snapshot.last_modified
+    )
+
+
+@requires_auth('get:drinks-detail')
+async def get_drinks_detail(request, payload):
+    """GET /drinks-detail - Retrieve all drinks in long form (protected)."""
+    snapshot = await current_menu()
+    return conditional_body_response(
+        request, snapshot.long, snapshot.long_etag, snapshot.last_modified, private=True
+    )
+
+
+async def get_drinks_changes(request):
+    """GET /drinks/changes - Retrieve the drinks changed since a menu version (public)."""
+    return await drinks_changes_response(request, long_form=False)
+
+
+@requires_auth('get:drinks-detail')
+async def get_drinks_detail_changes(request, payload):
+    """GET /drinks-detail/changes - The same in long form (protected)."""
+    return await drinks_changes_response(request, long_form=True)
+
+
+@requires_auth('post:drinks')
+async def create_drink(request, payload):
+    """POST /drinks - Create a new drink (protected)."""
+    body = await json_body(request)
+    title = body.get('title', None)
+    recipe = body.get('recipe', None)
+    if not title or not recipe:
+        raise HTTPException(400)
+    check_recipe(recipe)
+
+    drink = Drink(title=title, recipe=recipe)
+    async with Session() as session:
+        stamp = await session.run_sync(menu_write_stamp, [drink])
+        session.add(drink)
+        try:
+            await session.commit()
+        except exc.IntegrityError:
+            # Handle duplicate title
+            raise HTTPException(422)
+    menu_changed('created', [drink.id], stamp['version'])
+
+    return EncodedJSONResponse({
+        "success": True,
+        "drinks": [drink.long()]
+    })
+
+
+@requires_auth('patch:drinks')
+async def update_drink(request, payload):
+    """PATCH /drinks/<id> - Update an existing drink (protected)."""
+    body = await json_body(request)
+    if 'recipe' in body:
+        check_recipe(body['recipe'])
+
+    async with Session() as session:
+        drink = await session.get(Drink, request.path_params['drink_id'])
+        if drink is None:
+            raise HTTPException(404)
+
+        if 'title' in body:
+            drink.title = body['title']
+        if 'recipe' in body:
+            drink.recipe = body['recipe']
+
+        stamp = await session.run_sync(menu_write_stamp, [drink])
+        try:
+            await session.commit()
+        except exc.IntegrityError:
+            # Handle duplicate title
+            raise HTTPException(422)
+    menu_changed('updated', [drink.id], stamp['version'])
+
+    return EncodedJSONResponse({
+        "success": True,
+        "drinks": [drink.long()]
+    })
+
+
+@requires_auth('delete:drinks')
+async def delete_drink(request, payload):
+    """DELETE /drinks/<id> - Delete a drink (protected)."""
+    drink_id = request.path_params['drink_id']
+
+    async with Session() as session:
+        drink = await session.get(Drink, drink_id)
+        if drink is None:
+            raise HTTPException(404)
+        stamp = await session.run_sync(menu_write_stamp, (), [drink_id])
+        await session.delete(drink)
+        await session.commit()
+    menu_changed('deleted', [drink_id], stamp['version'])
+
+    return EncodedJSONResponse({
+        "success": True,
+        "delete": drink_id
+    })
+
+
+def event_message(event):
+    """
+    Encode a menu event as a Server-Sent Events message.
+
+    Example:
+        id: 9f3a1c2e-42
+        data: {"action":"updated","id":3,"version":17}
+    """
+    data = {'action': event.action, 'version': event.version}
+    if event.drink_id is not None:
+        data['id'] = event.drink_id
+    event_id = menu_events.event_id(event.sequence)
+    return b'id: ' + event_id.encode() + b'\ndata: ' + dumps(data).rstrip(b'\n') + b'\n\n'
+
+
+async def menu_event_stream(after):
+    """Yield the chunks of an event stream, starting after sequence `after`."""
+    yield f'retry: {MENU_STREAM_RETRY}\n\n'.encode()
+    async for events in menu_events.listen(after, MENU_STREAM_KEEPALIVE):
+        if events:
+            yield b''.join(event_message(event) for event in events)
+        else:
+            yield b': keepalive\n\n'
+
+
+async def poll_menu_version(polled, interval=MENU_STREAM_POLL):
+    """
+    Publish the drink writes of other processes to menu_events.
+
+    Writes made through this process are published as they commit; this
+    task is the slow path for the rest. Every `interval` seconds it reads
+    the persisted menu version (one primary key lookup) and, when it has
+    moved on and someone is listening, publishes the drinks written since
+    the last poll, less those this process has published itself. Without
+    listeners the version is only noted. A local write committed just
+    before a poll may reach listeners twice, which the ids and versions
+    of the events make harmless.
+
+    Runs for the lifetime of the application (see lifespan).
+
+    Args:
+        polled: Persisted menu version at startup
+        interval: Seconds between polls
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with engine.connect() as connection:
+                if not menu_events.listeners:
+                    version = (await connection.execute(MenuVersion.current_select())).scalar() or 0
+                    written, deleted = [], []
+                else:
+                    version, written, deleted = await connection.run_sync(Drink.changed_ids, polled)
+        except exc.SQLAlchemyError:
+            logger.exception("Error polling the menu version")
+            continue
+
+        if version > polled:
+            published = menu_events.published(polled)
+            changes = sorted(
+                [(row.version, 'updated', row.id) for row in written]
+                + [(row.version, 'deleted', row.id) for row in deleted]
+            )
+            for (change_version, action), group in groupby(changes, key=lambda change: change[:2]):
+                drink_ids = [drink_id for _, _, drink_id in group
+                             if (drink_id, change_version) not in published]
+                if drink_ids:
+                    menu_events.publish(action, drink_ids, change_version)
+        # Also after the database was recreated at a lower version
+        polled = version
+        menu_events.observe(version)
+
+
+async def stream_drinks(request):
+    """
+    GET /drinks/stream - Stream menu changes as Server-Sent Events (public).
+
+    Replaces polling GET /drinks: every committed drink write is pushed as
+    one event per drink, with its action ('created', 'updated' or
+    'deleted'), id and the persisted menu version of the write, which
+    GET /drinks/changes accepts as `since`. Writes made through this
+    process are pushed as they commit; those of other processes within
+    MENU_STREAM_POLL seconds, as 'updated' or 'deleted'. A new connection
+    first receives a 'ready' event carrying the current version.
+
+    A reconnecting EventSource sends the Last-Event-ID header (or the
+    last_event_id query parameter, for clients that cannot set headers)
+    and receives only the events it missed. If they are no longer kept,
+    or the id is from before a server restart, it receives a 'reset'
+    event instead and should reload GET /drinks.
+
+    Connections wait on the event loop, not in a thread, so thousands of
+    idle clients cost little more than their sockets.
+
+    Example:
+        GET /drinks/stream
+        Response (text/event-stream):
+            retry: 3000
+
+            id: 9f3a1c2e-41
+            data: {"action":"ready","version":16}
+
+            id: 9f3a1c2e-42
+            data: {"action":"updated","id":3,"version":17}
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+    after = None
+    if last_event_id:
+        # An id that cannot be resumed is answered with a 'reset'
+        after = menu_events.parse_event_id(last_event_id)
+        if after is None:
+            after = -1
+
+    return StreamingResponse(menu_event_stream(after), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop nginx from buffering the stream
+        'X-Accel-Buffering': 'no',
+    })
+
+
+# Error Handling
+
+async def http_error(request, error):
+    """Return the JSON error body of api.py for an HTTP error."""
+    status = error.status_code
+    return EncodedJSONResponse({
+        "success": False,
+        "error": status,
+        "message": ERROR_MESSAGES.get(status, error.detail.lower())
+    }, status_code=status)
+
+
+async def handle_auth_error(request, error):
+    """Return the JSON error body of api.py for an AuthError."""
+    return EncodedJSONResponse({
+        "success": False,
+        "error": error.status_code,
+        "message": error.error.get('description', 'Authentication failed')
+    }, status_code=error.status_code)
+
+
+async def internal_server_error(request, error):
+    """Return the JSON error body of api.py for an unhandled exception."""
+    return EncodedJSONResponse({
+        "success": False,
+        "error": 500,
+        "message": ERROR_MESSAGES[500]
+    }, status_code=500)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Start 'ready' events at the persisted menu version and poll it for the
+    writes of other processes, and close the pooled database connections
+    on shutdown.
+
+    Raises:
+        RuntimeError: If the database lacks tables or columns of the
+            models; the message names the migration to run
+    """
+    async with engine.connect() as connection:
+        missing = await connection.run_sync(missing_schema)
+        if missing:
+            raise RuntimeError(
+                f"Database schema is out of date (missing {', '.join(missing)}): "
+                "run `flask upgrade-db` before starting the async API"
+            )
+        version = (await connection.execute(MenuVersion.current_select())).scalar() or 0
+    menu_events.observe(version)
+    poller = asyncio.create_task(poll_menu_version(version)) if MENU_STREAM_POLL > 0 else None
+    yield
+    if poller is not None:
+        poller.cancel()
+        try:
+            await poller
+        except asyncio.CancelledError:
+            pass
+    await engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route('/drinks', get_drinks, methods=['GET']),
+        Route('/drinks', create_drink, methods=['POST']),
+        Route('/drinks-detail', get_drinks_detail, methods=['GET']),
+        Route('/drinks/stream', stream_drinks, methods=['GET']),
+        Route('/drinks/changes', get_drinks_changes, methods=['GET']),
+        Route('/drinks-detail/changes', get_drinks_detail_changes, methods=['GET']),
+        Route('/drinks/{drink_id:int}', update_drink, methods=['PATCH']),
+        Route('/drinks/{drink_id:int}', delete_drink, methods=['DELETE']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+    ],
+    exception_handlers={
+        HTTPException: http_error,
+        AuthError: handle_auth_error,
+        Exception: internal_server_error,
+    },
+    lifespan=lifespan,
+)
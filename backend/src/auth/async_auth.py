@@ -0,0 +1,91 @@
+"""
+Async authentication for Coffee Shop API.
+
+This module is the asyncio counterpart of auth.py, used by the async API
+(src/async_api.py). Tokens are checked exactly as by `requires_auth` in
+auth.py, with the same header parsing, claims, permission masks and
+verified token cache, but signing keys are fetched with a non-blocking
+client, so a JWKS refresh never stalls the event loop and concurrent
+requests waiting on a cold cache share a single fetch.
+
+Requires httpx when AUTH0_JWKS_URL is an http(s) URL.
+"""
+
+from functools import wraps
+
+from .auth import (
+    ALGORITHMS, JWKS_TTL, JWKS_URL, AuthError, _as_permission_list, check_permission_mask,
+    decode_token, parse_auth_header, permission_registry, token_cache, token_key_id
+)
+from .jwks import AsyncJWKSCache, JWKSUnavailableError, async_source_from_url
+
+
+# Signing keys for the async API, fetched without blocking the event loop.
+# Call async_jwks_cache.set_source() to verify against another issuer.
+async_jwks_cache = AsyncJWKSCache(
+    async_source_from_url(JWKS_URL, allow_symmetric='HS256' in ALGORITHMS), ttl=JWKS_TTL
+)
+
+
+async def verify_token(token):
+    """
+    Verify an Auth0 token and resolve its permissions.
+
+    Args:
+        token: a json web token (string)
+
+    Returns:
+        VerifiedToken: The decoded payload and its permission mask
+
+    Raises:
+        AuthError: see auth.verify_token()
+    """
+    verified = token_cache.get(token)
+    if verified is not None:
+        return verified
+
+    kid = token_key_id(token)
+
+    try:
+        key = await async_jwks_cache.get_key(kid)
+    except JWKSUnavailableError:
+        raise AuthError({
+            'code': 'jwks_unavailable',
+            'description': 'Unable to fetch signing keys.'
+        }, 503)
+
+    return decode_token(token, key)
+
+
+def requires_auth(permission='', any_of=None):
+    """
+    Decorator protecting an async endpoint with a JWT permission check.
+
+    Args:
+        permission: string permission (i.e. 'post:drinks') or a list of
+                    permissions that must all be granted
+        any_of: optional list of permissions of which at least one must
+                be granted
+
+    Returns:
+        The decorator, which passes the decoded payload to the decorated
+        coroutine after the request
+
+    Example:
+        @requires_auth('post:drinks')
+        async def create_drink(request, payload):
+            ...
+    """
+    required = permission_registry.mask(_as_permission_list(permission))
+    required_any = permission_registry.mask(any_of or [])
+
+    def requires_auth_decorator(f):
+        @wraps(f)
+        async def wrapper(request, *args, **kwargs):
+            token = parse_auth_header(request.headers.get('Authorization'))
+            verified = await verify_token(token)
+            check_permission_mask(verified.permissions, required, required_any)
+            return await f(request, verified.payload, *args, **kwargs)
+
+        return wrapper
+    return requires_auth_decorator
@@ -8,20 +8,53 @@ Environment Variables Required:
     AUTH0_DOMAIN: Your Auth0 domain (e.g., 'udacity-fsnd.auth0.com')
     AUTH0_ALGORITHM: JWT algorithm (default: 'RS256')
     AUTH0_API_AUDIENCE: Your Auth0 API audience identifier
+
+Environment Variables Optional:
+    AUTH0_JWKS_URL: JWKS location, an https:// URL, file:// URL or local path
+                    (default: 'https://<AUTH0_DOMAIN>/.well-known/jwks.json')
+    AUTH0_JWKS_TTL: Seconds fetched signing keys are considered fresh (default: 600)
+    AUTH_TOKEN_CACHE_SIZE: Number of verified tokens kept in memory, 0 disables (default: 1024)
 """
 
-import json
 import os
+import time
+from collections import namedtuple
 from flask import request
 from functools import wraps
 from jose import jwt
-from urllib.request import urlopen
+
+from ..metrics.instrumentation import record_auth_time
+from .jwks import JWKSCache, JWKSUnavailableError, source_from_url
+from .permissions import DEFAULT_PERMISSIONS, PermissionRegistry
+from .token_cache import TokenCache
 
 
 # Read Auth0 configuration from environment variables
 AUTH0_DOMAIN = os.environ.get('AUTH0_DOMAIN', 'udacity-fsnd.auth0.com')
 ALGORITHMS = os.environ.get('AUTH0_ALGORITHM', 'RS256').split(',')
 API_AUDIENCE = os.environ.get('AUTH0_API_AUDIENCE', 'dev')
+JWKS_URL = os.environ.get('AUTH0_JWKS_URL', f'https://{AUTH0_DOMAIN}/.well-known/jwks.json')
+JWKS_TTL = float(os.environ.get('AUTH0_JWKS_TTL', '600'))
+TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', '1024'))
+
+# Signing keys are fetched once and reused across requests.
+# Call jwks_cache.set_source() to verify against another issuer.
+# HS256 keys are only read from a local key file (see jwks.py)
+jwks_cache = JWKSCache(
+    source_from_url(JWKS_URL, allow_symmetric='HS256' in ALGORITHMS), ttl=JWKS_TTL
+)
+
+# Payloads of verified tokens are reused until the token's own expiry,
+# so repeated bearer tokens skip signature verification.
+token_cache = TokenCache(max_entries=TOKEN_CACHE_SIZE)
+
+# Permission strings are resolved to bits once; endpoints compare masks.
+permission_registry = PermissionRegistry(DEFAULT_PERMISSIONS)
+
+# A verified token: its decoded payload and the bitmask of the permissions
+# it grants (None when the payload has no permissions claim)
+VerifiedToken = namedtuple('VerifiedToken', ['payload', 'permissions'])
+
 
 ## AuthError Exception
 '''
@@ -36,65 +69,303 @@ class AuthError(Exception):
 
 ## Auth Header
 
-'''
-@TODO implement get_token_auth_header() method
-    it should attempt to get the header from the request
-        it should raise an AuthError if no header is present
-    it should attempt to split bearer and the token
-        it should raise an AuthError if the header is malformed
-    return the token part of the header
-'''
 def get_token_auth_header():
-   raise Exception('Not Implemented')
+    """
+    Obtain the access token from the Authorization header.
+
+    Returns:
+        str: The token part of a 'Bearer <token>' header
+
+    Raises:
+        AuthError: 401 if the header is missing or malformed
+    """
+    return parse_auth_header(request.headers.get('Authorization', None))
+
+
+def parse_auth_header(auth):
+    """
+    Extract the token from an Authorization header value.
+
+    Args:
+        auth: Value of the Authorization header, or None if absent
+
+    Returns:
+        str: The token part of a 'Bearer <token>' header
+
+    Raises:
+        AuthError: 401 if the header is missing or malformed
+    """
+    if not auth:
+        raise AuthError({
+            'code': 'authorization_header_missing',
+            'description': 'Authorization header is expected.'
+        }, 401)
+
+    parts = auth.split()
+    if parts[0].lower() != 'bearer':
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Authorization header must start with "Bearer".'
+        }, 401)
+
+    elif len(parts) == 1:
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Token not found.'
+        }, 401)
+
+    elif len(parts) > 2:
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Authorization header must be bearer token.'
+        }, 401)
+
+    return parts[1]
+
+
+def check_permission_mask(granted, required=0, required_any=0):
+    """
+    Check a token's permission mask against the required bits.
+
+    Args:
+        granted: permission mask of the token (None if the token has no
+                 permissions claim)
+        required: mask of permissions that must all be granted
+        required_any: mask of permissions of which at least one must be
+                      granted (0 for no such requirement)
+
+    Returns:
+        bool: True if the permissions are granted
+
+    Raises:
+        AuthError: 400 if the token has no permissions claim
+                   (check the RBAC settings in Auth0),
+                   403 if a required permission is missing
+    """
+    if granted is None:
+        raise AuthError({
+            'code': 'invalid_claims',
+            'description': 'Permissions not included in JWT.'
+        }, 400)
+
+    if granted & required != required or (required_any and not granted & required_any):
+        raise AuthError({
+            'code': 'unauthorized',
+            'description': 'Permission not found.'
+        }, 403)
+
+    return True
 
-'''
-@TODO implement check_permissions(permission, payload) method
-    @INPUTS
-        permission: string permission (i.e. 'post:drink')
-        payload: decoded jwt payload
 
-    it should raise an AuthError if permissions are not included in the payload
-        !!NOTE check your RBAC settings in Auth0
-    it should raise an AuthError if the requested permission string is not in the payload permissions array
-    return true otherwise
-'''
 def check_permissions(permission, payload):
-    raise Exception('Not Implemented')
+    """
+    Check that the decoded token grants the requested permission.
 
-'''
-@TODO implement verify_decode_jwt(token) method
-    @INPUTS
+    Args:
+        permission: string permission (i.e. 'post:drinks') or a list of
+                    permissions that must all be granted; an empty string
+                    only requires a valid token
+        payload: decoded jwt payload
+
+    Returns:
+        bool: True if the permission is granted
+
+    Raises:
+        AuthError: 400 if the payload has no permissions claim
+                   (check the RBAC settings in Auth0),
+                   403 if the permission is not in the payload
+    """
+    return check_permission_mask(
+        _permission_mask(payload),
+        permission_registry.mask(_as_permission_list(permission))
+    )
+
+
+def _as_permission_list(permission):
+    """Normalize a permission argument into a list of permission strings."""
+    if not permission:
+        return []
+    if isinstance(permission, str):
+        return [permission]
+    return list(permission)
+
+
+def _permission_mask(payload):
+    """Return the permission mask of a payload, or None if it has none."""
+    permissions = payload.get('permissions')
+    if not isinstance(permissions, list):
+        return None
+    return permission_registry.mask(permissions)
+
+
+def verify_token(token):
+    """
+    Verify an Auth0 token and resolve its permissions.
+
+    The signing key is looked up by the token's key id (kid) in the
+    cached JWKS, so the issuer is only contacted when the cache is
+    stale or the kid is unknown. Tokens that were already verified are
+    served from the token cache until they expire.
+
+    Args:
         token: a json web token (string)
 
-    it should be an Auth0 token with key id (kid)
-    it should verify the token using Auth0 /.well-known/jwks.json
-    it should decode the payload from the token
-    it should validate the claims
-    return the decoded payload
+    Returns:
+        VerifiedToken: The decoded payload and its permission mask
+
+    Raises:
+        AuthError: 401 for a malformed, expired or mis-addressed token,
+                   400 if the token cannot be verified against any key,
+                   503 if the signing keys cannot be fetched
+    """
+    verified = token_cache.get(token)
+    if verified is not None:
+        return verified
+
+    kid = token_key_id(token)
+
+    try:
+        key = jwks_cache.get_key(kid)
+    except JWKSUnavailableError:
+        raise AuthError({
+            'code': 'jwks_unavailable',
+            'description': 'Unable to fetch signing keys.'
+        }, 503)
+
+    return decode_token(token, key)
+
+
+def token_key_id(token):
+    """
+    Return the key id (kid) from a token's unverified header.
+
+    Raises:
+        AuthError: 401 if the header cannot be parsed or has no kid
+    """
+    try:
+        unverified_header = jwt.get_unverified_header(token)
+    except Exception:
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Unable to parse authentication token.'
+        }, 401)
+
+    if 'kid' not in unverified_header:
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Authorization malformed.'
+        }, 401)
+
+    return unverified_header['kid']
+
+
+def decode_token(token, key):
+    """
+    Validate a token against its signing key and cache the result.
+
+    Args:
+        token: a json web token (string)
+        key: the signing key for the token's kid, or None if the issuer
+             does not publish it
+
+    Returns:
+        VerifiedToken: The decoded payload and its permission mask
+
+    Raises:
+        AuthError: 401 for an expired or mis-addressed token,
+                   400 if the token cannot be verified against the key
+    """
+    if key is None:
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Unable to find the appropriate key.'
+        }, 400)
+
+    try:
+        payload = jwt.decode(
+            token,
+            key,
+            algorithms=ALGORITHMS,
+            audience=API_AUDIENCE,
+            issuer=f'https://{AUTH0_DOMAIN}/'
+        )
+
+    except jwt.ExpiredSignatureError:
+        raise AuthError({
+            'code': 'token_expired',
+            'description': 'Token expired.'
+        }, 401)
+
+    except jwt.JWTClaimsError:
+        raise AuthError({
+            'code': 'invalid_claims',
+            'description': 'Incorrect claims. Please, check the audience and issuer.'
+        }, 401)
+
+    except Exception:
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Unable to parse authentication token.'
+        }, 400)
+
+    verified = VerifiedToken(payload, _permission_mask(payload))
+    token_cache.put(token, verified, payload.get('exp'))
+    return verified
+
 
-    !!NOTE urlopen has a common certificate error described here: https://stackoverflow.com/questions/50236117/scraping-ssl-certificate-verify-failed-error-for-http-en-wikipedia-org
-'''
 def verify_decode_jwt(token):
-    raise Exception('Not Implemented')
+    """
+    Verify an Auth0 token and decode its payload.
+
+    Args:
+        token: a json web token (string)
+
+    Returns:
+        dict: The decoded and validated payload
+
+    Raises:
+        AuthError: see verify_token()
+    """
+    return verify_token(token).payload
+
+
+def requires_auth(permission='', any_of=None):
+    """
+    Decorator protecting an endpoint with a JWT permission check.
+
+    The required permissions are resolved to a bitmask once, when the
+    decorator is applied. Time spent checking the token is reported to
+    the request metrics.
+
+    Args:
+        permission: string permission (i.e. 'post:drinks') or a list of
+                    permissions that must all be granted
+        any_of: optional list of permissions of which at least one must
+                be granted
+
+    Returns:
+        The decorator, which passes the decoded payload to the decorated method
+
+    Example:
+        @app.route('/drinks', methods=['POST'])
+        @requires_auth('post:drinks')
+        def create_drink(payload):
+            ...
+    """
+    required = permission_registry.mask(_as_permission_list(permission))
+    required_any = permission_registry.mask(any_of or [])
 
-'''
-@TODO implement @requires_auth(permission) decorator method
-    @INPUTS
-        permission: string permission (i.e. 'post:drink')
-
-    it should use the get_token_auth_header method to get the token
-    it should use the verify_decode_jwt method to decode the jwt
-    it should use the check_permissions method validate claims and check the requested permission
-    return the decorator which passes the decoded payload to the decorated method
-'''
-def requires_auth(permission=''):
     def requires_auth_decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            token = get_token_auth_header()
-            payload = verify_decode_jwt(token)
-            check_permissions(permission, payload)
-            return f(payload, *args, **kwargs)
+            started = time.perf_counter()
+            try:
+                token = get_token_auth_header()
+                verified = verify_token(token)
+                check_permission_mask(verified.permissions, required, required_any)
+            finally:
+                record_auth_time(time.perf_counter() - started)
+            return f(verified.payload, *args, **kwargs)
 
         return wrapper
-    return requires_auth_decorator
\ No newline at end of file
+    return requires_auth_decorator
@@ -0,0 +1,417 @@
+"""
+JWKS key cache for Coffee Shop API.
+
+This module keeps the issuer's JSON Web Key Set in memory so that verifying a
+token does not cost an HTTPS round-trip to Auth0. Keys are stored by key id
+(`kid`) already parsed into public-key objects, refreshed after a configurable
+TTL, refreshed once on an unknown `kid`, and served stale when the issuer
+cannot be reached.
+
+The key set is read from a pluggable source:
+    URLJWKSSource: fetches `/.well-known/jwks.json` over HTTP(S)
+    AsyncURLJWKSSource: the same with a non-blocking client (httpx)
+    FileJWKSSource: reads a JWKS document from a local file
+    StaticJWKSSource: serves an in-memory JWKS document
+
+Symmetric ('oct') keys are secrets, which a published key set must never
+hold: they are ignored unless the source was built with allow_symmetric,
+which only local files and in-memory key sets accept, for the HS256
+tokens of the local issuer used in testing.
+
+AsyncJWKSCache is the asyncio counterpart of JWKSCache, for the async API.
+"""
+
+import asyncio
+import inspect
+import json
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+from jose import jwk
+
+
+# Default signing algorithm per key type, used when a key has no 'alg' member
+# ('oct' keys are only read from sources that allow symmetric keys)
+DEFAULT_KEY_ALGORITHMS = {
+    'RSA': 'RS256',
+    'oct': 'HS256',
+}
+
+# Default signing algorithm per elliptic curve
+DEFAULT_CURVE_ALGORITHMS = {
+    'P-256': 'ES256',
+    'P-384': 'ES384',
+    'P-521': 'ES512',
+}
+
+
+class JWKSUnavailableError(Exception):
+    """Raised when no key set could be fetched and none is cached."""
+
+
+class URLJWKSSource:
+    """
+    Fetch a JWKS document over HTTP(S).
+
+    Remote key sets are never trusted with symmetric keys.
+
+    Args:
+        url: Location of the JWKS document
+        timeout: Socket timeout in seconds
+    """
+
+    allow_symmetric = False
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self):
+        """Return the decoded JWKS document."""
+        with urlopen(self.url, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def __repr__(self):
+        return f'URLJWKSSource({self.url!r})'
+
+
+class AsyncURLJWKSSource:
+    """
+    Fetch a JWKS document over HTTP(S) without blocking the event loop.
+
+    Requires httpx (see the async dependencies in requirements.txt).
+
+    Args:
+        url: Location of the JWKS document
+        timeout: Request timeout in seconds
+    """
+
+    allow_symmetric = False
+
+    def __init__(self, url, timeout=5.0):
+        import httpx
+
+        self.url = url
+        self.timeout = timeout
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def fetch(self):
+        """Return the decoded JWKS document."""
+        response = await self._client.get(self.url)
+        response.raise_for_status()
+        return response.json()
+
+    def __repr__(self):
+        return f'AsyncURLJWKSSource({self.url!r})'
+
+
+class FileJWKSSource:
+    """
+    Read a JWKS document from a local file.
+
+    Args:
+        path: Path to the JSON file
+        allow_symmetric: Accept 'oct' (HS256) keys, for a local issuer's
+                         key set only
+    """
+
+    def __init__(self, path, allow_symmetric=False):
+        self.path = path
+        self.allow_symmetric = allow_symmetric
+
+    def fetch(self):
+        """Return the decoded JWKS document."""
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def __repr__(self):
+        return f'FileJWKSSource({self.path!r})'
+
+
+class StaticJWKSSource:
+    """
+    Serve an in-memory JWKS document.
+
+    Args:
+        jwks: Decoded JWKS document ({'keys': [...]})
+        allow_symmetric: Accept 'oct' (HS256) keys, for a local issuer's
+                         key set only
+    """
+
+    def __init__(self, jwks, allow_symmetric=False):
+        self.jwks = jwks
+        self.allow_symmetric = allow_symmetric
+
+    def fetch(self):
+        """Return the JWKS document."""
+        return self.jwks
+
+    def __repr__(self):
+        return f'StaticJWKSSource({len(self.jwks.get("keys", []))} keys)'
+
+
+def source_from_url(url, timeout=5.0, allow_symmetric=False):
+    """
+    Build a JWKS source from a URL.
+
+    Args:
+        url: 'https://...' or 'http://...' for a remote key set,
+             'file://...' or a plain path for a local file
+        timeout: Socket timeout in seconds for remote sources
+        allow_symmetric: Accept 'oct' keys from a local file; ignored for
+                         remote key sets
+
+    Returns:
+        A JWKS source object with a fetch() method
+    """
+    scheme = urlparse(url).scheme
+    if scheme in ('http', 'https'):
+        return URLJWKSSource(url, timeout=timeout)
+    if scheme == 'file':
+        return FileJWKSSource(urlparse(url).path, allow_symmetric=allow_symmetric)
+    return FileJWKSSource(url, allow_symmetric=allow_symmetric)
+
+
+def async_source_from_url(url, timeout=5.0, allow_symmetric=False):
+    """
+    Build a JWKS source for AsyncJWKSCache from a URL.
+
+    Remote key sets are fetched with AsyncURLJWKSSource; local files are
+    small and read directly, as with source_from_url().
+    """
+    if urlparse(url).scheme in ('http', 'https'):
+        return AsyncURLJWKSSource(url, timeout=timeout)
+    return source_from_url(url, timeout=timeout, allow_symmetric=allow_symmetric)
+
+
+def parse_jwks(jwks, allow_symmetric=False):
+    """
+    Parse a JWKS document into public-key objects.
+
+    Keys without a 'kid', keys not meant for signatures, symmetric keys
+    unless allowed and keys that cannot be constructed are skipped.
+
+    Args:
+        jwks: Decoded JWKS document ({'keys': [...]})
+        allow_symmetric: Accept 'oct' keys, which only a local issuer's
+                         key set may hold
+
+    Returns:
+        dict: kid -> jose key object
+    """
+    keys = {}
+    for key_data in jwks.get('keys', []):
+        kid = key_data.get('kid')
+        if not kid or key_data.get('use', 'sig') != 'sig':
+            continue
+        if key_data.get('kty') == 'oct' and not allow_symmetric:
+            continue
+
+        algorithm = key_data.get('alg')
+        if algorithm is None:
+            if key_data.get('kty') == 'EC':
+                algorithm = DEFAULT_CURVE_ALGORITHMS.get(key_data.get('crv'))
+            else:
+                algorithm = DEFAULT_KEY_ALGORITHMS.get(key_data.get('kty'))
+
+        try:
+            keys[kid] = jwk.construct(key_data, algorithm)
+        except Exception:
+            continue
+    return keys
+
+
+def _allows_symmetric(source):
+    """Return whether `source` may supply 'oct' keys; custom sources may not."""
+    return getattr(source, 'allow_symmetric', False) is True
+
+
+class JWKSCache:
+    """
+    Thread-safe cache of parsed signing keys keyed by `kid`.
+
+    Args:
+        source: Object with a fetch() method returning a JWKS document
+        ttl: Seconds a fetched key set is considered fresh
+        miss_refresh_interval: Minimum seconds between refreshes triggered
+            by an unknown `kid`, so tokens with random key ids cannot
+            force a fetch per request
+
+    Example:
+        cache = JWKSCache(URLJWKSSource('https://tenant.auth0.com/.well-known/jwks.json'))
+        key = cache.get_key(unverified_header['kid'])
+    """
+
+    def __init__(self, source, ttl=600, miss_refresh_interval=30):
+        self.source = source
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+
+        self._keys = {}
+        self._fetched_at = None
+        self._last_attempt = None
+        self._last_error = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self.fetches = 0
+        self.fetch_errors = 0
+
+    def set_source(self, source):
+        """Swap the key source and drop every cached key."""
+        with self._lock:
+            self.source = source
+            self._keys = {}
+            self._fetched_at = None
+            self._last_attempt = None
+            self._last_error = None
+            self._generation += 1
+
+    def get_key(self, kid):
+        """
+        Return the parsed key for `kid`.
+
+        Refreshes the key set when it is past its TTL or when `kid` is
+        unknown. If the refresh fails, previously fetched keys are served.
+
+        Args:
+            kid: Key id from the token header
+
+        Returns:
+            jose key object, or None if the issuer does not publish `kid`
+
+        Raises:
+            JWKSUnavailableError: the key set has never been fetched and
+                the source cannot be reached
+        """
+        now = time.monotonic()
+        fetched_at = self._fetched_at
+
+        if fetched_at is not None and now - fetched_at < self.ttl:
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+
+        # Stale key set or unknown kid: refresh, unless a fetch was attempted
+        # moments ago (tokens with random key ids must not force a fetch each)
+        self.refresh(min_interval=self.miss_refresh_interval)
+
+        if self._fetched_at is None:
+            raise JWKSUnavailableError(f'Unable to fetch JWKS from {self.source!r}')
+        return self._keys.get(kid)
+
+    def refresh(self, min_interval=0):
+        """
+        Fetch and parse the key set.
+
+        Concurrent callers are collapsed into a single fetch: threads that
+        waited on the lock while another thread fetched reuse its result.
+        On failure the previously fetched keys are kept.
+
+        Args:
+            min_interval: Skip the fetch if one was attempted less than
+                this many seconds ago
+
+        Returns:
+            bool: True if the key set was fetched by this or a concurrent call
+        """
+        generation = self._generation
+        with self._lock:
+            now = time.monotonic()
+            if self._generation != generation or (
+                self._last_attempt is not None
+                and now - self._last_attempt < min_interval
+            ):
+                return self._last_error is None
+
+            self._last_attempt = now
+            self._generation += 1
+            try:
+                self.fetches += 1
+                keys = parse_jwks(self.source.fetch(), _allows_symmetric(self.source))
+            except Exception as e:
+                self.fetch_errors += 1
+                self._last_error = e
+                return False
+
+            self._keys = keys
+            self._fetched_at = self._last_attempt
+            self._last_error = None
+            return True
+
+
+class AsyncJWKSCache(JWKSCache):
+    """
+    JWKSCache for asyncio applications.
+
+    get_key() and refresh() are coroutines. A refresh awaits the source
+    instead of blocking, and concurrent refreshes are collapsed into a
+    single fetch by an asyncio lock, so a cold start with thousands of
+    waiting requests fetches the key set once. Sources may have a plain
+    or a coroutine fetch() method.
+
+    Example:
+        cache = AsyncJWKSCache(AsyncURLJWKSSource('https://tenant.auth0.com/.well-known/jwks.json'))
+        key = await cache.get_key(kid)
+    """
+
+    def __init__(self, source, ttl=600, miss_refresh_interval=30):
+        super().__init__(source, ttl=ttl, miss_refresh_interval=miss_refresh_interval)
+        self._async_lock = asyncio.Lock()
+
+    async def get_key(self, kid):
+        """
+        Return the parsed key for `kid`, see JWKSCache.get_key().
+
+        Raises:
+            JWKSUnavailableError: the key set has never been fetched and
+                the source cannot be reached
+        """
+        fetched_at = self._fetched_at
+        if fetched_at is not None and time.monotonic() - fetched_at < self.ttl:
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+
+        await self.refresh(min_interval=self.miss_refresh_interval)
+
+        if self._fetched_at is None:
+            raise JWKSUnavailableError(f'Unable to fetch JWKS from {self.source!r}')
+        return self._keys.get(kid)
+
+    async def refresh(self, min_interval=0):
+        """
+        Fetch and parse the key set, see JWKSCache.refresh().
+
+        Returns:
+            bool: True if the key set was fetched by this or a concurrent call
+        """
+        generation = self._generation
+        async with self._async_lock:
+            now = time.monotonic()
+            if self._generation != generation or (
+                self._last_attempt is not None
+                and now - self._last_attempt < min_interval
+            ):
+                return self._last_error is None
+
+            self._last_attempt = now
+            self._generation += 1
+            try:
+                self.fetches += 1
+                jwks = self.source.fetch()
+                if inspect.isawaitable(jwks):
+                    jwks = await jwks
+                keys = parse_jwks(jwks, _allows_symmetric(self.source))
+            except Exception as e:
+                self.fetch_errors += 1
+                self._last_error = e
+                return False
+
+            self._keys = keys
+            self._fetched_at = self._last_attempt
+            self._last_error = None
+            return True
@@ -0,0 +1,354 @@
+"""
+Local token issuer for Coffee Shop API.
+
+This module mints access tokens shaped like Auth0's (issuer, audience,
+permissions claim) with a locally generated key, and publishes the matching
+JWKS document. Pointing `verify_decode_jwt` at that JWKS lets benchmarks and
+soak tests exercise `requires_auth` with real signature verification and no
+Auth0 tenant.
+
+Roles and their permissions are read from `auth0_users_template.json`, so
+minted Barista and Manager tokens match the roles provisioned by
+`setup_auth0.py`.
+
+Supported algorithms:
+    ES256: ECDSA P-256 (default, small and fast to sign)
+    RS256: RSA 2048, the algorithm Auth0 uses
+    HS256: shared secret; the JWKS then exposes the secret, testing only.
+           The API reads it from a local key file (AUTH0_JWKS_URL=<path>)
+           or jwks_source(), never over HTTP
+
+Usage:
+    # Create a key and write the JWKS document
+    python -m src.auth.local_issuer jwks --out local_jwks.json
+
+    # Mint 1000 Barista tokens with distinct subjects, one per line
+    python -m src.auth.local_issuer token --role Barista --count 1000
+
+    # Serve the JWKS at http://127.0.0.1:8765/.well-known/jwks.json
+    python -m src.auth.local_issuer serve --port 8765
+
+    # Run the API against it
+    export AUTH0_ALGORITHM=ES256
+    export AUTH0_JWKS_URL=local_jwks.json
+
+Tokens are issued for AUTH0_DOMAIN and AUTH0_API_AUDIENCE, the same
+settings `verify_decode_jwt` validates against.
+"""
+
+import argparse
+import base64
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk, jwt
+
+from .auth import API_AUDIENCE, AUTH0_DOMAIN
+from .jwks import StaticJWKSSource
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_ROLES_FILE = os.path.join(BACKEND_DIR, 'auth0_users_template.json')
+DEFAULT_KEY_FILE = os.path.join(BACKEND_DIR, 'local_issuer_key.json')
+
+SUPPORTED_ALGORITHMS = ('ES256', 'RS256', 'HS256')
+
+
+def load_roles(path=DEFAULT_ROLES_FILE):
+    """
+    Read role permissions from an Auth0 users template.
+
+    Args:
+        path: Path to a JSON file in the auth0_users_template.json format
+
+    Returns:
+        dict: role name -> list of permission strings
+    """
+    with open(path, 'r') as f:
+        config = json.load(f)
+    return {
+        role['name']: list(role.get('permissions', []))
+        for role in config.get('roles', [])
+    }
+
+
+def _generate_key_material(algorithm):
+    """Return new private key material for `algorithm` as a string."""
+    if algorithm == 'HS256':
+        return base64.urlsafe_b64encode(secrets.token_bytes(32)).decode('ascii')
+
+    if algorithm == 'ES256':
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ).decode('ascii')
+
+
+class LocalIssuer:
+    """
+    Mint Auth0-shaped access tokens signed with a local key.
+
+    Args:
+        algorithm: 'ES256', 'RS256' or 'HS256'
+        key: PEM private key (ES256/RS256) or base64url secret (HS256);
+             generated if omitted
+        kid: Key id placed in token headers and the JWKS
+        domain: Auth0 domain used for the issuer claim
+        audience: API audience claim
+        roles: role name -> permissions; read from auth0_users_template.json
+               if omitted
+
+    Example:
+        issuer = LocalIssuer('ES256')
+        jwks_cache.set_source(issuer.jwks_source())
+        token = issuer.mint_role('Manager')
+    """
+
+    def __init__(self, algorithm='ES256', key=None, kid=None,
+                 domain=AUTH0_DOMAIN, audience=API_AUDIENCE, roles=None):
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f'Unsupported algorithm: {algorithm}')
+
+        self.algorithm = algorithm
+        self.key = key or _generate_key_material(algorithm)
+        self.kid = kid or f'local-{secrets.token_hex(8)}'
+        self.issuer = f'https://{domain}/'
+        self.audience = audience
+        self.roles = roles if roles is not None else load_roles()
+
+        if algorithm == 'HS256':
+            self._signing_key = base64.urlsafe_b64decode(self.key.encode('ascii'))
+        else:
+            self._signing_key = self.key
+
+    @classmethod
+    def load(cls, path=DEFAULT_KEY_FILE, algorithm='ES256', **kwargs):
+        """
+        Load an issuer key from `path`, creating the file if needed.
+
+        Reusing the key file keeps tokens minted by separate runs valid
+        against the same JWKS document.
+
+        Args:
+            path: Path to the issuer key file
+            algorithm: Algorithm for a newly created key
+            **kwargs: Passed to LocalIssuer()
+
+        Returns:
+            LocalIssuer
+        """
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                stored = json.load(f)
+            return cls(stored['algorithm'], key=stored['key'], kid=stored['kid'], **kwargs)
+
+        issuer = cls(algorithm, **kwargs)
+        issuer.save(path)
+        return issuer
+
+    def save(self, path=DEFAULT_KEY_FILE):
+        """Write the issuer key to `path`, readable by the owner only."""
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'algorithm': self.algorithm, 'kid': self.kid, 'key': self.key}, f, indent=2)
+
+    def jwks(self):
+        """
+        Return the JWKS document verifying this issuer's tokens.
+
+        Returns:
+            dict: {'keys': [jwk]}
+        """
+        key = jwk.construct(self._signing_key, self.algorithm)
+        if self.algorithm != 'HS256':
+            key = key.public_key()
+
+        key_data = key.to_dict()
+        if isinstance(key_data.get('k'), bytes):
+            key_data['k'] = key_data['k'].decode('ascii')
+        key_data.update({'kid': self.kid, 'use': 'sig', 'alg': self.algorithm})
+        return {'keys': [key_data]}
+
+    def jwks_source(self):
+        """
+        Return a StaticJWKSSource of jwks(), accepting the HS256 secret.
+
+        Returns:
+            StaticJWKSSource
+        """
+        return StaticJWKSSource(self.jwks(), allow_symmetric=self.algorithm == 'HS256')
+
+    def mint(self, permissions, subject='auth0|local-user', ttl=3600, claims=None):
+        """
+        Mint a signed access token.
+
+        Args:
+            permissions: List of permission strings for the permissions claim
+            subject: Value of the sub claim
+            ttl: Seconds until the token expires
+            claims: Extra claims to merge into the payload
+
+        Returns:
+            str: The encoded token
+        """
+        now = int(time.time())
+        payload = {
+            'iss': self.issuer,
+            'sub': subject,
+            'aud': self.audience,
+            'iat': now,
+            'exp': now + ttl,
+            'permissions': list(permissions),
+        }
+        if claims:
+            payload.update(claims)
+        return jwt.encode(payload, self._signing_key, algorithm=self.algorithm,
+                          headers={'kid': self.kid})
+
+    def mint_role(self, role, subject=None, ttl=3600):
+        """
+        Mint a token carrying the permissions of `role`.
+
+        Args:
+            role: Role name from the roles config (e.g. 'Barista')
+            subject: Value of the sub claim (default: derived from the role)
+            ttl: Seconds until the token expires
+
+        Returns:
+            str: The encoded token
+        """
+        if role not in self.roles:
+            raise KeyError(f'Unknown role: {role}')
+        subject = subject or f'auth0|local-{role.lower()}'
+        return self.mint(self.roles[role], subject=subject, ttl=ttl)
+
+    def mint_many(self, role, count, ttl=3600):
+        """
+        Mint `count` tokens for `role`, each with a distinct subject.
+
+        Args:
+            role: Role name from the roles config
+            count: Number of tokens
+            ttl: Seconds until the tokens expire
+
+        Returns:
+            list: Encoded tokens
+        """
+        prefix = f'auth0|local-{role.lower()}'
+        return [self.mint_role(role, subject=f'{prefix}-{n}', ttl=ttl) for n in range(count)]
+
+
+class _JWKSHandler(BaseHTTPRequestHandler):
+    """Serve the issuer's JWKS document at /.well-known/jwks.json."""
+
+    body = b'{}'
+
+    def do_GET(self):
+        if self.path != '/.well-known/jwks.json':
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_jwks(issuer, host='127.0.0.1', port=8765, background=True):
+    """
+    Serve the issuer's JWKS document over HTTP.
+
+    Args:
+        issuer: LocalIssuer whose keys are published
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        background: Serve from a daemon thread and return immediately
+
+    Returns:
+        ThreadingHTTPServer: The running server; its JWKS URL is
+        f'http://{host}:{server.server_port}/.well-known/jwks.json'
+    """
+    handler = type('JWKSHandler', (_JWKSHandler,), {
+        'body': json.dumps(issuer.jwks()).encode('utf-8')
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mint local Auth0-shaped tokens for testing')
+    parser.add_argument('--key-file', default=DEFAULT_KEY_FILE,
+                        help='Issuer key file, created on first use')
+    parser.add_argument('--algorithm', default='ES256', choices=SUPPORTED_ALGORITHMS,
+                        help='Signing algorithm for a newly created key')
+    parser.add_argument('--roles', default=DEFAULT_ROLES_FILE,
+                        help='Path to JSON file with role permissions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    jwks_parser = subparsers.add_parser('jwks', help='Write the JWKS document')
+    jwks_parser.add_argument('--out', help='Output file (default: stdout)')
+
+    token_parser = subparsers.add_parser('token', help='Mint tokens, one per line')
+    token_parser.add_argument('--role', required=True, help='Role name (e.g. Barista)')
+    token_parser.add_argument('--count', type=int, default=1,
+                              help='Number of tokens, each with a distinct subject')
+    token_parser.add_argument('--ttl', type=int, default=3600, help='Token lifetime in seconds')
+
+    serve_parser = subparsers.add_parser('serve', help='Serve the JWKS document over HTTP')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+
+    args = parser.parse_args()
+    issuer = LocalIssuer.load(args.key_file, algorithm=args.algorithm,
+                              roles=load_roles(args.roles))
+
+    if args.command == 'jwks':
+        document = json.dumps(issuer.jwks(), indent=2)
+        if args.out:
+            with open(args.out, 'w') as f:
+                f.write(document)
+            print(f"✓ JWKS written to {args.out} (kid: {issuer.kid}, alg: {issuer.algorithm})",
+                  file=sys.stderr)
+        else:
+            print(document)
+
+    elif args.command == 'token':
+        if args.count == 1:
+            print(issuer.mint_role(args.role, ttl=args.ttl))
+        else:
+            for token in issuer.mint_many(args.role, args.count, ttl=args.ttl):
+                print(token)
+
+    elif args.command == 'serve':
+        print(f"Serving JWKS on http://{args.host}:{args.port}/.well-known/jwks.json",
+              file=sys.stderr)
+        print("Press Ctrl+C to stop", file=sys.stderr)
+        try:
+            serve_jwks(issuer, args.host, args.port, background=False)
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
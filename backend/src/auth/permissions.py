@@ -0,0 +1,103 @@
+"""
+Permission registry for Coffee Shop API.
+
+This module maps permission strings (e.g. 'post:drinks') to bits so that an
+authorization check is a single integer AND instead of a scan of the
+token's `permissions` list. Endpoints resolve their required permissions to
+a mask once, when the decorator is applied, and each verified token carries
+the mask of the permissions it grants.
+"""
+
+import threading
+
+
+# Permissions defined on the Coffee Shop API in Auth0
+DEFAULT_PERMISSIONS = (
+    'get:drinks',
+    'get:drinks-detail',
+    'post:drinks',
+    'patch:drinks',
+    'delete:drinks',
+    'get:profiles',
+)
+
+
+class PermissionRegistry:
+    """
+    Assign a bit to every known permission string.
+
+    Bits are never reassigned, so a mask computed once stays valid for the
+    life of the process. Unknown permissions found in a token are
+    registered as well, which keeps cached masks correct when an endpoint
+    registers a new permission later.
+
+    Args:
+        permissions: Permission strings to register up front
+
+    Example:
+        required = registry.mask(['post:drinks'])
+        granted = registry.mask(payload['permissions'])
+        allowed = registry.has_all(granted, required)
+    """
+
+    def __init__(self, permissions=()):
+        self._bits = {}
+        self._lock = threading.Lock()
+        for permission in permissions:
+            self.bit(permission)
+
+    def bit(self, permission):
+        """
+        Return the bit for `permission`, registering it if needed.
+
+        Args:
+            permission: string permission (i.e. 'post:drinks')
+
+        Returns:
+            int: A power of two unique to this permission
+        """
+        bit = self._bits.get(permission)
+        if bit is not None:
+            return bit
+
+        with self._lock:
+            bit = self._bits.get(permission)
+            if bit is None:
+                bit = 1 << len(self._bits)
+                self._bits[permission] = bit
+            return bit
+
+    def mask(self, permissions):
+        """
+        Return the combined bits of `permissions`.
+
+        Args:
+            permissions: Iterable of permission strings
+
+        Returns:
+            int: Bitwise OR of every permission's bit
+        """
+        mask = 0
+        for permission in permissions:
+            mask |= self.bit(permission)
+        return mask
+
+    def names(self, mask):
+        """Return the permission strings set in `mask`."""
+        return [permission for permission, bit in self._bits.items() if mask & bit]
+
+    @staticmethod
+    def has_all(granted, required):
+        """Return True if `granted` contains every bit of `required`."""
+        return granted & required == required
+
+    @staticmethod
+    def has_any(granted, required):
+        """Return True if `granted` contains at least one bit of `required`."""
+        return bool(granted & required)
+
+    def __contains__(self, permission):
+        return permission in self._bits
+
+    def __len__(self):
+        return len(self._bits)
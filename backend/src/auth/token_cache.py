@@ -0,0 +1,123 @@
+"""
+Verified token cache for Coffee Shop API.
+
+This module remembers the payload of tokens that already passed signature
+and claim validation, so a client repeating the same bearer token only pays
+the RS256 verification cost once. Entries are keyed by a SHA-256 digest of
+the token, expire at the token's own `exp` claim and are evicted in
+least-recently-used order once the cache is full.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified tokens.
+
+    Args:
+        max_entries: Maximum number of cached tokens; 0 disables the cache
+        clock: Function returning the current Unix time (for testing)
+
+    Example:
+        verified = token_cache.get(token)
+        if verified is None:
+            payload = jwt.decode(token, ...)
+            verified = VerifiedToken(payload, registry.mask(payload['permissions']))
+            token_cache.put(token, verified, payload['exp'])
+    """
+
+    def __init__(self, max_entries=1024, clock=time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+
+        # digest -> (exp, value)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token):
+        """Return the cache key for a raw token."""
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        """
+        Return the cached value for `token`.
+
+        Args:
+            token: a json web token (string)
+
+        Returns:
+            The value stored by put(), or None if the token is not cached
+            or has expired
+        """
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token, value, exp):
+        """
+        Cache a verified token until its `exp` claim.
+
+        Tokens without a numeric `exp` claim are not cached.
+
+        Args:
+            token: a json web token (string)
+            value: what get() should return for this token
+            exp: the token's `exp` claim (Unix time)
+        """
+        if self.max_entries <= 0:
+            return
+
+        if not isinstance(exp, (int, float)) or exp <= self.clock():
+            return
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (exp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every cached token and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Return cache counters.
+
+        Returns:
+            dict: size, max_entries, hits and misses
+        """
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def __len__(self):
+        return len(self._entries)
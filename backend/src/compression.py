@@ -0,0 +1,161 @@
+"""
+HTTP response compression for Coffee Shop API.
+
+Responses are compressed with brotli or gzip, whichever the client's
+Accept-Encoding prefers; brotli is used only when the brotli package is
+installed. Bodies smaller than COMPRESSION_MIN_SIZE bytes, error and
+other non-2xx responses, and responses that are not JSON or text are sent
+as they are.
+
+The menu snapshot bodies are not compressed per request: each snapshot
+keeps a CompressedBody per listing, which compresses the body at most
+once per encoding for that menu version, at a higher level than per
+request compression can afford. Every other response (paginated
+listings, bulk results, ...) is compressed by an after_request hook.
+
+Environment Variables Optional:
+    COMPRESSION_ENABLED: Set to 'false' to send every response uncompressed (default: 'true')
+    COMPRESSION_MIN_SIZE: Smallest body in bytes worth compressing (default: 1024)
+"""
+
+import gzip
+import os
+import threading
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+
+# Content codings offered, most preferred first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Levels for bodies compressed on every request, and for the menu bodies
+# compressed once per menu version. Brotli quality 11 is left out: on a
+# large menu it takes seconds for a body no smaller than quality 9's.
+LEVELS = {'br': 4, 'gzip': 6}
+PRECOMPRESSED_LEVELS = {'br': 9, 'gzip': 9}
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/')
+
+
+def compress(body, encoding, level):
+    """
+    Compress a body with a content coding.
+
+    Args:
+        body: Bytes to compress
+        encoding: 'br' or 'gzip'
+        level: Brotli quality or gzip compression level
+
+    Returns:
+        bytes: The compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    # mtime=0 keeps the output, and so any entity tag, reproducible
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def varies(body):
+    """Return True if a response with `body` depends on Accept-Encoding."""
+    return COMPRESSION_ENABLED and len(body) >= COMPRESSION_MIN_SIZE
+
+
+def negotiate(body):
+    """
+    Pick the content coding for a response body to the current request.
+
+    Returns:
+        str: 'br' or 'gzip', or None to send the body uncompressed
+    """
+    if not varies(body):
+        return None
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+class CompressedBody:
+    """
+    An encoded response body and its compressed copies.
+
+    Each copy is made on first use and kept, so a body is compressed at
+    most once per content coding however many requests ask for it.
+
+    Args:
+        body: Encoded response body
+    """
+
+    def __init__(self, body):
+        self.body = body
+        self._copies = {}
+        self._lock = threading.Lock()
+
+    def get(self, encoding):
+        """Return the body compressed with `encoding` ('br' or 'gzip')."""
+        copy = self._copies.get(encoding)
+        if copy is None:
+            with self._lock:
+                copy = self._copies.get(encoding)
+                if copy is None:
+                    copy = compress(self.body, encoding, PRECOMPRESSED_LEVELS[encoding])
+                    self._copies[encoding] = copy
+        return copy
+
+
+def compressible(response):
+    """Return True if `response` is a complete 2xx JSON or text response."""
+    return (
+        200 <= response.status_code < 300
+        and response.status_code != 204
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Content-Encoding' not in response.headers
+        and response.mimetype.startswith(COMPRESSIBLE_MIMETYPES)
+    )
+
+
+def compress_response(response):
+    """
+    after_request hook compressing a response the client accepts compressed.
+
+    Responses carrying an ETag are left alone: their tag names the body
+    as sent, so they are compressed, if at all, where the tag is set (see
+    conditional_body_response in api.py).
+
+    Args:
+        response: Response about to be sent
+
+    Returns:
+        The response, compressed if negotiated
+    """
+    if not compressible(response) or 'ETag' in response.headers:
+        return response
+
+    body = response.get_data()
+    if not varies(body):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is not None:
+        response.set_data(compress(body, encoding, LEVELS[encoding]))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def setup_compression(app, enabled=COMPRESSION_ENABLED):
+    """
+    Compress the responses of `app` unless COMPRESSION_ENABLED is false.
+
+    Args:
+        app: Flask application instance
+        enabled: False leaves the application untouched
+    """
+    if enabled:
+        app.after_request(compress_response)
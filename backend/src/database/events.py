@@ -0,0 +1,216 @@
+"""
+Menu change events for Coffee Shop API.
+
+Every committed drink write publishes one event per drink to the
+process's MenuEvents: its action ('created', 'updated' or 'deleted'),
+the drink id and the persisted menu version of the write (see
+MenuVersion in models.py), which a client can pass to
+GET /drinks/changes?since=<version>. Listeners, such as
+the GET /drinks/stream endpoint of async_api.py, wait for events on their
+asyncio event loop, so thousands of idle listeners cost one asyncio.Event
+each rather than a thread.
+
+The newest MENU_EVENTS_BACKLOG events are kept, so a listener that
+reconnects with the id of the last event it received is sent only what
+it missed. Event ids are '<stream>-<sequence>', where the stream token is
+drawn at startup: an id from an earlier process, or one older than the
+backlog, cannot be resumed, and the listener is told to reload the menu.
+
+Events are published in process: the write methods publish their own
+writes as they commit. Writes made through other processes sharing the
+database are found by polling the persisted menu version (see
+poll_menu_version in async_api.py) and published here too, each as
+'updated' or 'deleted', since a poll cannot tell a creation from an
+update.
+"""
+
+import asyncio
+import os
+import secrets
+import threading
+from collections import deque, namedtuple
+from itertools import islice
+
+
+MENU_EVENTS_BACKLOG = int(os.environ.get('MENU_EVENTS_BACKLOG', '1000'))
+
+# One committed change to one drink
+#   sequence: position in this process's event stream, from 1
+#   action: 'created', 'updated' or 'deleted'; for the listener-only
+#           events of listen(), 'ready' or 'reset'
+#   drink_id: Id of the drink, None for 'ready' and 'reset'
+#   version: Persisted menu version of the write
+MenuEvent = namedtuple('MenuEvent', ['sequence', 'action', 'drink_id', 'version'])
+
+
+class MenuEvents:
+    """
+    Publish menu changes to asyncio listeners, keeping a bounded backlog.
+
+    publish() may be called from any thread; listen() runs on an event loop.
+
+    Args:
+        backlog: Number of recent events kept for resuming listeners
+
+    Example:
+        menu_events.publish('updated', [drink.id], version)
+
+        async for events in menu_events.listen(after, timeout=15):
+            ...
+    """
+
+    def __init__(self, backlog=MENU_EVENTS_BACKLOG):
+        self.stream = secrets.token_hex(4)
+
+        self._events = deque(maxlen=backlog)
+        self._sequence = 0
+        self._version = 0
+        self._listeners = set()
+        self._lock = threading.Lock()
+
+    @property
+    def sequence(self):
+        """Sequence number of the newest event, 0 before the first."""
+        return self._sequence
+
+    @property
+    def version(self):
+        """Menu version of the newest event."""
+        return self._version
+
+    @property
+    def listeners(self):
+        """Number of listeners currently waiting for events."""
+        return len(self._listeners)
+
+    def event_id(self, sequence):
+        """Return the event id of a sequence number, e.g. '9f3a1c2e-42'."""
+        return f'{self.stream}-{sequence}'
+
+    def parse_event_id(self, event_id):
+        """
+        Return the sequence number of an event id of this stream.
+
+        Returns:
+            int, or None if the id is malformed or from another stream
+        """
+        stream, _, sequence = (event_id or '').rpartition('-')
+        if stream != self.stream or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def publish(self, action, drink_ids, version):
+        """
+        Record a committed write and wake every listener.
+
+        Args:
+            action: 'created', 'updated' or 'deleted'
+            drink_ids: Ids of the drinks written
+            version: Persisted menu version of the write
+        """
+        with self._lock:
+            for drink_id in drink_ids:
+                self._sequence += 1
+                self._events.append(MenuEvent(self._sequence, action, drink_id, version))
+            self._version = max(self._version, version)
+            listeners = list(self._listeners)
+
+        for loop, wakeup in listeners:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # The listener's event loop has closed
+                self._discard((loop, wakeup))
+
+    def observe(self, version):
+        """
+        Raise the version reported by 'ready' and 'reset' events.
+
+        For versions learnt from the database, e.g. at startup or from
+        writes made by other processes.
+        """
+        with self._lock:
+            self._version = max(self._version, version)
+
+    def published(self, version):
+        """
+        Return the (drink id, version) pairs of the kept events newer than
+        menu version `version`.
+
+        Lets a poller of the persisted menu version skip the writes this
+        process has already published.
+        """
+        with self._lock:
+            return {(event.drink_id, event.version) for event in self._events
+                    if event.version > version}
+
+    def since(self, sequence):
+        """
+        Return the events published after `sequence`.
+
+        Returns:
+            list: MenuEvent, oldest first, or None if some of them are no
+                  longer in the backlog
+        """
+        with self._lock:
+            if sequence > self._sequence:
+                return None
+            oldest = self._events[0].sequence if self._events else self._sequence + 1
+            if sequence < oldest - 1:
+                return None
+            return list(islice(self._events, sequence - oldest + 1, None))
+
+    async def listen(self, after, timeout):
+        """
+        Yield the events published after sequence `after`, as they come.
+
+        Besides the published events, a listener receives a 'ready' event
+        first when it starts without a position (`after` None), and a
+        'reset' event when the events after `after` are no longer in the
+        backlog. Both carry the newest sequence and version, from which
+        listening continues; on 'reset' the listener should reload the menu.
+
+        Args:
+            after: Sequence number of the last event the listener has, or
+                   None to listen from now on
+            timeout: Seconds after which an empty batch is yielded if
+                     nothing was published, e.g. to send a keepalive
+
+        Yields:
+            list: MenuEvent, oldest first, or an empty list on timeout
+        """
+        listener = (asyncio.get_running_loop(), asyncio.Event())
+        wakeup = listener[1]
+        ready = None
+        with self._lock:
+            self._listeners.add(listener)
+            if after is None:
+                after = self._sequence
+                ready = MenuEvent(after, 'ready', None, self._version)
+
+        try:
+            if ready is not None:
+                yield [ready]
+            while True:
+                # Cleared before reading, so a publish in between still wakes us
+                wakeup.clear()
+                events = self.since(after)
+                if events is None:
+                    with self._lock:
+                        after = self._sequence
+                        reset = MenuEvent(after, 'reset', None, self._version)
+                    yield [reset]
+                elif events:
+                    after = events[-1].sequence
+                    yield events
+                else:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        yield []
+        finally:
+            self._discard(listener)
+
+    def _discard(self, listener):
+        with self._lock:
+            self._listeners.discard(listener)
@@ -0,0 +1,287 @@
+"""
+In-memory menu snapshot for Coffee Shop API.
+
+The public menu changes a few times a day but is read thousands of times a
+minute. This module keeps the GET /drinks and GET /drinks-detail response
+bodies pre-encoded, so a read neither queries the database nor runs the
+JSON encoder. The Drink write methods invalidate the snapshot after they
+commit and the next read rebuilds it once.
+
+Each snapshot also carries a strong ETag per body, derived from the menu
+version and a digest of the body, and the time the menu last changed, as
+persisted with the menu version, so clients polling the menu can be
+answered with 304 Not Modified by any worker,
+and a CompressedBody per body, so each menu version is compressed at most
+once per content coding rather than on every request.
+
+The snapshot is per process. Writes made by other processes sharing the
+database are noticed from the persisted menu version (see MenuVersion in
+models.py): at most once per MENU_VERSION_CHECK_INTERVAL seconds a read
+looks the version up, one primary key lookup, and rebuilds the snapshot
+if it has moved. Reads in between are served from memory without any
+I/O. MENU_SNAPSHOT_TTL additionally rebuilds a snapshot after that many
+seconds whatever the version.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+
+from ..compression import CompressedBody
+from ..encoding import dumps, long_drink, short_drink
+
+
+MENU_SNAPSHOT_TTL = float(os.environ.get('MENU_SNAPSHOT_TTL', '0'))
+MENU_VERSION_CHECK_INTERVAL = float(os.environ.get('MENU_VERSION_CHECK_INTERVAL', '1'))
+
+# Persisted menu version, as read by MenuVersion.state()
+#   version: version of the latest write, 0 for an untouched menu
+#   modified_at: Unix time of that write, None if it was not recorded
+MenuState = namedtuple('MenuState', ['version', 'modified_at'])
+
+# Encoded response bodies for one menu version
+#   version: value of the menu version counter the snapshot was built at
+#   menu_version: persisted menu version the drinks were loaded at, None
+#                 if the snapshot has no version loader
+#   short: body of GET /drinks
+#   long: body of GET /drinks-detail
+#   short_etag, long_etag: strong entity tags of the two bodies (unquoted)
+#   short_compressed, long_compressed: CompressedBody of the two bodies
+#   last_modified: Unix time the menu content last changed: the persisted
+#                  modified_at, or the last local invalidation without it
+#   built_at: time.monotonic() of the build
+Snapshot = namedtuple('Snapshot', [
+    'version', 'menu_version', 'short', 'long', 'short_etag', 'long_etag',
+    'short_compressed', 'long_compressed', 'last_modified', 'built_at'
+])
+
+
+def encode_drinks(drinks):
+    """
+    Encode a drinks listing the way Flask's jsonify does.
+
+    Args:
+        drinks: List of drinks from short_drink or long_drink
+
+    Returns:
+        bytes: '{"drinks": [...], "success": true}' followed by a newline
+    """
+    return dumps({'success': True, 'drinks': drinks})
+
+
+def encode_changes(version, drinks, deleted, long_form, full=False):
+    """
+    Encode a GET /drinks/changes body.
+
+    Args:
+        version: Current persisted menu version
+        drinks: Rows of the drinks created or updated, with id, title and
+                recipe attributes
+        deleted: Ids of the deleted drinks
+        long_form: True for the long form recipes of /drinks-detail
+        full: True if `drinks` is the whole menu, replacing the client's
+
+    Returns:
+        bytes: '{"deleted": [...], "drinks": [...], "full": false,
+               "success": true, "version": 42}' followed by a newline
+    """
+    view = long_drink if long_form else short_drink
+    return dumps({
+        'success': True,
+        'version': version,
+        'full': full,
+        'drinks': [view(drink.id, drink.title, drink.recipe) for drink in drinks],
+        'deleted': deleted,
+    })
+
+
+def body_etag(version, body):
+    """
+    Return a strong entity tag for an encoded body.
+
+    Snapshots with a version loader pass the persisted menu version, so
+    every worker process tags the same menu alike; the digest keeps tags
+    distinct when `version` is a process's own counter.
+
+    Args:
+        version: Persisted menu version, or the menu version counter
+        body: Encoded response body
+
+    Returns:
+        str: Unquoted entity tag, e.g. '3-5f1c0e9a2b7d4c61'
+    """
+    return f'{version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}'
+
+
+class MenuSnapshot:
+    """
+    Lazily built, atomically invalidated menu response bodies.
+
+    Args:
+        loader: Function returning every drink, ordered by id, as objects
+                with id, title and recipe attributes (e.g. the rows of
+                Drink.listing_rows()); called inside the application
+                context of the request that rebuilds
+        version_loader: Function returning the persisted MenuState
+                        (e.g. MenuVersion.state); a snapshot built at
+                        another version is rebuilt. None trusts local
+                        invalidations alone.
+        ttl: Seconds after which a snapshot is rebuilt even without a
+             write (0 keeps it until the menu changes)
+        check_interval: Seconds a snapshot is served without calling
+                        version_loader (0 calls it on every read)
+
+    Example:
+        menu_snapshot = MenuSnapshot(Drink.listing_rows, MenuVersion.state)
+        body = menu_snapshot.get().short
+    """
+
+    def __init__(self, loader, version_loader=None, ttl=MENU_SNAPSHOT_TTL,
+                 check_interval=MENU_VERSION_CHECK_INTERVAL):
+        self.loader = loader
+        self.version_loader = version_loader
+        self.ttl = ttl
+        self.check_interval = check_interval
+
+        self._snapshot = None
+        # time.monotonic() the snapshot's menu version was last confirmed
+        self._checked_at = 0.0
+        self._version = 0
+        self._modified_at = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        """Menu version counter, bumped by every invalidation."""
+        return self._version
+
+    def get(self):
+        """
+        Return the current snapshot, building it if needed.
+
+        Concurrent readers of an invalidated snapshot wait for a single
+        rebuild instead of each querying the database.
+
+        Returns:
+            Snapshot
+        """
+        snapshot = self.fresh()
+        if snapshot is not None:
+            return snapshot
+
+        state = self.version_loader() if self.version_loader is not None else None
+        snapshot = self.confirm(state)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            snapshot = self.fresh() or self.confirm(state)
+            if snapshot is None:
+                # The version is read before the drinks: a write committed
+                # in between only costs one more rebuild on the next read
+                snapshot = self._build(self.loader(), self._version, state)
+                self._snapshot = snapshot
+                self._checked_at = time.monotonic()
+            return snapshot
+
+    def fresh(self):
+        """
+        Return the current snapshot if it can be served without any I/O.
+
+        Returns:
+            Snapshot, or None if it must be rebuilt or its menu version is
+            due to be checked (see confirm())
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self._expired(snapshot):
+            return None
+        if self.version_loader is not None \
+                and time.monotonic() - self._checked_at >= self.check_interval:
+            return None
+        return snapshot
+
+    def confirm(self, state):
+        """
+        Return the current snapshot if it was built at the menu version of
+        `state`.
+
+        A match restarts the check interval.
+
+        Args:
+            state: MenuState just read, or None if the snapshot has no
+                   version loader
+
+        Returns:
+            Snapshot, or None if it must be rebuilt
+        """
+        menu_version = state.version if state is not None else None
+        snapshot = self._snapshot
+        if snapshot is None or self._expired(snapshot) or snapshot.menu_version != menu_version:
+            return None
+        self._checked_at = time.monotonic()
+        return snapshot
+
+    def store(self, drinks, version, state=None):
+        """
+        Build a snapshot from drinks loaded by the caller.
+
+        For callers that cannot run the loader under the lock, such as the
+        async API, which loads the drinks with an async session. The
+        snapshot is kept unless the menu was invalidated while loading.
+
+        Args:
+            drinks: Every drink, as for the loader, loaded after reading
+                    `version`
+            version: Value of the version property before loading
+            state: Persisted MenuState, read before loading
+
+        Returns:
+            Snapshot
+        """
+        with self._lock:
+            snapshot = self._build(drinks, version, state)
+            if version == self._version:
+                self._snapshot = snapshot
+                self._checked_at = time.monotonic()
+            return snapshot
+
+    def invalidate(self):
+        """
+        Drop the snapshot and bump the menu version.
+
+        Called after a write commits. Waits for an in-flight rebuild, so a
+        snapshot read before the commit can never replace a newer one.
+        """
+        with self._lock:
+            self._version += 1
+            self._modified_at = time.time()
+            self._snapshot = None
+
+    def _expired(self, snapshot):
+        return self.ttl > 0 and time.monotonic() - snapshot.built_at >= self.ttl
+
+    def _build(self, drinks, version, state=None):
+        short = encode_drinks([short_drink(drink.id, drink.title, drink.recipe) for drink in drinks])
+        long = encode_drinks([long_drink(drink.id, drink.title, drink.recipe) for drink in drinks])
+
+        menu_version = state.version if state is not None else None
+        tag_version = menu_version if menu_version is not None else version
+        if state is not None and state.modified_at is not None:
+            last_modified = state.modified_at
+        else:
+            last_modified = self._modified_at
+
+        return Snapshot(
+            version=version,
+            menu_version=menu_version,
+            short=short,
+            long=long,
+            short_etag=body_etag(tag_version, short),
+            long_etag=body_etag(tag_version, long),
+            short_compressed=CompressedBody(short),
+            long_compressed=CompressedBody(long),
+            last_modified=last_modified,
+            built_at=time.monotonic()
+        )
@@ -0,0 +1,108 @@
+"""
+Typed drink views for Coffee Shop API responses.
+
+With msgspec as the JSON encoder, the drinks listings are built from
+these views instead of per-drink dicts: msgspec Structs are created faster
+than a dict, are untracked by the garbage collector, and are encoded
+natively. The orjson and standard library encoders would turn every view
+back into a dict, so with them the listings are built from the plain dicts
+of short_dict and long_dict; encoding.py picks the builders (see
+short_drink and long_drink there). Without msgspec the views are slotted
+dataclasses, which every encoder of encoding.py still accepts.
+
+Fields are declared in alphabetical order, so every encoder writes them
+in the key order of Flask's jsonify.
+"""
+
+from dataclasses import dataclass
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if msgspec is not None:
+    # gc=False: views hold only strings, numbers and recipe lists, never
+    # themselves, so they cannot form reference cycles
+    class IngredientView(msgspec.Struct, gc=False):
+        """An ingredient as shown on the public menu: its color and parts."""
+
+        color: str
+        parts: int
+
+    class DrinkView(msgspec.Struct, gc=False):
+        """
+        One drink of a listing.
+
+        Attributes:
+            id: Drink id
+            recipe: Short form, a list of IngredientView; long form, the
+                    recipe as stored (ingredient dicts with name, color and
+                    parts)
+            title: Drink title
+        """
+
+        id: int
+        recipe: list
+        title: str
+
+else:
+    @dataclass(slots=True)
+    class IngredientView:
+        """An ingredient as shown on the public menu: its color and parts."""
+
+        color: str
+        parts: int
+
+    @dataclass(slots=True)
+    class DrinkView:
+        """
+        One drink of a listing.
+
+        Attributes:
+            id: Drink id
+            recipe: Short form, a list of IngredientView; long form, the
+                    recipe as stored (ingredient dicts with name, color and
+                    parts)
+            title: Drink title
+        """
+
+        id: int
+        recipe: list
+        title: str
+
+
+def short_view(id, title, recipe):
+    """Return the short form view of a drink."""
+    return DrinkView(id, [IngredientView(r['color'], r['parts']) for r in recipe], title)
+
+
+def long_view(id, title, recipe):
+    """Return the long form view of a drink."""
+    return DrinkView(id, recipe, title)
+
+
+def short_dict(id, title, recipe):
+    """Return the short form of a drink as a dict."""
+    return {
+        'id': id,
+        'recipe': [{'color': r['color'], 'parts': r['parts']} for r in recipe],
+        'title': title,
+    }
+
+
+def long_dict(id, title, recipe):
+    """Return the long form of a drink as a dict."""
+    return {'id': id, 'recipe': recipe, 'title': title}
+
+
+def view_fields(view):
+    """
+    Return the fields of a view as a dict, one level deep.
+
+    Used by encoders that cannot write views natively.
+    """
+    if msgspec is not None and isinstance(view, msgspec.Struct):
+        return msgspec.structs.asdict(view)
+    return {name: getattr(view, name) for name in view.__slots__}
@@ -0,0 +1,158 @@
+"""
+Request instrumentation for Coffee Shop API.
+
+This module times every request through Flask before_request and
+after_request hooks and counts the database queries it runs through
+SQLAlchemy engine events. Per route, method and status code it records:
+
+    http_request_duration_seconds          whole request, hooks included
+    http_request_auth_duration_seconds     time inside requires_auth
+    http_request_handler_duration_seconds  the rest: view, database, encoding
+    http_request_db_queries                queries executed by the request
+    http_request_db_duration_seconds       time spent executing them
+
+and serves them, with any registered collectors, at GET /metrics in the
+Prometheus text format. Routes are labelled by their URL rule
+('/drinks/<int:drink_id>'), so the number of series stays bounded.
+
+Environment Variables Optional:
+    METRICS_ENABLED: Set to 'false' to skip instrumentation and /metrics (default: 'true')
+"""
+
+import os
+import time
+from contextvars import ContextVar
+
+from flask import current_app, request
+from sqlalchemy import event
+
+from .registry import QUERY_COUNT_BUCKETS, MetricsRegistry
+
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LABELS = ('method', 'route', 'status')
+
+registry = MetricsRegistry()
+
+request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time to handle a request.', LABELS)
+auth_duration = registry.histogram(
+    'http_request_auth_duration_seconds',
+    'Time a request spent in requires_auth (token and permission checks).', LABELS)
+handler_duration = registry.histogram(
+    'http_request_handler_duration_seconds',
+    'Time a request spent outside requires_auth (view, database, encoding).', LABELS)
+db_queries = registry.histogram(
+    'http_request_db_queries', 'Database queries executed by a request.', LABELS,
+    buckets=QUERY_COUNT_BUCKETS)
+db_duration = registry.histogram(
+    'http_request_db_duration_seconds', 'Time a request spent executing database queries.', LABELS)
+
+
+class RequestTimings:
+    """Counters of the request being handled."""
+
+    __slots__ = ('started', 'auth', 'queries', 'query_time', 'query_started')
+
+    def __init__(self, started):
+        self.started = started
+        self.auth = None
+        self.queries = 0
+        self.query_time = 0.0
+        self.query_started = None
+
+
+# Timings of the request handled in the current thread or task;
+# None outside requests (CLI commands, start-up)
+_current = ContextVar('request_timings', default=None)
+
+
+def record_auth_time(seconds):
+    """
+    Add time spent authenticating to the current request.
+
+    Called by requires_auth; does nothing outside an instrumented request.
+
+    Args:
+        seconds: Elapsed time in seconds
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.auth = (timings.auth or 0.0) + seconds
+
+
+def _before_request():
+    _current.set(RequestTimings(time.perf_counter()))
+
+
+def _after_request(response):
+    timings = _current.get()
+    if timings is None:
+        return response
+    _current.set(None)
+
+    elapsed = time.perf_counter() - timings.started
+    # Resolve the request proxy once; each proxied access costs microseconds
+    current = request._get_current_object()
+    rule = current.url_rule
+    labels = (current.method, rule.rule if rule is not None else '<unmatched>',
+              str(response.status_code))
+
+    request_duration.observe(labels, elapsed)
+    if timings.auth is not None:
+        auth_duration.observe(labels, timings.auth)
+    handler_duration.observe(labels, elapsed - (timings.auth or 0.0))
+    db_queries.observe(labels, timings.queries)
+    db_duration.observe(labels, timings.query_time)
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current.get()
+    if timings is not None:
+        timings.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current.get()
+    if timings is not None and timings.query_started is not None:
+        timings.queries += 1
+        timings.query_time += time.perf_counter() - timings.query_started
+        timings.query_started = None
+
+
+def metrics_response():
+    """
+    Render the registry as a Prometheus scrape response.
+
+    Returns:
+        Response with the text exposition format content type
+    """
+    return current_app.response_class(registry.render(), content_type=CONTENT_TYPE)
+
+
+def setup_metrics(app, engine, path='/metrics', enabled=METRICS_ENABLED):
+    """
+    Instrument a Flask application and expose its metrics.
+
+    Args:
+        app: Flask application instance
+        engine: SQLAlchemy engine whose queries are counted
+        path: URL of the Prometheus endpoint
+        enabled: False leaves the application untouched
+
+    Call it before registering other before_request hooks, so the
+    request duration covers them.
+    """
+    if not enabled:
+        return
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.add_url_rule(path, 'metrics', metrics_response, methods=['GET'])
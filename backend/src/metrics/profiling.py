@@ -0,0 +1,247 @@
+"""
+On-demand request profiling for Coffee Shop API.
+
+When PROFILING_ENABLED is set, selected requests run under cProfile and
+their profile is written to PROFILING_DIR, next to a small JSON file
+describing the request (route, status, duration). A request is profiled
+when either:
+
+    - it carries the X-Profile header and a token granting the
+      'get:profiles' permission (Manager role), or
+    - it is drawn by PROFILING_SAMPLE_RATE (e.g. 0.01 for 1 in 100)
+
+One request is profiled at a time per process: cProfile hooks the
+process-wide sys.monitoring on Python 3.12+, where a second active
+profiler fails, so a request drawn while another is profiled runs
+unprofiled.
+
+Profiles are standard pstats dumps: inspect them with
+`python -m pstats <file>`, or render a flame graph with snakeviz or
+flameprof. Only the newest PROFILING_KEEP profiles are kept.
+
+Environment Variables Optional:
+    PROFILING_ENABLED: Set to 'true' to enable profiling (default: 'false')
+    PROFILING_DIR: Directory profiles are written to (default: backend/profiles)
+    PROFILING_SAMPLE_RATE: Fraction of requests profiled without the header (default: 0)
+    PROFILING_KEEP: Number of profiles kept on disk (default: 200)
+"""
+
+import cProfile
+import json
+import os
+import random
+import re
+import secrets
+import threading
+import time
+
+from flask import g, request
+
+from ..auth.auth import (
+    AuthError, check_permission_mask, get_token_auth_header, permission_registry, verify_token
+)
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(BACKEND_DIR, 'profiles'))
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_KEEP = int(os.environ.get('PROFILING_KEEP', '200'))
+
+# Request header asking for a profile, honoured for PROFILING_PERMISSION only
+PROFILING_HEADER = 'X-Profile'
+PROFILING_PERMISSION = 'get:profiles'
+
+# Profile ids, e.g. '20240131T120501-042-9f3a1c2e'
+PROFILE_ID = re.compile(r'^\d{8}T\d{6}-\d{3}-[0-9a-f]{8}$')
+
+
+class RequestProfiler:
+    """
+    Decide which requests to profile and store their profiles.
+
+    Args:
+        directory: Directory profiles are written to
+        sample_rate: Fraction of requests profiled without the header
+        keep: Number of profiles kept on disk
+
+    Example:
+        profiler = RequestProfiler('profiles', sample_rate=0.01)
+        profiler.init_app(app)
+        recent = profiler.list(limit=20)
+    """
+
+    def __init__(self, directory=PROFILING_DIR, sample_rate=PROFILING_SAMPLE_RATE,
+                 keep=PROFILING_KEEP):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.required = permission_registry.mask([PROFILING_PERMISSION])
+
+        self._lock = threading.Lock()
+        # Held while a request is profiled
+        self._profiling = threading.Lock()
+
+    def init_app(self, app):
+        """Profile requests of `app` through before/after request hooks."""
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _trigger(self):
+        """Return why the current request should be profiled, or None."""
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+
+        if PROFILING_HEADER in request.headers:
+            # Never fail the request here; requires_auth reports token errors
+            try:
+                verified = verify_token(get_token_auth_header())
+                check_permission_mask(verified.permissions, self.required)
+            except AuthError:
+                return None
+            return 'requested'
+
+        return None
+
+    def _before_request(self):
+        trigger = self._trigger()
+        if trigger is None:
+            return
+
+        if not self._profiling.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler, such as a coverage tool, owns sys.monitoring
+            self._profiling.release()
+            return
+        g.profile = (profile, trigger, time.perf_counter())
+
+    def _stop(self, profile):
+        profile.disable()
+        self._profiling.release()
+
+    def _after_request(self, response):
+        state = g.pop('profile', None)
+        if state is None:
+            return response
+
+        profile, trigger, started = state
+        self._stop(profile)
+        duration = time.perf_counter() - started
+
+        rule = request.url_rule
+        self.save(profile, {
+            'method': request.method,
+            'path': request.path,
+            'route': rule.rule if rule is not None else None,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'trigger': trigger,
+        })
+        return response
+
+    def _teardown_request(self, error=None):
+        # after_request is skipped when a request fails unhandled
+        state = g.pop('profile', None)
+        if state is not None:
+            self._stop(state[0])
+
+    def save(self, profile, info):
+        """
+        Write a profile and its description, then prune old profiles.
+
+        Args:
+            profile: A disabled cProfile.Profile
+            info: Request details stored next to the profile
+
+        Returns:
+            str: The profile id
+        """
+        now = time.time()
+        profile_id = '{}-{:03d}-{}'.format(
+            time.strftime('%Y%m%dT%H%M%S', time.gmtime(now)),
+            int(now % 1 * 1000),
+            secrets.token_hex(4)
+        )
+
+        profile.dump_stats(os.path.join(self.directory, f'{profile_id}.prof'))
+        info = dict(info, id=profile_id, created=now)
+        with open(os.path.join(self.directory, f'{profile_id}.json'), 'w') as f:
+            json.dump(info, f)
+
+        self._prune()
+        return profile_id
+
+    def _ids(self):
+        """Return the ids of stored profiles, newest first."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        ids = {name[:-5] for name in names if name.endswith('.json')}
+        return sorted((i for i in ids if PROFILE_ID.match(i)), reverse=True)
+
+    def _prune(self):
+        with self._lock:
+            for profile_id in self._ids()[self.keep:]:
+                for extension in ('.json', '.prof'):
+                    try:
+                        os.remove(os.path.join(self.directory, profile_id + extension))
+                    except FileNotFoundError:
+                        pass
+
+    def list(self, limit=50):
+        """
+        Describe the most recent profiles.
+
+        Args:
+            limit: Maximum number of profiles
+
+        Returns:
+            list: Request details of each profile, newest first
+        """
+        profiles = []
+        for profile_id in self._ids()[:limit]:
+            try:
+                with open(os.path.join(self.directory, f'{profile_id}.json'), 'r') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                # Pruned or being written by another request
+                continue
+        return profiles
+
+    def path(self, profile_id):
+        """
+        Return the file of a stored profile.
+
+        Args:
+            profile_id: Id returned by save() or list()
+
+        Returns:
+            str: Path of the .prof file, or None if there is no such profile
+        """
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f'{profile_id}.prof')
+        return path if os.path.exists(path) else None
+
+
+profiler = RequestProfiler()
+
+
+def setup_profiling(app, enabled=PROFILING_ENABLED):
+    """
+    Enable on-demand profiling of `app` if PROFILING_ENABLED is set.
+
+    Args:
+        app: Flask application instance
+        enabled: False leaves the application untouched
+    """
+    if enabled:
+        profiler.init_app(app)
@@ -0,0 +1,74 @@
+"""
+Shared fixtures for the Coffee Shop API tests.
+
+Tokens are minted by a LocalIssuer and verified against its JWKS document
+served by a StaticJWKSSource, so no test talks to Auth0. The Flask app
+runs against a throwaway SQLite database, recreated for every test that
+uses the `client` fixture.
+
+Usage:
+    cd backend
+    python -m pytest
+"""
+
+import os
+import tempfile
+
+# Point the app at a scratch database before src.database.models reads it
+_DATABASE_DIR = tempfile.mkdtemp(prefix='coffee-shop-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_DATABASE_DIR, 'test.db')}"
+
+import pytest  # noqa: E402
+
+from src.auth import auth  # noqa: E402
+from src.auth.local_issuer import LocalIssuer  # noqa: E402
+from mock_auth0_api import MockTenant, serve_mock  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def issuer():
+    """A local token issuer signing with the app's algorithm."""
+    return LocalIssuer(auth.ALGORITHMS[0])
+
+
+@pytest.fixture
+def trust_issuer(issuer):
+    """Verify tokens against `issuer`, with empty token and key caches."""
+    auth.jwks_cache.set_source(issuer.jwks_source())
+    auth.token_cache.clear()
+    yield issuer
+    auth.token_cache.clear()
+
+
+@pytest.fixture
+def client(trust_issuer):
+    """A test client of the Flask app on a freshly created database."""
+    from src.api import app
+    from src.database.models import db_drop_and_create_all
+
+    with app.app_context():
+        db_drop_and_create_all()
+    return app.test_client()
+
+
+@pytest.fixture
+def manager(issuer):
+    """Authorization headers of a Manager."""
+    return {'Authorization': f'Bearer {issuer.mint_role("Manager")}'}
+
+
+@pytest.fixture
+def barista(issuer):
+    """Authorization headers of a Barista."""
+    return {'Authorization': f'Bearer {issuer.mint_role("Barista")}'}
+
+
+@pytest.fixture
+def tenant():
+    """A mock Auth0 tenant served on a free port, at tenant.base_url."""
+    tenant = MockTenant()
+    server = serve_mock(tenant, port=0)
+    tenant.base_url = f'http://127.0.0.1:{server.server_port}'
+    yield tenant
+    server.shutdown()
+    server.server_close()
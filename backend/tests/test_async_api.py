@@ -0,0 +1,29 @@
+"""Tests for the startup of the async API (src/async_api.py)."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+pytest.importorskip('starlette')
+pytest.importorskip('aiosqlite')
+
+from src import async_api  # noqa: E402
+from src.api import app  # noqa: E402
+from src.database.models import db  # noqa: E402
+
+
+async def start_and_stop():
+    try:
+        async with async_api.lifespan(async_api.app):
+            pass
+    finally:
+        await async_api.engine.dispose()
+
+
+def test_startup_names_the_migration_when_tables_are_missing(client):
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(text('DROP TABLE menu_version'))
+
+    with pytest.raises(RuntimeError, match='flask upgrade-db'):
+        asyncio.run(start_and_stop())
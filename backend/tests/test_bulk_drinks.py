@@ -0,0 +1,84 @@
+"""Tests for the bulk drink endpoints of api.py."""
+
+
+def recipe(color='brown'):
+    return [{'name': 'coffee', 'color': color, 'parts': 1}]
+
+
+def titles(client):
+    return [drink['title'] for drink in client.get('/drinks').get_json()['drinks']]
+
+
+def test_bulk_create(client, manager):
+    response = client.post('/drinks/bulk', headers=manager, json={'drinks': [
+        {'title': 'Latte', 'recipe': recipe()},
+        {'title': 'Mocha', 'recipe': recipe('black')},
+    ]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [result['status'] for result in body['results']] == ['created', 'created']
+    assert titles(client) == ['water', 'Latte', 'Mocha']
+
+
+def test_bulk_create_with_an_invalid_item_writes_nothing(client, manager):
+    response = client.post('/drinks/bulk', headers=manager, json={'drinks': [
+        {'title': 'Latte', 'recipe': recipe()},
+        {'title': 'water', 'recipe': recipe()},
+        {'title': 'Mocha'},
+    ]})
+
+    assert response.status_code == 422
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['skipped', 'invalid', 'invalid']
+    assert results[1]['message'] == 'title already exists'
+    assert titles(client) == ['water']
+
+
+def test_bulk_update_with_an_unknown_id_writes_nothing(client, manager):
+    response = client.patch('/drinks/bulk', headers=manager, json={'drinks': [
+        {'id': 1, 'title': 'Still water'},
+        {'id': 99, 'title': 'Sparkling water'},
+    ]})
+
+    assert response.status_code == 422
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['skipped', 'not_found']
+    assert titles(client) == ['water']
+
+
+def test_bulk_update(client, manager):
+    client.post('/drinks/bulk', headers=manager, json={'drinks': [{'title': 'Latte', 'recipe': recipe()}]})
+
+    response = client.patch('/drinks/bulk', headers=manager, json={'drinks': [
+        {'id': 1, 'title': 'Still water'},
+        {'id': 2, 'recipe': recipe('white')},
+    ]})
+
+    assert response.status_code == 200
+    drinks = response.get_json()['drinks']
+    assert [drink['title'] for drink in drinks] == ['Still water', 'Latte']
+    assert drinks[1]['recipe'][0]['color'] == 'white'
+
+
+def test_bulk_delete_with_an_unknown_id_deletes_nothing(client, manager):
+    client.post('/drinks/bulk', headers=manager, json={'drinks': [{'title': 'Latte', 'recipe': recipe()}]})
+
+    response = client.delete('/drinks/bulk', headers=manager, json={'ids': [2, 99, 2]})
+
+    assert response.status_code == 422
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['skipped', 'not_found', 'invalid']
+    assert titles(client) == ['water', 'Latte']
+
+    response = client.delete('/drinks/bulk', headers=manager, json={'ids': [1, 2]})
+    assert response.get_json()['delete'] == [1, 2]
+    assert titles(client) == []
+
+
+def test_bulk_create_requires_post_permission(client, barista):
+    response = client.post('/drinks/bulk', headers=barista,
+                           json={'drinks': [{'title': 'Latte', 'recipe': recipe()}]})
+
+    assert response.status_code == 403
+    assert titles(client) == ['water']
@@ -0,0 +1,88 @@
+"""Tests for response compression (src/compression.py and api.py)."""
+
+import gzip
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from src.compression import COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, brotli, setup_compression
+
+
+pytestmark = pytest.mark.skipif(not COMPRESSION_ENABLED, reason='COMPRESSION_ENABLED is false')
+
+needs_brotli = pytest.mark.skipif(brotli is None, reason='brotli is not installed')
+
+
+@pytest.fixture
+def big_menu(client, manager):
+    """A menu whose GET /drinks body is worth compressing."""
+    response = client.post('/drinks/bulk', headers=manager, json={'drinks': [
+        {'title': f'Coffee {number}', 'recipe': [{'name': 'coffee', 'color': 'brown', 'parts': 1}]}
+        for number in range(60)
+    ]})
+    assert response.status_code == 200
+    assert len(client.get('/drinks').data) >= COMPRESSION_MIN_SIZE
+    return client
+
+
+def get(client, path='/drinks', **headers):
+    return client.get(path, headers={key.replace('_', '-'): value for key, value in headers.items()})
+
+
+@needs_brotli
+def test_brotli_is_preferred_and_tagged(big_menu):
+    plain = get(big_menu, Accept_Encoding='identity')
+    response = get(big_menu, Accept_Encoding='gzip, br')
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == plain.data
+    assert response.headers['ETag'] == plain.headers['ETag'][:-1] + '-br"'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+
+def test_gzip_when_brotli_is_not_accepted(big_menu):
+    plain = get(big_menu)
+    response = get(big_menu, Accept_Encoding='gzip')
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+    assert response.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+
+def test_compressed_etag_revalidates(big_menu):
+    etag = get(big_menu, Accept_Encoding='gzip').headers['ETag']
+
+    assert get(big_menu, Accept_Encoding='gzip', If_None_Match=etag).status_code == 304
+    # The gzip tag does not name the uncompressed body
+    assert get(big_menu, If_None_Match=etag).status_code == 200
+
+
+def test_paginated_listings_are_compressed_per_request(big_menu):
+    response = get(big_menu, '/drinks?limit=50', Accept_Encoding='gzip')
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.data).startswith(b'{')
+
+
+def test_small_bodies_are_sent_as_they_are(client):
+    response = get(client, Accept_Encoding='gzip, br')
+
+    assert len(response.data) < COMPRESSION_MIN_SIZE
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' not in response.headers.get('Vary', '')
+
+
+def test_errors_and_binary_bodies_are_sent_as_they_are():
+    app = Flask(__name__)
+    setup_compression(app, enabled=True)
+    big = 'x' * COMPRESSION_MIN_SIZE
+    app.add_url_rule('/text', 'text', lambda: Response(big, mimetype='text/plain'))
+    app.add_url_rule('/binary', 'binary', lambda: Response(big, mimetype='application/octet-stream'))
+    app.add_url_rule('/error', 'error', lambda: (jsonify(message=big), 500))
+    client = app.test_client()
+
+    assert get(client, '/text', Accept_Encoding='gzip').headers['Content-Encoding'] == 'gzip'
+    for path in ('/binary', '/error'):
+        assert 'Content-Encoding' not in get(client, path, Accept_Encoding='gzip').headers
@@ -0,0 +1,69 @@
+"""Tests for the persisted menu version and GET /drinks/changes."""
+
+
+def create(client, manager, title):
+    response = client.post('/drinks', headers=manager, json={
+        'title': title, 'recipe': [{'name': 'coffee', 'color': 'brown', 'parts': 1}]
+    })
+    assert response.status_code == 200
+    return response.get_json()['drinks'][0]['id']
+
+
+def changes(client, since):
+    response = client.get(f'/drinks/changes?since={since}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_changes_since_a_version(client, manager):
+    version = changes(client, 0)['version']
+    latte = create(client, manager, 'Latte')
+    client.patch('/drinks/1', headers=manager, json={'title': 'Still water'})
+
+    body = changes(client, version)
+    assert body['full'] is False
+    assert [drink['id'] for drink in body['drinks']] == [1, latte]
+    assert body['deleted'] == []
+    assert body['version'] == version + 2
+
+    assert changes(client, body['version'])['drinks'] == []
+
+
+def test_deleted_drink_is_reported_by_its_tombstone(client, manager):
+    latte = create(client, manager, 'Latte')
+    version = changes(client, 0)['version']
+    client.delete(f'/drinks/{latte}', headers=manager)
+
+    body = changes(client, version)
+    assert body['drinks'] == []
+    assert body['deleted'] == [latte]
+
+
+def test_reused_id_is_reported_as_a_change_not_a_deletion(client, manager):
+    latte = create(client, manager, 'Latte')
+    before_delete = changes(client, 0)['version']
+    client.delete(f'/drinks/{latte}', headers=manager)
+    after_delete = changes(client, 0)['version']
+
+    # SQLite hands the highest rowid out again
+    mocha = create(client, manager, 'Mocha')
+    assert mocha == latte
+
+    for since in (before_delete, after_delete):
+        body = changes(client, since)
+        assert [(drink['id'], drink['title']) for drink in body['drinks']] == [(mocha, 'Mocha')]
+        assert body['deleted'] == []
+
+
+def test_unknown_versions_get_the_whole_menu(client, manager):
+    create(client, manager, 'Latte')
+
+    for since in (0, 10 ** 6):
+        body = changes(client, since)
+        assert body['full'] is True
+        assert [drink['title'] for drink in body['drinks']] == ['water', 'Latte']
+
+
+def test_invalid_since_is_a_bad_request(client):
+    assert client.get('/drinks/changes?since=yesterday').status_code == 400
+    assert client.get('/drinks/changes?since=-1').status_code == 400
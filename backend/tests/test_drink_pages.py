@@ -0,0 +1,68 @@
+"""Tests for the keyset pagination and field projection of GET /drinks."""
+
+import pytest
+
+
+@pytest.fixture
+def menu(client, manager):
+    """Five drinks, ids 1 (water) to 5."""
+    response = client.post('/drinks/bulk', headers=manager, json={'drinks': [
+        {'title': title, 'recipe': [{'name': 'coffee', 'color': 'brown', 'parts': 1}]}
+        for title in ('Latte', 'Mocha', 'Cortado', 'Flat white')
+    ]})
+    assert response.status_code == 200
+    return client
+
+
+def page(client, query):
+    response = client.get(f'/drinks?{query}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_pages_follow_the_cursor_to_the_end(menu):
+    first = page(menu, 'limit=2')
+    assert [drink['id'] for drink in first['drinks']] == [1, 2]
+    assert first['next_cursor'] == 2
+
+    second = page(menu, f"limit=2&after={first['next_cursor']}")
+    assert [drink['id'] for drink in second['drinks']] == [3, 4]
+
+    last = page(menu, f"limit=2&after={second['next_cursor']}")
+    assert [drink['id'] for drink in last['drinks']] == [5]
+    assert last['next_cursor'] is None
+
+
+def test_a_full_last_page_is_followed_by_an_empty_one(menu):
+    full = page(menu, 'limit=5')
+    assert full['next_cursor'] == 5
+
+    assert page(menu, 'limit=5&after=5') == {'success': True, 'drinks': [], 'next_cursor': None}
+
+
+def test_after_without_limit_returns_the_rest(menu):
+    body = page(menu, 'after=3')
+    assert [drink['id'] for drink in body['drinks']] == [4, 5]
+    assert body['next_cursor'] is None
+
+
+@pytest.mark.parametrize('query', [
+    'after=abc', 'after=-1', 'limit=0', 'limit=abc', 'limit=100000', 'fields=price', 'fields=,',
+])
+def test_invalid_parameters_are_bad_requests(menu, query):
+    assert menu.get(f'/drinks?{query}').status_code == 400
+
+
+def test_fields_without_id_still_paginate(menu):
+    body = page(menu, 'fields=title&limit=2&after=1')
+
+    assert body['drinks'] == [{'title': 'Latte'}, {'title': 'Mocha'}]
+    assert body['next_cursor'] == 3
+
+
+def test_projected_recipes_keep_the_listing_form(menu, manager):
+    short = page(menu, 'fields=id,recipe&limit=1')['drinks'][0]
+    assert short == {'id': 1, 'recipe': [{'color': 'blue', 'parts': 1}]}
+
+    response = menu.get('/drinks-detail?fields=recipe&limit=1', headers=manager)
+    assert response.get_json()['drinks'] == [{'recipe': [{'name': 'water', 'color': 'blue', 'parts': 1}]}]
@@ -0,0 +1,122 @@
+"""Tests for the JWKS key cache (src/auth/jwks.py)."""
+
+import threading
+import time
+
+import pytest
+
+from src.auth import auth
+from src.auth.jwks import JWKSCache, JWKSUnavailableError, StaticJWKSSource, URLJWKSSource
+from src.auth.local_issuer import LocalIssuer
+
+
+class CountingSource:
+    """A JWKS source counting its fetches, optionally slow or failing."""
+
+    # Local issuers' key sets, which may hold HS256 secrets
+    allow_symmetric = True
+
+    def __init__(self, jwks, delay=0.0):
+        self.jwks = jwks
+        self.delay = delay
+        self.failing = False
+        self.fetches = 0
+        self._lock = threading.Lock()
+
+    def fetch(self):
+        with self._lock:
+            self.fetches += 1
+        time.sleep(self.delay)
+        if self.failing:
+            raise OSError('issuer unreachable')
+        return self.jwks
+
+
+def test_unknown_kid_refreshes_the_key_set(issuer):
+    rotated = LocalIssuer(issuer.algorithm)
+    source = CountingSource(issuer.jwks())
+    cache = JWKSCache(source, miss_refresh_interval=0)
+
+    assert cache.get_key(issuer.kid) is not None
+    assert cache.get_key(rotated.kid) is None
+
+    # The issuer rotates its keys: the next unknown kid triggers a fetch
+    source.jwks = {'keys': issuer.jwks()['keys'] + rotated.jwks()['keys']}
+    assert cache.get_key(rotated.kid) is not None
+    assert source.fetches == 3
+
+
+def test_unknown_kids_do_not_force_a_fetch_each(issuer):
+    source = CountingSource(issuer.jwks())
+    cache = JWKSCache(source, miss_refresh_interval=30)
+
+    cache.get_key(issuer.kid)
+    for n in range(10):
+        assert cache.get_key(f'random-{n}') is None
+    assert source.fetches == 1
+
+
+def test_concurrent_cold_lookups_fetch_once(issuer):
+    source = CountingSource(issuer.jwks(), delay=0.05)
+    cache = JWKSCache(source)
+    barrier = threading.Barrier(16)
+    keys = []
+
+    def lookup():
+        barrier.wait()
+        keys.append(cache.get_key(issuer.kid))
+
+    threads = [threading.Thread(target=lookup) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert source.fetches == 1
+    assert len(keys) == 16 and all(key is not None for key in keys)
+
+
+def test_stale_keys_are_served_when_the_issuer_is_down(issuer):
+    source = CountingSource(issuer.jwks())
+    cache = JWKSCache(source, ttl=0, miss_refresh_interval=0)
+    key = cache.get_key(issuer.kid)
+
+    source.failing = True
+    assert cache.get_key(issuer.kid) is key
+    assert cache.fetch_errors == 1
+
+
+def test_cold_cache_with_unreachable_issuer_raises(issuer):
+    source = CountingSource(issuer.jwks())
+    source.failing = True
+
+    with pytest.raises(JWKSUnavailableError):
+        JWKSCache(source).get_key(issuer.kid)
+
+
+def test_verify_token_accepts_a_rotated_key(trust_issuer, monkeypatch):
+    rotated = LocalIssuer(trust_issuer.algorithm)
+    monkeypatch.setattr(auth.jwks_cache, 'miss_refresh_interval', 0)
+    auth.verify_token(trust_issuer.mint_role('Barista'))
+
+    monkeypatch.setattr(auth.jwks_cache, 'source', StaticJWKSSource(
+        {'keys': trust_issuer.jwks()['keys'] + rotated.jwks()['keys']},
+        allow_symmetric=trust_issuer.algorithm == 'HS256'))
+    payload = auth.verify_token(rotated.mint_role('Manager')).payload
+
+    assert 'post:drinks' in payload['permissions']
+
+
+def test_symmetric_keys_are_skipped_unless_allowed():
+    hs256 = LocalIssuer('HS256')
+
+    assert JWKSCache(StaticJWKSSource(hs256.jwks())).get_key(hs256.kid) is None
+    assert JWKSCache(hs256.jwks_source()).get_key(hs256.kid) is not None
+
+
+def test_remote_key_sets_never_supply_symmetric_keys(monkeypatch):
+    hs256 = LocalIssuer('HS256')
+    source = URLJWKSSource('https://issuer.invalid/.well-known/jwks.json')
+    monkeypatch.setattr(source, 'fetch', hs256.jwks)
+
+    assert JWKSCache(source).get_key(hs256.kid) is None
@@ -0,0 +1,40 @@
+"""Tests for the retries of setup_auth0.ManagementAPI."""
+
+import socket
+
+import pytest
+import requests
+
+import setup_auth0
+from setup_auth0 import ManagementAPI, Provisioner
+
+
+@pytest.fixture
+def closed_url(monkeypatch):
+    """URL of a port nothing listens on, with the retry backoff skipped."""
+    monkeypatch.setattr(setup_auth0.time, 'sleep', lambda seconds: None)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}'
+
+
+def test_network_errors_are_retried_then_raised(closed_url):
+    api = ManagementAPI(closed_url, 'token', max_retries=2, timeout=1)
+
+    with pytest.raises(requests.ConnectionError):
+        api.request('GET', '/api/v2/roles')
+    assert api.calls == 3
+
+
+def test_network_error_fails_only_that_user(closed_url):
+    provisioner = Provisioner(ManagementAPI(closed_url, 'token', max_retries=1, timeout=1))
+    provisioner.roles = {'Barista': 'rol_1'}
+    provisioner.users = {'known@coffee-shop.com': 'auth0|1'}
+
+    counts = provisioner.provision_users([
+        {'email': 'known@coffee-shop.com', 'roles': ['Barista']},
+        {'email': 'new@coffee-shop.com', 'password': 'Secret-123', 'connection': 'db'},
+    ])
+
+    assert counts == {'created': 0, 'existing': 0, 'failed': 2}
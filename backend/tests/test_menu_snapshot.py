@@ -0,0 +1,119 @@
+"""Tests for the menu snapshot serving GET /drinks (src/database/menu.py)."""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, insert, update
+from werkzeug.http import http_date
+
+from src.api import app
+from src.database.menu import MenuSnapshot
+from src.database.models import Drink, MenuVersion, db, menu_snapshot
+
+
+def write_from_another_process(modified_at=None):
+    """Add a drink and bump the menu version without touching this process's snapshot."""
+    modified_at = modified_at or datetime.utcnow()
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(update(MenuVersion).values(
+            version=MenuVersion.version + 1, modified_at=modified_at
+        ))
+        connection.execute(insert(Drink).values(
+            title='Cortado', recipe=[{'name': 'coffee', 'color': 'brown', 'parts': 1}],
+            version=MenuVersion.current_select().scalar_subquery()
+        ))
+
+
+def count_statements(request):
+    """Run `request` and return the number of SQL statements it executed."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        request()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def test_snapshot_is_reused_until_the_menu_changes(client):
+    first = client.get('/drinks')
+    second = client.get('/drinks', headers={'If-None-Match': first.headers['ETag']})
+
+    assert second.status_code == 304
+
+
+def test_warm_reads_run_no_sql(client, monkeypatch):
+    monkeypatch.setattr(menu_snapshot, 'check_interval', 60)
+    etag = client.get('/drinks').headers['ETag']
+
+    assert count_statements(lambda: client.get('/drinks')) == 0
+    assert count_statements(lambda: client.get('/drinks', headers={'If-None-Match': etag})) == 0
+
+
+def test_persisted_version_is_checked_once_the_interval_is_over(client, monkeypatch):
+    monkeypatch.setattr(menu_snapshot, 'check_interval', 0.2)
+    client.get('/drinks')
+
+    write_from_another_process()
+    assert len(client.get('/drinks').get_json()['drinks']) == 1
+
+    time.sleep(0.3)
+    assert len(client.get('/drinks').get_json()['drinks']) == 2
+
+
+def test_writes_of_other_processes_are_served_on_the_next_read(client, monkeypatch):
+    monkeypatch.setattr(menu_snapshot, 'check_interval', 0)
+    before = client.get('/drinks')
+
+    write_from_another_process()
+    after = client.get('/drinks', headers={'If-None-Match': before.headers['ETag']})
+
+    assert after.status_code == 200
+    assert [drink['title'] for drink in after.get_json()['drinks']] == ['water', 'Cortado']
+    assert after.headers['ETag'] != before.headers['ETag']
+
+
+def test_etag_is_derived_from_the_persisted_version(client):
+    with app.app_context():
+        version = MenuVersion.current()
+
+    assert client.get('/drinks').headers['ETag'].startswith(f'"{version}-')
+
+
+def test_last_modified_is_the_persisted_write_time(client):
+    with app.app_context():
+        state = MenuVersion.state()
+    response = client.get('/drinks')
+
+    assert response.headers['Last-Modified'] == http_date(state.modified_at)
+    assert client.get('/drinks', headers={
+        'If-Modified-Since': response.headers['Last-Modified']
+    }).status_code == 304
+
+
+def test_if_modified_since_sees_writes_of_other_processes(client, monkeypatch):
+    monkeypatch.setattr(menu_snapshot, 'check_interval', 0)
+    before = client.get('/drinks').headers['Last-Modified']
+
+    later = datetime.utcnow().replace(microsecond=0) + timedelta(hours=1)
+    write_from_another_process(later)
+    after = client.get('/drinks', headers={'If-Modified-Since': before})
+
+    assert after.status_code == 200
+    assert after.headers['Last-Modified'] == http_date(later.replace(tzinfo=timezone.utc))
+
+
+def test_a_new_worker_reports_the_last_write_not_its_start(client):
+    earlier = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    write_from_another_process(earlier)
+
+    with app.app_context():
+        snapshot = MenuSnapshot(Drink.listing_rows, MenuVersion.state).get()
+
+    assert snapshot.last_modified == earlier.replace(tzinfo=timezone.utc).timestamp()
@@ -0,0 +1,77 @@
+"""Tests for the menu change events behind GET /drinks/stream (src/async_api.py)."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import insert, update
+
+pytest.importorskip('starlette')
+pytest.importorskip('aiosqlite')
+
+from src import async_api  # noqa: E402
+from src.api import app  # noqa: E402
+from src.database import models  # noqa: E402
+from src.database.events import MenuEvents  # noqa: E402
+from src.database.models import Drink, MenuVersion, db  # noqa: E402
+
+
+@pytest.fixture
+def menu_events(client, monkeypatch):
+    """A fresh event stream, without the events of earlier tests' databases."""
+    events = MenuEvents()
+    monkeypatch.setattr(models, 'menu_events', events)
+    monkeypatch.setattr(async_api, 'menu_events', events)
+    return events
+
+
+def write_from_another_process(title):
+    """Add a drink as another process would: no event is published here."""
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(update(MenuVersion).values(version=MenuVersion.version + 1))
+        connection.execute(insert(Drink).values(
+            title=title, recipe=[{'name': 'coffee', 'color': 'brown', 'parts': 1}],
+            version=MenuVersion.current_select().scalar_subquery()
+        ))
+
+
+def create_here(title):
+    """Add a drink through this process, which publishes its own event."""
+    with app.app_context():
+        drink = Drink(title=title, recipe=[{'name': 'coffee', 'color': 'brown', 'parts': 1}])
+        drink.insert()
+        return drink.id
+
+
+async def collect(menu_events, write, seconds=0.5):
+    """Run the poller and one listener around `write`; return the events heard."""
+    with app.app_context():
+        version = MenuVersion.current()
+    heard = []
+
+    async def listen():
+        async for events in menu_events.listen(None, timeout=seconds):
+            heard.extend(event for event in events if event.action != 'ready')
+
+    listener = asyncio.create_task(listen())
+    poller = asyncio.create_task(async_api.poll_menu_version(version, interval=0.05))
+    await asyncio.sleep(0.1)
+    result = await asyncio.to_thread(write)
+    await asyncio.sleep(seconds)
+
+    for task in (listener, poller):
+        task.cancel()
+    await asyncio.gather(listener, poller, return_exceptions=True)
+    await async_api.engine.dispose()
+    return result, heard
+
+
+def test_writes_of_other_processes_are_streamed(menu_events):
+    _, heard = asyncio.run(collect(menu_events, lambda: write_from_another_process('Cortado')))
+
+    assert [(event.action, event.drink_id) for event in heard] == [('updated', 2)]
+
+
+def test_local_writes_are_streamed_once(menu_events):
+    drink_id, heard = asyncio.run(collect(menu_events, lambda: create_here('Latte')))
+
+    assert [(event.action, event.drink_id) for event in heard] == [('created', drink_id)]
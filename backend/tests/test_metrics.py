@@ -0,0 +1,48 @@
+"""Tests for GET /metrics (src/metrics/instrumentation.py and registry.py)."""
+
+import pytest
+
+from src.metrics.instrumentation import CONTENT_TYPE, METRICS_ENABLED
+
+
+pytestmark = pytest.mark.skipif(not METRICS_ENABLED, reason='METRICS_ENABLED is false')
+
+SERIES = '{method="GET",route="/drinks-detail",status="200"'
+
+
+def scrape(client):
+    """Return the exposition lines and the value of each sample of GET /metrics."""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == CONTENT_TYPE
+
+    lines = response.get_data(as_text=True).splitlines()
+    samples = {}
+    for line in lines:
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return lines, samples
+
+
+def test_a_request_is_counted_and_timed(client, manager):
+    _, before = scrape(client)
+    assert client.get('/drinks-detail', headers=manager).status_code == 200
+    lines, after = scrape(client)
+
+    def delta(name):
+        return after[name] - before.get(name, 0)
+
+    assert '# TYPE http_request_duration_seconds histogram' in lines
+    assert '# TYPE auth_token_cache_misses_total counter' in lines
+    assert delta('auth_token_cache_misses_total') == 1
+
+    count = f'http_request_duration_seconds_count{SERIES}}}'
+    assert delta(count) == 1
+    assert after[f'http_request_duration_seconds_bucket{SERIES},le="+Inf"}}'] == after[count]
+    assert delta(f'http_request_duration_seconds_sum{SERIES}}}') > 0
+    assert delta(f'http_request_auth_duration_seconds_count{SERIES}}}') == 1
+
+    buckets = [value for name, value in after.items()
+               if name.startswith(f'http_request_duration_seconds_bucket{SERIES}')]
+    assert buckets == sorted(buckets)
@@ -0,0 +1,50 @@
+"""Tests for the permission bitmask (src/auth/permissions.py and auth.py)."""
+
+import pytest
+
+from src.auth import auth
+from src.auth.auth import AuthError
+from src.auth.permissions import PermissionRegistry
+
+
+def test_unknown_permissions_are_registered_with_new_bits():
+    registry = PermissionRegistry(['get:drinks', 'post:drinks'])
+    granted = registry.mask(['get:drinks', 'put:menus'])
+
+    assert 'put:menus' in registry
+    assert registry.bit('put:menus') == 0b100
+    assert registry.names(granted) == ['get:drinks', 'put:menus']
+
+
+def test_masks_stay_valid_after_later_registrations():
+    registry = PermissionRegistry(['get:drinks'])
+    granted = registry.mask(['get:drinks', 'refund:orders'])
+
+    # An endpoint registering the same permission later gets the same bit
+    required = registry.mask(['refund:orders'])
+    assert registry.has_all(granted, required)
+    assert not registry.has_all(granted, registry.mask(['close:shop']))
+
+
+def test_check_permissions_with_a_permission_unknown_to_the_app():
+    payload = {'permissions': ['get:drinks', 'brew:secret-blend']}
+
+    assert auth.check_permissions('brew:secret-blend', payload)
+    with pytest.raises(AuthError) as error:
+        auth.check_permissions('taste:secret-blend', payload)
+    assert error.value.status_code == 403
+
+
+def test_payload_without_permissions_claim_is_a_bad_request():
+    with pytest.raises(AuthError) as error:
+        auth.check_permissions('get:drinks', {'sub': 'auth0|someone'})
+    assert error.value.status_code == 400
+
+
+def test_requires_auth_checks_the_token_mask(client, trust_issuer, barista):
+    drink = {'title': 'Mocha', 'recipe': [{'name': 'coffee', 'color': 'brown', 'parts': 1}]}
+    assert client.post('/drinks', json=drink, headers=barista).status_code == 403
+
+    roaster = trust_issuer.mint(['post:drinks', 'roast:beans'])
+    response = client.post('/drinks', json=drink, headers={'Authorization': f'Bearer {roaster}'})
+    assert response.status_code == 200
@@ -0,0 +1,31 @@
+"""Tests for the request profiler (src/metrics/profiling.py)."""
+
+from flask import Flask
+
+from src.metrics.profiling import RequestProfiler
+
+
+def profiled_app(tmp_path):
+    app = Flask(__name__)
+    app.add_url_rule('/ping', 'ping', lambda: 'pong')
+    profiler = RequestProfiler(str(tmp_path), sample_rate=1)
+    profiler.init_app(app)
+    return app.test_client(), profiler
+
+
+def test_sampled_request_is_profiled(tmp_path):
+    client, profiler = profiled_app(tmp_path)
+
+    assert client.get('/ping').status_code == 200
+    assert [info['route'] for info in profiler.list()] == ['/ping']
+
+
+def test_request_runs_unprofiled_while_another_is_profiled(tmp_path):
+    client, profiler = profiled_app(tmp_path)
+
+    with profiler._profiling:
+        assert client.get('/ping').status_code == 200
+    assert profiler.list() == []
+
+    client.get('/ping')
+    assert len(profiler.list()) == 1
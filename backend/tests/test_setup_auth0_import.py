@@ -0,0 +1,26 @@
+"""Tests for the streamed --import of setup_auth0.py, against mock_auth0_api.py."""
+
+import json
+
+from mock_auth0_api import DEFAULT_API_IDENTIFIER
+from setup_auth0 import ManagementAPI, Provisioner, import_users
+
+
+def test_only_new_users_need_a_password(tenant, tmp_path, capsys):
+    run = Provisioner(ManagementAPI(tenant.base_url, 'token'), audience=DEFAULT_API_IDENTIFIER)
+    run.load()
+    assert run.provision_user({'email': 'old@coffee-shop.com', 'password': 'Secret-123!',
+                               'connection': 'Username-Password-Authentication'})[0] == 'created'
+
+    source = tmp_path / 'users.jsonl'
+    source.write_text('\n'.join(json.dumps(user) for user in [
+        {'email': 'old@coffee-shop.com'},
+        {'email': 'nopassword@coffee-shop.com'},
+        {'email': 'new@coffee-shop.com', 'password': 'Secret-123!'},
+    ]))
+
+    assert import_users(run, str(source), str(tmp_path / 'state.json')) == 1
+
+    output = capsys.readouterr().out
+    assert '1 created, 1 existing, 1 failed' in output
+    assert 'nopassword@coffee-shop.com: a new user needs a password' in output
@@ -0,0 +1,78 @@
+"""Tests for the --sync plan and apply of setup_auth0.py, against mock_auth0_api.py."""
+
+import copy
+import json
+import os
+
+import pytest
+
+from mock_auth0_api import DEFAULT_API_IDENTIFIER
+from setup_auth0 import ManagementAPI, Provisioner, sync
+
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'auth0_users_template.json')
+
+
+@pytest.fixture
+def config():
+    with open(TEMPLATE, 'r') as f:
+        return json.load(f)
+
+
+def provisioner(tenant):
+    """Return a loaded Provisioner, as a fresh run of setup_auth0.py has."""
+    provisioner = Provisioner(ManagementAPI(tenant.base_url, 'token'), audience=DEFAULT_API_IDENTIFIER)
+    provisioner.load()
+    return provisioner
+
+
+def plan(tenant, config):
+    run = provisioner(tenant)
+    return run.plan(config, run.snapshot(config))
+
+
+def apply(tenant, config):
+    run = provisioner(tenant)
+    return run.apply(run.plan(config, run.snapshot(config)))
+
+
+def test_sync_creates_everything_then_plans_nothing(tenant, config):
+    changes = plan(tenant, config)
+    assert {(change.action, change.kind) for change in changes} == {
+        ('+', 'role'), ('+', 'permissions'), ('+', 'user')
+    }
+
+    counts = apply(tenant, config)
+    assert counts['failed'] == 0
+    assert tenant.stats()['roles'] == 2 and tenant.stats()['users'] == 2
+
+    writes = tenant.stats()['writes']
+    assert plan(tenant, config) == []
+    assert apply(tenant, config) == {'applied': 0, 'failed': 0}
+    assert tenant.stats()['writes'] == writes
+
+
+def test_sync_applies_only_the_differences(tenant, config):
+    apply(tenant, config)
+    changed = copy.deepcopy(config)
+    changed['roles'][1]['permissions'].remove('get:profiles')
+    changed['users'][0]['roles'] = ['Barista', 'Manager']
+
+    changes = plan(tenant, changed)
+    assert [(change.action, change.kind, change.name, change.value) for change in changes] == [
+        ('-', 'permissions', 'Manager', ['get:profiles']),
+        ('+', 'user roles', 'barista@coffee-shop.com', ['Manager']),
+    ]
+
+    assert apply(tenant, changed)['failed'] == 0
+    assert plan(tenant, changed) == []
+
+
+def test_dry_run_makes_no_writes(tenant, config, capsys):
+    writes = tenant.stats()['writes']
+
+    assert sync(provisioner(tenant), config, dry_run=True) == 0
+
+    assert tenant.stats()['writes'] == writes
+    assert 'Dry run, nothing applied.' in capsys.readouterr().out
+    assert plan(tenant, config) != []
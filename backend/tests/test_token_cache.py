@@ -0,0 +1,88 @@
+"""Tests for the verified token cache (src/auth/token_cache.py)."""
+
+import pytest
+
+from src.auth import auth
+from src.auth.auth import AuthError
+from src.auth.token_cache import TokenCache
+
+
+class Clock:
+    """A settable replacement for time.time()."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_at_exp():
+    clock = Clock()
+    cache = TokenCache(clock=clock)
+    cache.put('token', 'payload', exp=clock.now + 60)
+
+    clock.now += 59.9
+    assert cache.get('token') == 'payload'
+
+    clock.now += 0.1
+    assert cache.get('token') is None
+    assert len(cache) == 0
+
+
+def test_expired_tokens_are_not_cached():
+    clock = Clock()
+    cache = TokenCache(clock=clock)
+    cache.put('expired', 'payload', exp=clock.now)
+    cache.put('no exp', 'payload', exp=None)
+
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    clock = Clock()
+    cache = TokenCache(max_entries=2, clock=clock)
+    cache.put('a', 1, exp=clock.now + 60)
+    cache.put('b', 2, exp=clock.now + 60)
+
+    cache.get('a')
+    cache.put('c', 3, exp=clock.now + 60)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_zero_entries_disables_the_cache():
+    cache = TokenCache(max_entries=0)
+    cache.put('token', 'payload', exp=2 ** 40)
+
+    assert cache.get('token') is None
+
+
+def test_repeated_token_skips_verification(trust_issuer, monkeypatch):
+    token = trust_issuer.mint_role('Barista')
+    first = auth.verify_token(token)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('token verified again')
+    monkeypatch.setattr(auth, 'decode_token', fail)
+
+    assert auth.verify_token(token) is first
+    assert auth.token_cache.hits == 1
+
+
+def test_cached_token_is_rejected_after_exp(trust_issuer, monkeypatch):
+    token = trust_issuer.mint_role('Barista', ttl=60)
+    exp = auth.verify_token(token).payload['exp']
+
+    def expired(*args, **kwargs):
+        raise auth.jwt.ExpiredSignatureError('Signature has expired.')
+
+    # At exp the cache misses and the token is verified again, as expired
+    monkeypatch.setattr(auth.token_cache, 'clock', lambda: exp)
+    monkeypatch.setattr(auth.jwt, 'decode', expired)
+
+    with pytest.raises(AuthError) as error:
+        auth.verify_token(token)
+    assert error.value.status_code == 401
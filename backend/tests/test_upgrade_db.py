@@ -0,0 +1,76 @@
+"""Tests for `flask upgrade-db` (upgrade_db in src/database/models.py)."""
+
+import json
+
+import pytest
+from sqlalchemy import event, inspect, select, text
+
+from src.api import app
+from src.database.models import Drink, MenuVersion, db, upgrade_db
+
+
+LEGACY_RECIPES = {
+    'Latte': [{'name': 'milk', 'color': 'white', 'parts': 3},
+              {'name': 'coffee', 'color': 'brown', 'parts': 1}],
+    'Espresso': [{'name': 'coffee', 'color': 'brown', 'parts': 1}],
+}
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'CREATE', 'ALTER', 'DROP')
+
+
+@pytest.fixture
+def legacy_database():
+    """The database as it was before native JSON recipes and menu versions."""
+    with app.app_context():
+        db.drop_all()
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                'CREATE TABLE drink (id INTEGER PRIMARY KEY, title VARCHAR(80) UNIQUE, '
+                'recipe VARCHAR(180) NOT NULL)'
+            ))
+            for title, recipe in LEGACY_RECIPES.items():
+                connection.execute(text('INSERT INTO drink (title, recipe) VALUES (:title, :recipe)'),
+                                   {'title': title, 'recipe': json.dumps(recipe)})
+        yield
+        db.drop_all()
+
+
+def writes_during(function):
+    """Run `function` and return the data and schema changing statements it executed."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.split(None, 1)[0].upper() in WRITE_STATEMENTS:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        function()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def test_legacy_recipes_become_json(legacy_database):
+    with app.app_context():
+        upgrade_db()
+
+        with db.engine.connect() as connection:
+            rows = connection.execute(select(Drink.title, Drink.recipe, Drink.version)).all()
+            raw = connection.execute(text("SELECT recipe FROM drink WHERE title = 'Espresso'")).scalar()
+        assert {row.title: row.recipe for row in rows} == LEGACY_RECIPES
+        assert {row.version for row in rows} == {1}
+        assert json.loads(raw) == LEGACY_RECIPES['Espresso']
+        assert MenuVersion.current() == 1
+        assert 'drink_legacy' not in inspect(db.engine).get_table_names()
+
+
+def test_second_upgrade_is_a_no_op(legacy_database):
+    with app.app_context():
+        upgrade_db()
+        with db.engine.connect() as connection:
+            before = connection.execute(select(Drink.__table__)).all()
+
+        assert writes_during(upgrade_db) == []
+        with db.engine.connect() as connection:
+            assert connection.execute(select(Drink.__table__)).all() == before
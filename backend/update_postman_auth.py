@@ -1,80 +1,69 @@
 #!/usr/bin/env python3
 """
-Update Postman Collection with JWT Tokens
+Update Postman Collections with JWT Tokens
 
-This script helps update the Postman collection with JWT tokens for Barista and Manager roles.
+This script writes JWT tokens into Postman collections and environments.
+Every folder whose name matches a role (case-insensitively), at any depth,
+gets that role's token as its bearer auth; requests below it that carry
+their own bearer auth get the token too. Environments get one
+`<role>_token` variable per role.
+
+Tokens come from a JSON config mapping role names to a source:
+
+    {
+        "roles": {
+            "barista": {"mint": "Barista"},
+            "manager": {"token": "eyJhbGci..."},
+            "auditor": {"env": "AUDITOR_TOKEN"},
+            "owner": {"fetch": {"domain": "your-tenant.auth0.com",
+                                "client_id": "...", "client_secret": "...",
+                                "audience": "dev", "grant_type": "password",
+                                "username": "owner@coffee-shop.com",
+                                "password": "..."}}
+        }
+    }
+
+"mint" signs a token for a role of auth0_users_template.json with the
+local issuer key (see src/auth/local_issuer.py); "fetch" requests one
+from the Auth0 token endpoint. Fetches run in parallel, and each output
+file is written atomically, so an interrupted run never leaves a
+truncated collection behind.
 
 Usage:
     python update_postman_auth.py <collection_file> <barista_token> <manager_token>
 
+    python update_postman_auth.py --config postman_tokens.json \
+        collections/*.postman_collection.json envs/*.postman_environment.json
+
+    # Mint Barista and Manager tokens locally, write copies to out/
+    python update_postman_auth.py --mint --out-dir out \
+        udacity-fsnd-udaspicelatte.postman_collection.json
+
 Example:
     python update_postman_auth.py udacity-fsnd-udaspicelatte.postman_collection.json \
         <barista_jwt_token> <manager_jwt_token>
 """
 
+import argparse
 import json
-import sys
 import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
+import requests
 
-def update_collection_auth(collection_file, barista_token, manager_token):
-    """
-    Update Postman collection with JWT tokens for Barista and Manager roles.
-    
-    Args:
-        collection_file: Path to the Postman collection JSON file
-        barista_token: JWT token for Barista role
-        manager_token: JWT token for Manager role
-    """
-    # Read the collection file
-    try:
-        with open(collection_file, 'r') as f:
-            collection = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: Collection file '{collection_file}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in collection file: {e}")
-        sys.exit(1)
-    
-    # Find and update barista and manager folders
-    for folder in collection.get('item', []):
-        folder_name = folder.get('name', '').lower()
-        
-        if folder_name == 'barista':
-            update_folder_auth(folder, barista_token, 'Barista')
-            print(f"✓ Updated Barista folder with token")
-        
-        elif folder_name == 'manager':
-            update_folder_auth(folder, manager_token, 'Manager')
-            print(f"✓ Updated Manager folder with token")
-    
-    # Write the updated collection back
-    output_file = collection_file
-    with open(output_file, 'w') as f:
-        json.dump(collection, f, indent='\t')
-    
-    print(f"\n✓ Collection updated: {output_file}")
-    print("\nNext steps:")
-    print("1. Import the updated collection into Postman")
-    print("2. Test the endpoints with the new tokens")
-    print("3. Export the collection to share with the team")
 
+# Roles minted by --mint when no config names any
+DEFAULT_MINT_ROLES = ('Barista', 'Manager')
 
-def update_folder_auth(folder, token, role_name):
-    """
-    Update authorization for all requests in a folder.
-    
-    Args:
-        folder: Postman collection folder object
-        token: JWT token to use
-        role_name: Name of the role (for display)
-    """
-    # Update folder-level auth if it exists
-    if 'auth' not in folder:
-        folder['auth'] = {}
-    
-    folder['auth'] = {
+# Placeholders shipped in examples, rejected as tokens
+PLACEHOLDER_TOKENS = {'YOUR_BARISTA_TOKEN', 'YOUR_MANAGER_TOKEN'}
+
+
+def bearer_auth(token):
+    """Return a Postman bearer auth object for `token`."""
+    return {
         'type': 'bearer',
         'bearer': [
             {
@@ -84,51 +73,279 @@ def update_folder_auth(folder, token, role_name):
             }
         ]
     }
-    
-    # Update individual requests in the folder
-    for item in folder.get('item', []):
-        if 'request' in item:
-            if 'auth' not in item['request']:
-                item['request']['auth'] = {}
-            
-            item['request']['auth'] = {
-                'type': 'bearer',
-                'bearer': [
-                    {
-                        'key': 'token',
-                        'value': token,
-                        'type': 'string'
-                    }
-                ]
-            }
+
+
+def update_items(items, tokens, token=None, path=''):
+    """
+    Apply role tokens to a list of collection items, recursing into folders.
+
+    A folder named after a role gets that role's token and passes it on to
+    everything below it, until a nested folder names another role.
+
+    Args:
+        items: The 'item' list of a collection or folder
+        tokens: Lowercased role name -> token
+        token: Token inherited from the enclosing folder, if any
+        path: Folder path of `items`, for display
+
+    Returns:
+        list: Paths of the folders that were updated
+    """
+    updated = []
+    for item in items:
+        if 'item' in item:
+            name = item.get('name', '')
+            folder_path = f'{path}/{name}'
+            folder_token = tokens.get(name.lower())
+            if folder_token is not None:
+                item['auth'] = bearer_auth(folder_token)
+                updated.append(folder_path)
+            updated.extend(update_items(item['item'], tokens,
+                                        folder_token or token, folder_path))
+
+        elif token is not None:
+            # Requests without auth inherit the folder's; only explicit
+            # bearer auth would keep a stale token
+            request = item.get('request')
+            if isinstance(request, dict) and request.get('auth', {}).get('type') == 'bearer':
+                request['auth'] = bearer_auth(token)
+    return updated
+
+
+def update_environment(environment, tokens, variables):
+    """
+    Set the `<role>_token` variables of a Postman environment.
+
+    Args:
+        environment: Parsed environment file
+        tokens: Lowercased role name -> token
+        variables: Lowercased role name -> variable name
+
+    Returns:
+        list: Names of the variables that were set
+    """
+    values = environment.setdefault('values', [])
+    existing = {value.get('key'): value for value in values}
+    updated = []
+    for role, token in tokens.items():
+        key = variables.get(role, f'{role}_token')
+        if key in existing:
+            existing[key]['value'] = token
+        else:
+            values.append({'key': key, 'value': token, 'type': 'secret', 'enabled': True})
+        updated.append(key)
+    return updated
+
+
+def write_json_atomic(path, data):
+    """
+    Write JSON to `path` through a temporary file and a rename.
+
+    Readers see either the old or the new file, never a partial one, and
+    the file keeps its permissions.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.postman-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent='\t')
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def update_file(path, tokens, variables, out_dir=None):
+    """
+    Update one collection or environment file.
+
+    Args:
+        path: Path to a Postman collection or environment JSON file
+        tokens: Lowercased role name -> token
+        variables: Lowercased role name -> environment variable name
+        out_dir: Directory to write to instead of overwriting `path`
+
+    Returns:
+        tuple: (output path, description of what was updated)
+
+    Raises:
+        OSError, ValueError: If the file cannot be read or is not Postman JSON
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    if not isinstance(data, dict):
+        raise ValueError("not a Postman collection or environment")
+    if isinstance(data.get('item'), list):
+        folders = update_items(data['item'], tokens)
+        summary = f"{len(folders)} folder(s): {', '.join(folders)}" if folders \
+            else "no role folders found"
+    elif isinstance(data.get('values'), list):
+        keys = update_environment(data, tokens, variables)
+        summary = f"{len(keys)} variable(s): {', '.join(keys)}"
+    else:
+        raise ValueError("not a Postman collection or environment")
+
+    output = os.path.join(out_dir, os.path.basename(path)) if out_dir else path
+    write_json_atomic(output, data)
+    return output, summary
+
+
+def fetch_token(settings):
+    """
+    Request an access token from an Auth0 tenant.
+
+    Args:
+        settings: 'domain' plus the token request fields (client_id,
+                  client_secret, audience, grant_type, username, ...)
+
+    Returns:
+        str: The access token
+    """
+    payload = {key: value for key, value in settings.items() if key != 'domain'}
+    payload.setdefault('grant_type', 'client_credentials')
+    response = requests.post(f"https://{settings['domain']}/oauth/token", json=payload, timeout=30)
+    response.raise_for_status()
+    return response.json()['access_token']
+
+
+def resolve_tokens(sources, ttl=3600, workers=8):
+    """
+    Turn role token sources into tokens.
+
+    Args:
+        sources: Lowercased role name -> source ({'token'}, {'env'},
+                 {'mint'} or {'fetch'})
+        ttl: Lifetime in seconds of minted tokens
+        workers: Concurrent token fetches
+
+    Returns:
+        dict: Lowercased role name -> token
+
+    Raises:
+        ValueError: If a source is invalid or yields no token
+    """
+    tokens = {}
+    fetches = {}
+    issuer = None
+
+    for role, source in sources.items():
+        if 'token' in source:
+            tokens[role] = source['token']
+        elif 'env' in source:
+            tokens[role] = os.environ.get(source['env'], '')
+        elif 'mint' in source:
+            if issuer is None:
+                from src.auth.local_issuer import LocalIssuer
+                issuer = LocalIssuer.load()
+            names = {name.lower(): name for name in issuer.roles}
+            if source['mint'].lower() not in names:
+                raise ValueError(f"cannot mint unknown role '{source['mint']}'")
+            tokens[role] = issuer.mint_role(names[source['mint'].lower()], ttl=ttl)
+        elif 'fetch' in source:
+            fetches[role] = source['fetch']
+        else:
+            raise ValueError(f"no token source for role '{role}'")
+
+    if fetches:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for role, token in zip(fetches, executor.map(fetch_token, fetches.values())):
+                tokens[role] = token
+
+    for role, token in tokens.items():
+        if not token or token in PLACEHOLDER_TOKENS:
+            raise ValueError(f"please provide a valid JWT token for role '{role}'")
+    return tokens
 
 
 def main():
     """Main function to handle command line arguments."""
-    if len(sys.argv) != 4:
-        print("Usage: python update_postman_auth.py <collection_file> <barista_token> <manager_token>")
-        print("\nExample:")
-        print("  python update_postman_auth.py udacity-fsnd-udaspicelatte.postman_collection.json \\")
-        print("    eyJhbGci... <barista_token> \\")
-        print("    eyJhbGci... <manager_token>")
-        sys.exit(1)
-    
-    collection_file = sys.argv[1]
-    barista_token = sys.argv[2]
-    manager_token = sys.argv[3]
-    
-    # Validate tokens are provided
-    if not barista_token or barista_token == 'YOUR_BARISTA_TOKEN':
-        print("Error: Please provide a valid Barista JWT token")
-        sys.exit(1)
-    
-    if not manager_token or manager_token == 'YOUR_MANAGER_TOKEN':
-        print("Error: Please provide a valid Manager JWT token")
-        sys.exit(1)
-    
-    update_collection_auth(collection_file, barista_token, manager_token)
+    argv = sys.argv[1:]
+    if len(argv) == 3 and not any(arg.startswith('-') for arg in argv) \
+            and not os.path.exists(argv[1]) and not os.path.exists(argv[2]):
+        # Original form: <collection_file> <barista_token> <manager_token>
+        argv = [argv[0], '--token', f'barista={argv[1]}', '--token', f'manager={argv[2]}']
 
+    parser = argparse.ArgumentParser(
+        description='Write role JWT tokens into Postman collections and environments')
+    parser.add_argument('files', nargs='+',
+                        help='Postman collection and environment JSON files')
+    parser.add_argument('--config',
+                        help='JSON file mapping role names to token sources')
+    parser.add_argument('--token', action='append', default=[], metavar='ROLE=JWT',
+                        help='Token for a role; overrides the config')
+    parser.add_argument('--mint', action='store_true',
+                        help='Mint tokens locally for the configured roles '
+                             '(default: Barista and Manager)')
+    parser.add_argument('--ttl', type=int, default=3600,
+                        help='Lifetime in seconds of minted tokens')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Concurrent token fetches')
+    parser.add_argument('--out-dir',
+                        help='Write updated files here instead of in place')
+    args = parser.parse_args(argv)
 
-if __name__ == '__main__':
-    main()
+    sources = {}
+    variables = {}
+    if args.config:
+        try:
+            with open(args.config, 'r') as f:
+                config = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"✗ Error reading config {args.config}: {e}")
+            return 1
+        if not isinstance(config, dict) or not isinstance(config.get('roles', {}), dict):
+            print(f"✗ Error reading config {args.config}: expected {{\"roles\": {{...}}}}")
+            return 1
+        for role, source in config.get('roles', {}).items():
+            sources[role.lower()] = source
+            if 'variable' in source:
+                variables[role.lower()] = source['variable']
+
+    if args.mint:
+        for role in (list(sources) or [role.lower() for role in DEFAULT_MINT_ROLES]):
+            if not sources.get(role, {}).keys() & {'token', 'env', 'fetch'}:
+                sources[role] = {**sources.get(role, {}), 'mint': role}
+
+    for assignment in args.token:
+        role, separator, token = assignment.partition('=')
+        if not separator:
+            parser.error(f'--token expects ROLE=JWT, got {assignment!r}')
+        sources[role.lower()] = {**sources.get(role.lower(), {}), 'token': token}
+        sources[role.lower()].pop('mint', None)
 
+    if not sources:
+        parser.error('no tokens given; use --config, --token or --mint')
+
+    try:
+        tokens = resolve_tokens(sources, ttl=args.ttl, workers=max(args.workers, 1))
+    except (ValueError, requests.RequestException) as e:
+        print(f"✗ Error obtaining tokens: {e}")
+        return 1
+    print(f"✓ Resolved tokens for {len(tokens)} role(s): {', '.join(sorted(tokens))}")
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    failed = 0
+    for path in args.files:
+        try:
+            output, summary = update_file(path, tokens, variables, args.out_dir)
+        except (OSError, ValueError) as e:
+            print(f"✗ {path}: {e}")
+            failed += 1
+            continue
+        print(f"✓ Updated {output}: {summary}")
+
+    print(f"\n✓ {len(args.files) - failed} file(s) updated, {failed} failed")
+    print("\nNext steps:")
+    print("1. Import the updated collection into Postman")
+    print("2. Test the endpoints with the new tokens")
+    print("3. Export the collection to share with the team")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())